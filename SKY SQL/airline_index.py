@@ -0,0 +1,84 @@
+"""
+Auflösung von Fluggesellschaftsnamen.
+
+Statt 'airline LIKE %name%' über die ganze Flugtabelle auszuwerten, hält dieses Modul einen
+kleinen Trigramm-Index über die unterschiedlichen Werte der Spalte 'airline'. Eine Benutzereingabe
+wird damit zuerst in die exakt passenden Werte aufgelöst; die eigentliche Flugabfrage nutzt dann
+'airline IN (...)' und kann den Index auf (airline, departure_delay) verwenden.
+
+Die Auflösung entspricht der LIKE-Semantik von SQLite: Teilstring-Suche, Groß-/Kleinschreibung
+wird nur für ASCII-Buchstaben ignoriert, '%' und '_' sind Platzhalter.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Set
+
+from sqlalchemy import text
+
+QUERY_DISTINCT_AIRLINES = "SELECT DISTINCT airline FROM flights WHERE airline IS NOT NULL"
+
+# SQLite-LIKE faltet nur ASCII-Großbuchstaben; str.lower() würde auch Umlaute etc. verändern.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def like_to_regex(pattern: str) -> "re.Pattern[str]":
+    """Übersetzt ein SQL-LIKE-Muster in einen regulären Ausdruck (ASCII ohne Groß-/Kleinschreibung)."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class AirlineIndex:
+    """
+    Trigramm-Index über die unterschiedlichen Fluggesellschaftswerte der Flugtabelle.
+    """
+
+    def __init__(self, airlines: Iterable[Any]) -> None:
+        """
+        Parameter:
+            airlines (iterable): Die unterschiedlichen Werte der Spalte 'airline' (Namen oder Codes).
+        """
+        self.airlines: List[Any] = list(airlines)
+        self._folded = [str(airline).translate(_ASCII_LOWER) for airline in self.airlines]
+        self._postings: Dict[str, Set[int]] = {}
+        for position, folded in enumerate(self._folded):
+            for trigram in _trigrams(folded):
+                self._postings.setdefault(trigram, set()).add(position)
+
+    @classmethod
+    def from_engine(cls, engine) -> "AirlineIndex":
+        """Baut den Index aus den unterschiedlichen Werten der Spalte 'airline'."""
+        with engine.connect() as conn:
+            return cls(row[0] for row in conn.execute(text(QUERY_DISTINCT_AIRLINES)))
+
+    def resolve(self, airline_name: str) -> List[Any]:
+        """
+        Gibt alle Werte zurück, auf die 'airline LIKE %airline_name%' zutreffen würde.
+
+        Parameter:
+            airline_name (str): Teil des Fluggesellschaftsnamens oder -codes.
+
+        Rückgabe:
+            list: Die exakten Werte der Spalte 'airline' in Indexreihenfolge.
+        """
+        if "%" in airline_name or "_" in airline_name:
+            pattern = like_to_regex(f"%{airline_name}%")
+            return [airline for airline in self.airlines if pattern.fullmatch(str(airline))]
+
+        needle = airline_name.translate(_ASCII_LOWER)
+        if len(needle) < 3:
+            candidates = range(len(self.airlines))
+        else:
+            postings = [self._postings.get(trigram, set()) for trigram in _trigrams(needle)]
+            candidates = sorted(set.intersection(*sorted(postings, key=len)))
+        return [self.airlines[i] for i in candidates if needle in self._folded[i]]
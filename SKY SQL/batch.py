@@ -0,0 +1,131 @@
+"""
+Nicht-interaktiver Batch-Modus für Sky SQL.
+
+Liest Abfragebefehle zeilenweise aus einer Datei oder stdin, führt sie gegen eine gemeinsame
+FlightData-Instanz aus und schreibt die Ergebnisse gepuffert als CSV oder JSON Lines.
+
+Befehle (eine Abfrage pro Zeile, Leerzeilen und Zeilen mit '#' werden ignoriert):
+
+    by_id <flight_id>
+    by_date <DD/MM/YYYY oder DD.MM.YYYY>
+    delayed_by_airline <name>
+    delayed_by_airport <IATA-Code>
+    all_delayed
+    average_delay_by_airline
+    delayed_per_day
+    delay_quantiles_by_airline
+    delay_quantiles_by_airport
+    delay_quantiles_by_weekday
+"""
+
+import sys
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, TextIO, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from data import FlightData
+from output import paginate
+
+DATE_FORMATS = ('%d/%m/%Y', '%d.%m.%Y')
+
+
+def parse_date(date_input: str) -> datetime:
+    """
+    Liest ein Datum im Format DD/MM/YYYY oder DD.MM.YYYY.
+
+    Raises:
+        ValueError: Wenn keines der Formate passt.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_input, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Ungültiges Datum '{date_input}'. Bitte DD/MM/YYYY oder DD.MM.YYYY verwenden.")
+
+
+def _by_id(data_manager: FlightData, argument: str) -> Iterable:
+    if not argument.isdigit():
+        raise ValueError(f"Ungültige Flug-ID '{argument}'.")
+    return data_manager.get_flight_by_id(int(argument))
+
+
+def _by_date(data_manager: FlightData, argument: str) -> Iterable:
+    date_obj = parse_date(argument)
+    return data_manager.get_flights_by_date(date_obj.day, date_obj.month, date_obj.year, stream=True)
+
+
+def _delayed_by_airline(data_manager: FlightData, argument: str) -> Iterable:
+    if not argument:
+        raise ValueError("Bitte einen Namen angeben.")
+    return data_manager.get_delayed_flights_by_airline(argument, stream=True)
+
+
+def _delayed_by_airport(data_manager: FlightData, argument: str) -> Iterable:
+    airport_code = argument.upper()
+    if not (airport_code.isalpha() and len(airport_code) == 3):
+        raise ValueError(f"Ungültiger IATA-Code '{argument}' (muss 3 Buchstaben sein).")
+    return data_manager.get_delayed_flights_by_airport(airport_code, stream=True)
+
+
+COMMANDS = {
+    "by_id": _by_id,
+    "by_date": _by_date,
+    "delayed_by_airline": _delayed_by_airline,
+    "delayed_by_airport": _delayed_by_airport,
+    "all_delayed": lambda data_manager, _: data_manager.get_all_delayed_flights(stream=True),
+    "average_delay_by_airline": lambda data_manager, _: data_manager.get_average_delay_by_airline(),
+    "delayed_per_day": lambda data_manager, _: data_manager.get_delayed_flights_per_day(),
+    "delay_quantiles_by_airline": lambda data_manager, _: data_manager.get_delay_quantiles_by_airline(),
+    "delay_quantiles_by_airport": lambda data_manager, _: data_manager.get_delay_quantiles_by_origin_airport(),
+    "delay_quantiles_by_weekday": lambda data_manager, _: data_manager.get_delay_quantiles_by_weekday(),
+}
+
+
+def read_commands(lines: Iterable[str]) -> Iterator[Tuple[int, str, str, str]]:
+    """
+    Liefert (Zeilennummer, Zeile, Befehl, Argument) für jede nicht leere Zeile, die kein Kommentar ist.
+
+    Die Zeilennummer zählt ab 1 und schließt Leer- und Kommentarzeilen mit ein, passt also zur Eingabedatei.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        command, _, argument = line.partition(" ")
+        yield line_number, line, command.lower(), argument.strip()
+
+
+def run_batch(data_manager: FlightData, lines: Iterable[str], sink, errors: TextIO = sys.stderr,
+              offset: int = 0, limit: Optional[int] = None) -> int:
+    """
+    Führt alle Befehle aus und schreibt die Ergebnisse in die Ausgabe.
+
+    Jede Ergebniszeile erhält die auslösende Befehlszeile in der Spalte 'query'. Fehlerhafte
+    Befehle und fehlgeschlagene SQL-Abfragen werden mit ihrer Zeilennummer auf errors gemeldet,
+    nicht in die Ausgabe geschrieben, und zählen als Fehlschlag. Bricht eine gestreamte Abfrage
+    mittendrin ab, bleiben die bis dahin geschriebenen Zeilen in der Ausgabe.
+
+    Parameter:
+        data_manager (FlightData): Gemeinsame Datenzugriffsschicht für alle Befehle.
+        lines (iterable): Befehlszeilen, z. B. eine geöffnete Datei oder sys.stdin.
+        sink: Ausgabeformat aus output.SINKS (siehe output.open_sink).
+        errors (TextIO): Ziel für Fehlermeldungen.
+        offset (int): Anzahl der übersprungenen Zeilen pro Befehl.
+        limit (int, optional): Höchstens so viele Zeilen pro Befehl ausgeben.
+
+    Rückgabe:
+        int: Anzahl fehlgeschlagener Befehle.
+    """
+    failures = 0
+    for line_number, line, command, argument in read_commands(lines):
+        handler = COMMANDS.get(command)
+        try:
+            if handler is None:
+                raise ValueError(f"Unbekannter Befehl '{command}'.")
+            sink.write_rows(paginate(handler(data_manager, argument), offset, limit), {"query": line})
+        except (ValueError, SQLAlchemyError) as error:
+            failures += 1
+            print(f"Zeile {line_number} ({line}): {error}", file=errors)
+    return failures
@@ -0,0 +1,203 @@
+"""
+Benchmark für FlightData.
+
+Misst jede get_*-Methode in mehreren Speicher-/Betriebsmodi und schreibt einen JSON-Bericht mit
+p50/p95/p99-Latenz, Zeilen pro Sekunde, Einrichtungszeit und maximalem RSS. Jeder Modus läuft
+in einem eigenen Prozess, damit Speicherspitzen und Caches sich nicht gegenseitig beeinflussen.
+
+Beispiel:
+    python generate_flights.py --rows 1000000 --output data/bench_flights.sqlite3
+    python benchmark.py --db data/bench_flights.sqlite3 --modes sql cached read --output bench.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+from data import FlightData
+
+# Modusname -> Konstruktoroptionen von FlightData. "summary" legt Tabellen und Trigger in der
+# Datenbank an, verändert die Datei also dauerhaft.
+MODES = {
+    "sql": {},
+    "read": {"profile": "read"},
+    "cached": {"use_cache": True},
+    "result-cache": {"result_cache_size": 256},
+    "summary": {"use_summary_tables": True},
+}
+DEFAULT_MODES = ("sql", "read", "cached")
+# Anzahl der Schlüssel pro Aufruf der Batch-Abfragen (get_flights_by_ids usw.).
+BATCH_LOOKUP_SIZE = 50
+QUANTILE_METHODS = ("get_delay_quantiles_by_airline", "get_delay_quantiles_by_origin_airport",
+                    "get_delay_quantiles_by_weekday")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Perzentil nach dem Nearest-Rank-Verfahren aus bereits sortierten Werten."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _read_only_uri(db_path: str) -> str:
+    """sqlite3-URI für schreibgeschützten Zugriff; Sonderzeichen wie '?' oder '#' im Pfad werden maskiert."""
+    return f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+
+
+def _row_count(result: Any) -> int:
+    """Anzahl der Ergebniszeilen; Batch-Abfragen liefern ein dict mit einer Liste pro Schlüssel."""
+    if isinstance(result, dict):
+        return sum(len(rows) for rows in result.values())
+    return len(result)
+
+
+def sample_arguments(db_path: str, count: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Zieht zufällige vorhandene Flüge und leitet daraus Argumente für jede Abfrage ab,
+    damit jede Wiederholung mit anderen Werten läuft. Die Batch-Abfragen erhalten jeweils
+    BATCH_LOOKUP_SIZE Schlüssel aus aufeinanderfolgenden Stichproben.
+    """
+    rng = random.Random(seed)
+    connection = sqlite3.connect(_read_only_uri(db_path), uri=True)
+    try:
+        max_id = connection.execute("SELECT MAX(id) FROM flights").fetchone()[0] or 0
+        flights = []
+        while len(flights) < count and max_id:
+            row = connection.execute(
+                "SELECT id, day, month, year, origin_airport, airline FROM flights WHERE id >= ? LIMIT 1",
+                (rng.randint(1, max_id),)).fetchone()
+            if row is None or row[5] is None:
+                continue
+            flights.append(row)
+    finally:
+        connection.close()
+
+    # Quantil-Abfragen brauchen NumPy (delay_sketch.py); ohne NumPy werden sie nicht gemessen.
+    with_quantiles = importlib.util.find_spec("numpy") is not None
+    samples = []
+    for index, (flight_id, day, month, year, origin, airline) in enumerate(flights):
+        batch = [flights[(index + offset) % len(flights)] for offset in range(BATCH_LOOKUP_SIZE)]
+        sample = {
+            "get_flight_by_id": (flight_id,),
+            "get_flights_by_date": (day, month, year),
+            "get_delayed_flights_by_airline": (str(airline).split()[0],),
+            "get_delayed_flights_by_airport": (origin,),
+            "get_all_delayed_flights": (),
+            "get_average_delay_by_airline": (),
+            "get_delayed_flights_per_day": (),
+            "get_flights_by_ids": ([other[0] for other in batch],),
+            "get_delayed_flights_by_airports": ([other[4] for other in batch],),
+            "get_flights_by_dates": ([(other[1], other[2], other[3]) for other in batch],),
+        }
+        if with_quantiles:
+            sample.update((name, ()) for name in QUANTILE_METHODS)
+        samples.append(sample)
+    return samples
+
+
+def run_mode(db_path: str, mode: str, samples: List[Dict[str, Any]], warmup: int) -> Dict[str, Any]:
+    """Misst alle Abfragen in einem Modus; läuft in einem eigenen Prozess."""
+    started = time.perf_counter()
+    data_manager = FlightData(f"sqlite:///{os.path.abspath(db_path)}", **MODES[mode])
+    setup_seconds = time.perf_counter() - started
+
+    methods = {}
+    for name in samples[0]:
+        method = getattr(data_manager, name)
+        for arguments in samples[:warmup]:
+            method(*arguments[name])
+        timings, rows = [], 0
+        for arguments in samples:
+            started = time.perf_counter()
+            rows += _row_count(method(*arguments[name]))
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        total = sum(timings)
+        methods[name] = {
+            "runs": len(timings),
+            "p50_ms": percentile(timings, 0.50) * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "p99_ms": percentile(timings, 0.99) * 1000,
+            "mean_ms": total / len(timings) * 1000,
+            "rows": rows,
+            "rows_per_second": rows / total if total else 0.0,
+        }
+    data_manager.close()
+
+    return {
+        "options": MODES[mode],
+        "setup_seconds": setup_seconds,
+        # ru_maxrss ist unter Linux in KiB, unter macOS in Byte angegeben.
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        // (1024 if platform.system() == "Darwin" else 1),
+        "methods": methods,
+    }
+
+
+def run_benchmark(db_path: str, modes: List[str], repeat: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """Führt alle Modi nacheinander aus und liefert den vollständigen Bericht."""
+    samples = sample_arguments(db_path, repeat, seed)
+    if not samples:
+        raise ValueError(f"Keine Flüge in {db_path} gefunden.")
+    connection = sqlite3.connect(_read_only_uri(db_path), uri=True)
+    try:
+        row_count = connection.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+    finally:
+        connection.close()
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": os.path.abspath(db_path),
+        "database_bytes": os.path.getsize(db_path),
+        "flights": row_count,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": repeat,
+        "modes": {},
+    }
+    for mode in modes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            report["modes"][mode] = executor.submit(run_mode, db_path, mode, samples, warmup).result()
+    return report
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"{report['flights']} Flüge, {report['repeat']} Wiederholungen pro Abfrage")
+    for mode, result in report["modes"].items():
+        print(f"\n[{mode}] Einrichtung {result['setup_seconds']:.2f} s, max. RSS {result['peak_rss_kib'] / 1024:.0f} MiB")
+        for name, stats in result["methods"].items():
+            print(f"  {name:<38} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+                  f"p99 {stats['p99_ms']:9.2f} ms  {stats['rows_per_second']:12.0f} Zeilen/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FlightData-Benchmark")
+    parser.add_argument("--db", required=True, help="Pfad zur Flugdatenbank (z. B. aus generate_flights.py)")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(DEFAULT_MODES),
+                        help="Zu messende Modi")
+    parser.add_argument("--repeat", type=int, default=20, help="Messungen pro Abfrage")
+    parser.add_argument("--warmup", type=int, default=2, help="Nicht gemessene Aufwärmläufe pro Abfrage")
+    parser.add_argument("--seed", type=int, default=7, help="Startwert für die Auswahl der Abfrageargumente")
+    parser.add_argument("--output", default="benchmark_report.json", help="Ziel des JSON-Berichts")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.db, args.modes, args.repeat, args.warmup, args.seed)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print_summary(report)
+    print(f"\nBericht gespeichert: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
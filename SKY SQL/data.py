@@ -6,52 +6,511 @@ mit SQLAlchemy abstrahiert und Methoden zum Abfragen von Flugdaten bietet. Ein F
 verspätet, wenn seine Verspätung nicht NULL ist und mindestens 20 Minuten beträgt.
 """
 
-from sqlalchemy import create_engine, text, Row
-from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Dict, Any, Optional, Sequence
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text, Row
+from typing import List, Dict, Any, Optional, Sequence, Iterable, Iterator, Tuple
+
+from airline_index import AirlineIndex
+from engine_profile import build_engine
+from index_manager import IndexManager
+from instrumentation import QueryStats, current_method, instrumented
+from result_cache import DatabaseVersion, QueryResultCache, make_key
+from summary_tables import SummaryTables, QUERY_AVERAGE_DELAY_FROM_SUMMARY, QUERY_DELAYED_PER_DAY_FROM_SUMMARY
+
+QUERY_FLIGHT_BY_ID = (
+    "SELECT id AS ID, "
+    "year, month, day, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "destination_airport AS DESTINATION_AIRPORT, "
+    "airline AS AIRLINE, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE id = :flight_id"
+)
+
+QUERY_FLIGHTS_BY_DATE = (
+    "SELECT id AS ID, "
+    "flight_number, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE year = :year AND month = :month AND day = :day"
+)
+
+QUERY_DELAYED_FLIGHTS_BY_AIRLINE = (
+    "SELECT id AS ID, "
+    "flight_number, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "destination_airport AS DESTINATION_AIRPORT, "
+    "airline AS AIRLINE, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE airline IN ({placeholders}) "
+    "AND departure_delay IS NOT NULL "
+    "AND departure_delay >= 20"
+)
+
+QUERY_DELAYED_FLIGHTS_BY_AIRPORT = (
+    "SELECT id AS ID, "
+    "flight_number, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE origin_airport = :airport_code "
+    "AND departure_delay IS NOT NULL "
+    "AND departure_delay >= 20"
+)
+
+QUERY_ALL_DELAYED_FLIGHTS = (
+    "SELECT id AS ID, "
+    "year, month, day, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "destination_airport AS DESTINATION_AIRPORT, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE departure_delay IS NOT NULL "
+    "AND departure_delay >= 20 "
+    "ORDER BY departure_delay DESC"
+)
+
+QUERY_AVERAGE_DELAY_BY_AIRLINE = (
+    "SELECT airline AS AIRLINE, AVG(departure_delay) AS AVERAGE_DELAY "
+    "FROM flights "
+    "GROUP BY airline"
+)
+
+QUERY_DELAYED_FLIGHTS_PER_DAY = (
+    "SELECT year, month, day, COUNT(*) AS DELAYED_FLIGHTS "
+    "FROM flights "
+    "WHERE departure_delay IS NOT NULL "
+    "AND departure_delay >= 20 "
+    "GROUP BY year, month, day "
+    "ORDER BY year, month, day"
+)
+
+# Batch-Abfragen: {placeholders} bzw. {conditions} werden pro Block von Schlüsseln ersetzt.
+QUERY_FLIGHTS_BY_IDS = (
+    "SELECT id AS ID, "
+    "year, month, day, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "destination_airport AS DESTINATION_AIRPORT, "
+    "airline AS AIRLINE, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE id IN ({placeholders})"
+)
+
+QUERY_DELAYED_FLIGHTS_BY_AIRPORTS = (
+    "SELECT id AS ID, "
+    "flight_number, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "departure_delay AS DELAY "
+    "FROM flights "
+    "WHERE origin_airport IN ({placeholders}) "
+    "AND departure_delay IS NOT NULL "
+    "AND departure_delay >= 20"
+)
+
+QUERY_FLIGHTS_BY_DATES = (
+    "SELECT id AS ID, "
+    "flight_number, "
+    "origin_airport AS ORIGIN_AIRPORT, "
+    "departure_delay AS DELAY, "
+    "year AS YEAR, month AS MONTH, day AS DAY "
+    "FROM flights "
+    "WHERE {conditions}"
+)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+# Schlüssel pro Batch-Abfrage; bleibt unter SQLites Grenze von 999 gebundenen Parametern.
+IN_CHUNK_SIZE = 500
+DATE_CHUNK_SIZE = 100
+
+# Alle SQL-Abfragen nach FlightData-Methode, z. B. für Query-Plan-Prüfungen.
+QUERIES = {
+    "get_flight_by_id": QUERY_FLIGHT_BY_ID,
+    "get_flights_by_date": QUERY_FLIGHTS_BY_DATE,
+    "get_delayed_flights_by_airline": QUERY_DELAYED_FLIGHTS_BY_AIRLINE.format(placeholders=":airline0"),
+    "get_delayed_flights_by_airport": QUERY_DELAYED_FLIGHTS_BY_AIRPORT,
+    "get_all_delayed_flights": QUERY_ALL_DELAYED_FLIGHTS,
+    "get_average_delay_by_airline": QUERY_AVERAGE_DELAY_BY_AIRLINE,
+    "get_delayed_flights_per_day": QUERY_DELAYED_FLIGHTS_PER_DAY,
+}
 
 
 class FlightData:
     """
-    Bietet Methoden zum Abfragen von Flugdaten aus einer SQLite-Datenbank.
+    Bietet Methoden zum Abfragen von Flugdaten aus einer SQLite-Datenbank oder aus einem
+    Verzeichnis von Partitionsdateien (siehe partitions.py).
     """
 
-    def __init__(self, db_uri: str) -> None:
+    def __init__(self, db_uri: str, use_cache: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                 use_summary_tables: bool = False, result_cache_size: int = 0,
+                 result_cache_ttl: float = 300.0, profile: str = "default", pool_size: int = 5,
+                 pragmas: Optional[Dict[str, Any]] = None, slow_query_ms: float = 500.0,
+                 slow_query_log: Optional[str] = None, persistent_version: bool = True) -> None:
         """
         Initialisiert eine neue FlightData-Instanz mit dem angegebenen Datenbank-URI.
 
         Parameter:
-            db_uri (str): Der Datenbank-URI (z. B. 'sqlite:///data/flights.sqlite3')
+            db_uri (str): Der Datenbank-URI (z. B. 'sqlite:///data/flights.sqlite3'). Zeigt der Pfad auf ein
+                Verzeichnis, wird jede *.sqlite3-Datei darin als Jahres- oder Monatspartition verwendet
+                (z. B. 'flights_2015_01.sqlite3'); Cache, Summentabellen und Ergebnis-Cache sind dann
+                nicht verfügbar, und die SQL-Messwerte stehen in den Instanzen der einzelnen Partitionen.
+            use_cache (bool): Lädt die Tabelle 'flights' einmalig in einen spaltenbasierten
+                In-Memory-Cache und beantwortet alle Abfragen daraus (benötigt NumPy).
+                Spätere Änderungen an der Datenbank werden erst mit reload_cache() sichtbar.
+            batch_size (int): Anzahl der Zeilen, die im Streaming-Modus pro fetchmany()-Aufruf geholt werden.
+            use_summary_tables (bool): Legt per Trigger gepflegte Summentabellen an (einmalig, benötigt
+                Schreibzugriff) und beantwortet Query 5 und 7 daraus.
+            result_cache_size (int): Anzahl der Abfrageergebnisse im LRU-Ergebnis-Cache (0 = aus).
+                Der Cache wird verworfen, sobald sich die Datenbank ändert.
+            result_cache_ttl (float): Lebensdauer eines Cache-Eintrags in Sekunden.
+            profile (str): Engine-Profil: "default", "read" (schreibgeschützte URI, query_only,
+                mmap und großer Page-Cache) oder "write" (wie "read", aber beschreibbar mit WAL).
+            pool_size (int): Anzahl dauerhaft gepoolter Verbindungen bei den Profilen "read" und "write".
+            pragmas (dict, optional): Abweichende SQLite-Pragmas für diese Profile, z. B. {"mmap_size": 0}.
+            slow_query_ms (float): Schwellwert in Millisekunden für das Slow-Query-Log.
+            slow_query_log (str, optional): Pfad eines rotierenden Logs, in das langsame Abfragen mit
+                Parametern, Zeilenzahl und Query-Plan geschrieben werden. Die Messwerte pro Methode
+                stehen unabhängig davon in self.stats.
+            persistent_version (bool): Hält für die Änderungserkennung (Ergebnis-Cache, Airline-Index)
+                eine eigene Verbindung offen (siehe result_cache.DatabaseVersion). Partitionen
+                verwenden False und erkennen Änderungen nur an den Dateimetadaten.
 
         Raises:
-            ValueError: Wenn der URI ungültig ist.
+            ValueError: Wenn URI, Batchgröße oder Profil ungültig sind oder eine Option mit einem
+                Partitionsverzeichnis nicht kombinierbar ist.
         """
         if not db_uri.startswith('sqlite:///'):
             raise ValueError("Ungültiger Datenbank-URI: Muss mit 'sqlite:///' beginnen.")
-        self.engine = create_engine(db_uri)
+        if batch_size < 1:
+            raise ValueError("Ungültige Batchgröße: Muss mindestens 1 sein.")
+        if profile == "read" and use_summary_tables:
+            raise ValueError("Summentabellen benötigen Schreibzugriff und sind mit dem Profil 'read' nicht möglich.")
+        self.batch_size = batch_size
+        self.db_path = db_uri[len('sqlite:///'):]
+        self.use_summary_tables = use_summary_tables
+        self._cache = None
+        self._partitions = None
+        self._delay_sketches = None
+        self._delay_sketches_lock = threading.Lock()
+        self._result_cache = None
+        self._airline_index = None
+        self._airline_index_version = None
+
+        if os.path.isdir(self.db_path):
+            if use_cache or use_summary_tables or result_cache_size > 0:
+                raise ValueError("Cache, Summentabellen und Ergebnis-Cache sind mit Partitionsverzeichnissen "
+                                 "nicht möglich.")
+            # Import erst hier, weil partitions.py selbst FlightData für die einzelnen Dateien verwendet.
+            from partitions import FlightPartitions
+            self.engine = None
+            self.stats = QueryStats(slow_query_ms, slow_query_log)
+            self._partitions = FlightPartitions(self.db_path, batch_size=batch_size, profile=profile,
+                                                pool_size=pool_size, pragmas=pragmas, slow_query_ms=slow_query_ms,
+                                                slow_query_log=slow_query_log, persistent_version=False)
+            return
+
+        self.engine = build_engine(db_uri, profile, pool_size, pragmas)
+        self.stats = QueryStats(slow_query_ms, slow_query_log, explain=IndexManager(self.engine).explain)
+        if use_summary_tables:
+            SummaryTables(self.engine).ensure()
+        if use_cache:
+            self.reload_cache()
+        self._db_version = DatabaseVersion(self.engine, self.db_path, persistent_version)
+        if result_cache_size > 0:
+            self._result_cache = QueryResultCache(result_cache_size, result_cache_ttl)
+
+    def close(self) -> None:
+        """
+        Gibt Verbindungen und, bei Partitionsverzeichnissen, den Prozess-Pool der Aggregationen frei.
+        Die Instanz ist danach nicht mehr verwendbar.
+        """
+        if self._partitions is not None:
+            self._partitions.close()
+            return
+        self._db_version.close()
+        self.engine.dispose()
+
+    def resolve_airlines(self, airline_name: str) -> List[Any]:
+        """
+        Löst einen (Teil-)Namen in die exakten Werte der Spalte 'airline' auf.
+
+        Der Trigramm-Index über die unterschiedlichen Fluggesellschaften wird beim ersten Aufruf
+        gebaut und neu aufgebaut, sobald sich die Datenbank geändert hat.
+
+        Parameter:
+            airline_name (str): Teil des Fluggesellschaftsnamens; Semantik wie 'LIKE %name%'.
+
+        Rückgabe:
+            list: Alle passenden Fluggesellschaften.
+        """
+        if self._partitions is not None:
+            return self._partitions.resolve_airlines(airline_name)
+        version = self._db_version.current()
+        if self._airline_index is None or version != self._airline_index_version:
+            self._airline_index = AirlineIndex.from_engine(self.engine)
+            self._airline_index_version = version
+        return self._airline_index.resolve(airline_name)
+
+    def result_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Gibt die Kennzahlen des Ergebnis-Caches zurück (Treffer, Fehlzugriffe, Füllstand).
+
+        Rückgabe:
+            dict: Kennzahlen oder None, wenn der Ergebnis-Cache deaktiviert ist.
+        """
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
+
+    def reload_cache(self) -> None:
+        """
+        Lädt den spaltenbasierten Cache (neu) aus der Datenbank.
+
+        Raises:
+            ValueError: Bei einem Partitionsverzeichnis.
+        """
+        if self._partitions is not None:
+            raise ValueError("Der spaltenbasierte Cache ist mit Partitionsverzeichnissen nicht möglich.")
+        # Import erst hier, damit der reine SQL-Modus ohne NumPy auskommt.
+        from flight_cache import FlightColumnCache
+        self._cache = FlightColumnCache(self.engine)
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """
+        Legt die zu den Abfragen passenden Indizes an und prüft danach alle Query-Pläne.
+
+        Rückgabe:
+            dict: Methodenname -> Query-Plan für jede Abfrage, die weiterhin die ganze Tabelle liest.
+
+        Raises:
+            SQLAlchemyError: Wenn die Indizes nicht angelegt werden können (z. B. schreibgeschützte Datei).
+        """
+        if self._partitions is not None:
+            return self._partitions.ensure_indexes()
+        manager = IndexManager(self.engine)
+        manager.ensure_indexes()
+        return manager.find_full_scans(QUERIES)
+
+    def run_concurrently(self, calls: Sequence[Tuple[str, Tuple]], max_workers: Optional[int] = None) -> List:
+        """
+        Führt mehrere unabhängige get_*-Abfragen gleichzeitig in einem Thread-Pool aus.
+
+        Jede Abfrage läuft auf einer eigenen Verbindung aus dem Pool. sqlite3 gibt den GIL nur
+        frei, während SQLite selbst rechnet; das Erzeugen der Python-Zeilenobjekte hält ihn. Es
+        überlappen sich also vor allem Abfragen, die in SQLite lange rechnen und wenige Zeilen
+        liefern (Aggregationen wie Query 5 und 7). Große Ergebnismengen laufen praktisch
+        nacheinander und liegen danach vollständig im Speicher; dafür besser stream=True verwenden.
+
+        Parameter:
+            calls (list): Paare aus Methodenname und Argumenten,
+                z. B. [("get_average_delay_by_airline", ()), ("get_flights_by_date", (1, 1, 2015))].
+            max_workers (int, optional): Maximale Anzahl gleichzeitiger Abfragen (Standard: alle).
+
+        Rückgabe:
+            list: Die Ergebnisse in der Reihenfolge der Aufrufe.
+
+        Raises:
+            ValueError: Wenn ein Methodenname keine get_*-Abfrage von FlightData ist.
+        """
+        for name, _ in calls:
+            if not name.startswith("get_") or not callable(getattr(self, name, None)):
+                raise ValueError(f"Unbekannte Abfrage: {name}")
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=max_workers or len(calls)) as executor:
+            futures = [executor.submit(getattr(self, name), *args) for name, args in calls]
+            return [future.result() for future in futures]
 
     def _execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> list[Any] | Sequence[Row[Any]]:
         """
         Führt die angegebene SQL-Abfrage mit optionalen Parametern aus.
 
+        Ist der Ergebnis-Cache aktiv, werden wiederholte Abfragen mit gleichen Parametern aus dem
+        Cache beantwortet, solange sich die Datenbank nicht geändert hat.
+
         Parameter:
             query (str): Die auszuführende SQL-Abfrage.
             params (dict, optional): Zu bindende Parameter für die Abfrage.
 
         Rückgabe:
             list: Eine Liste von SQLAlchemy-Row-Objekten mit den Abfrageergebnissen.
+
+        Raises:
+            SQLAlchemyError: Wenn die Abfrage fehlschlägt (z. B. fehlende Spalte oder gesperrte Datenbank).
         """
-        try:
-            with self.engine.connect() as conn:
-                result_obj = conn.execute(text(query), params or {})
-                return result_obj.fetchall()
-        except SQLAlchemyError as e:
-            print(f"SQLAlchemy-Fehler bei Abfrage: {e}")
-            return []
-        except Exception as e:
-            print(f"Unerwarteter Fehler bei Abfrage: {e}")
-            return []
+        cache_key = None
+        if self._result_cache is not None:
+            self._result_cache.validate(self._db_version.current())
+            cache_key = make_key(query, params)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+        with self.engine.connect() as conn:
+            started = time.perf_counter()
+            result_obj = conn.execute(text(query), params or {})
+            executed = time.perf_counter()
+            rows = result_obj.fetchall()
+            fetched = time.perf_counter()
+
+        self.stats.record_query(query, params, executed - started, fetched - executed, len(rows))
+        if cache_key is not None:
+            self._result_cache.put(cache_key, rows)
+        return rows
 
+    def _iter_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Row[Any]]:
+        """
+        Führt die SQL-Abfrage aus und liefert die Zeilen batchweise über fetchmany().
+
+        Es liegt immer nur ein Batch von höchstens batch_size Zeilen im Speicher; die Verbindung
+        bleibt geöffnet, bis der Iterator erschöpft oder geschlossen ist.
+
+        Parameter:
+            query (str): Die auszuführende SQL-Abfrage.
+            params (dict, optional): Zu bindende Parameter für die Abfrage.
+
+        Rückgabe:
+            Iterator: Die SQLAlchemy-Row-Objekte in Abfragereihenfolge.
+
+        Raises:
+            SQLAlchemyError: Beim Verbrauchen des Iterators, wenn die Abfrage fehlschlägt.
+        """
+        # Der Generator läuft erst nach dem Methodenaufruf; die Zuordnung für die Messung jetzt merken.
+        return self._stream_rows(query, params, current_method())
+
+    def _stream_rows(self, query: str, params: Optional[Dict[str, Any]], method: str) -> Iterator[Row[Any]]:
+        fetch_seconds = 0.0
+        rows = 0
+        with self.engine.connect() as conn:
+            started = time.perf_counter()
+            result_obj = conn.execution_options(stream_results=True).execute(text(query), params or {})
+            execute_seconds = time.perf_counter() - started
+            try:
+                while True:
+                    started = time.perf_counter()
+                    batch = result_obj.fetchmany(self.batch_size)
+                    fetch_seconds += time.perf_counter() - started
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    yield from batch
+            finally:
+                # Auch ein vorzeitig geschlossener Strom (z. B. --limit) wird mit den bis dahin geholten Zeilen erfasst.
+                self.stats.record_query(query, params, execute_seconds, fetch_seconds, rows, method)
+
+    def _run(self, query: str, params: Optional[Dict[str, Any]] = None,
+             stream: bool = False) -> List | Iterator[Row[Any]]:
+        """Führt die Abfrage als Liste oder, mit stream=True, als Iterator aus."""
+        if stream:
+            return self._iter_query(query, params)
+        return self._execute_query(query, params)
+
+    def _batch_lookup(self, keys: Sequence, chunk_size: int, build_query, key_of) -> Dict[Any, List]:
+        """
+        Fragt viele Schlüssel blockweise ab und gruppiert die Zeilen nach Schlüssel.
+
+        Parameter:
+            keys (list): Eindeutige Schlüssel in gewünschter Reihenfolge.
+            chunk_size (int): Anzahl Schlüssel pro Abfrage.
+            build_query (callable): Liefert (SQL, Parameter) für einen Block von Schlüsseln.
+            key_of (callable): Ermittelt den Schlüssel einer Ergebniszeile.
+
+        Rückgabe:
+            dict: Schlüssel -> Liste von Row-Objekten (leere Liste, wenn nichts gefunden wurde).
+        """
+        grouped = {key: [] for key in keys}
+        for start in range(0, len(keys), chunk_size):
+            query, params = build_query(keys[start:start + chunk_size])
+            for row in self._execute_query(query, params):
+                grouped[key_of(row)].append(row)
+        return grouped
+
+    @instrumented
+    def get_flights_by_ids(self, flight_ids: Iterable[int]) -> Dict[int, List]:
+        """
+        Ruft Flugdaten für viele Flug-IDs mit wenigen IN-Abfragen ab (Batch-Variante von Query 1 & 2).
+
+        Parameter:
+            flight_ids (iterable): Die Flug-IDs; Duplikate werden nur einmal abgefragt.
+
+        Rückgabe:
+            dict: Flug-ID -> Liste von Row-Objekten (leer, wenn die ID nicht existiert).
+        """
+        ids = list(dict.fromkeys(flight_ids))
+        if self._cache is not None:
+            return self._cache.get_flights_by_ids(ids)
+        if self._partitions is not None:
+            return self._partitions.get_flights_by_ids(ids)
+
+        def build_query(chunk):
+            placeholders = ", ".join(f":id{i}" for i in range(len(chunk)))
+            return (QUERY_FLIGHTS_BY_IDS.format(placeholders=placeholders),
+                    {f"id{i}": value for i, value in enumerate(chunk)})
+
+        return self._batch_lookup(ids, IN_CHUNK_SIZE, build_query, lambda row: row.ID)
+
+    @instrumented
+    def get_delayed_flights_by_airports(self, airport_codes: Iterable[str]) -> Dict[str, List]:
+        """
+        Ruft verspätete Flüge für viele Abflughäfen auf einmal ab (Batch-Variante von Query 6).
+
+        Parameter:
+            airport_codes (iterable): IATA-Codes der Abflughäfen.
+
+        Rückgabe:
+            dict: IATA-Code -> Liste von Row-Objekten.
+        """
+        codes = list(dict.fromkeys(airport_codes))
+        if self._cache is not None:
+            return self._cache.get_delayed_flights_by_airports(codes)
+        if self._partitions is not None:
+            return self._partitions.get_delayed_flights_by_airports(codes)
+
+        def build_query(chunk):
+            placeholders = ", ".join(f":code{i}" for i in range(len(chunk)))
+            return (QUERY_DELAYED_FLIGHTS_BY_AIRPORTS.format(placeholders=placeholders),
+                    {f"code{i}": value for i, value in enumerate(chunk)})
+
+        return self._batch_lookup(codes, IN_CHUNK_SIZE, build_query, lambda row: row.ORIGIN_AIRPORT)
+
+    @instrumented
+    def get_flights_by_dates(self, dates: Iterable[Tuple[int, int, int]]) -> Dict[Tuple[int, int, int], List]:
+        """
+        Ruft Flüge für viele Daten auf einmal ab (Batch-Variante von Query 3).
+
+        Jeder Block wird als OR-Verknüpfung von Gleichheitsbedingungen formuliert, damit SQLite
+        für jedes Datum den Index auf (year, month, day) verwenden kann.
+
+        Parameter:
+            dates (iterable): Daten als Tupel (day, month, year).
+
+        Rückgabe:
+            dict: (day, month, year) -> Liste von Row-Objekten (zusätzlich mit YEAR, MONTH, DAY).
+        """
+        keys = list(dict.fromkeys(tuple(date) for date in dates))
+        if self._cache is not None:
+            return self._cache.get_flights_by_dates(keys)
+        if self._partitions is not None:
+            return self._partitions.get_flights_by_dates(keys)
+
+        def build_query(chunk):
+            conditions = " OR ".join(
+                f"(year = :y{i} AND month = :m{i} AND day = :d{i})" for i in range(len(chunk)))
+            params = {}
+            for i, (day, month, year) in enumerate(chunk):
+                params.update({f"d{i}": day, f"m{i}": month, f"y{i}": year})
+            return QUERY_FLIGHTS_BY_DATES.format(conditions=conditions), params
+
+        return self._batch_lookup(keys, DATE_CHUNK_SIZE, build_query, lambda row: (row.DAY, row.MONTH, row.YEAR))
+
+    @instrumented
     def get_flight_by_id(self, flight_id: int) -> List:
         """
         Query 1 & 2: Ruft Flugdaten für eine bestimmte Flug-ID ab.
@@ -62,19 +521,14 @@ class FlightData:
         Rückgabe:
             list: Abfrageergebnisse als Liste von Row-Objekten.
         """
-        query = (
-            "SELECT id AS ID, "
-            "year, month, day, "
-            "origin_airport AS ORIGIN_AIRPORT, "
-            "destination_airport AS DESTINATION_AIRPORT, "
-            "airline AS AIRLINE, "
-            "departure_delay AS DELAY "
-            "FROM flights "
-            "WHERE id = :flight_id"
-        )
-        return self._execute_query(query, {"flight_id": flight_id})
+        if self._cache is not None:
+            return self._cache.get_flight_by_id(flight_id)
+        if self._partitions is not None:
+            return self._partitions.get_flight_by_id(flight_id)
+        return self._execute_query(QUERY_FLIGHT_BY_ID, {"flight_id": flight_id})
 
-    def get_flights_by_date(self, day: int, month: int, year: int) -> List:
+    @instrumented
+    def get_flights_by_date(self, day: int, month: int, year: int, stream: bool = False) -> List | Iterator:
         """
         Query 3: Ruft Flüge für ein gegebenes Datum ab.
 
@@ -82,86 +536,83 @@ class FlightData:
             day (int): Tag des Monats (1-31).
             month (int): Monat (1-12).
             year (int): Jahr (z. B. 2015).
+            stream (bool): Liefert einen Iterator, der die Zeilen batchweise aus der Datenbank holt.
 
         Rückgabe:
-            list: Abfrageergebnisse als Liste von Row-Objekten.
+            list: Abfrageergebnisse als Liste von Row-Objekten (oder Iterator bei stream=True).
         """
-        query = (
-            "SELECT id AS ID, "
-            "flight_number, "
-            "origin_airport AS ORIGIN_AIRPORT, "
-            "departure_delay AS DELAY "
-            "FROM flights "
-            "WHERE year = :year AND month = :month AND day = :day"
-        )
-        return self._execute_query(query, {"day": day, "month": month, "year": year})
+        if self._cache is not None:
+            results = self._cache.get_flights_by_date(day, month, year)
+            return iter(results) if stream else results
+        if self._partitions is not None:
+            return self._partitions.get_flights_by_date(day, month, year, stream=stream)
+        return self._run(QUERY_FLIGHTS_BY_DATE, {"day": day, "month": month, "year": year}, stream=stream)
 
-    def get_delayed_flights_by_airline(self, airline_name: str) -> List:
+    @instrumented
+    def get_delayed_flights_by_airline(self, airline_name: str, stream: bool = False) -> List | Iterator:
         """
         Unterstützt Query 5 (angepasst): Ruft verspätete Flüge für eine Fluggesellschaft ab.
 
+        Der Name wird zuerst über resolve_airlines() in exakte Werte aufgelöst, damit die Abfrage
+        'airline IN (...)' den Index auf (airline, departure_delay) nutzen kann statt LIKE '%...%'.
+
         Parameter:
             airline_name (str): Teil des Fluggesellschaftsnamens.
+            stream (bool): Liefert einen Iterator, der die Zeilen batchweise aus der Datenbank holt.
 
         Rückgabe:
-            list: Abfrageergebnisse als Liste von Row-Objekten.
+            list: Abfrageergebnisse als Liste von Row-Objekten (oder Iterator bei stream=True).
         """
-        query = (
-            "SELECT id AS ID, "
-            "flight_number, "
-            "origin_airport AS ORIGIN_AIRPORT, "
-            "destination_airport AS DESTINATION_AIRPORT, "
-            "airline AS AIRLINE, "
-            "departure_delay AS DELAY "
-            "FROM flights "
-            "WHERE airline LIKE :airline_name "
-            "AND departure_delay IS NOT NULL "
-            "AND departure_delay >= 20"
-        )
-        return self._execute_query(query, {"airline_name": f"%{airline_name}%"})
-
-    def get_delayed_flights_by_airport(self, airport_code: str) -> List:
+        if self._cache is not None:
+            results = self._cache.get_delayed_flights_by_airline(airline_name)
+            return iter(results) if stream else results
+        if self._partitions is not None:
+            return self._partitions.get_delayed_flights_by_airline(airline_name, stream=stream)
+        airlines = self.resolve_airlines(airline_name)
+        if not airlines:
+            return iter([]) if stream else []
+        placeholders = ", ".join(f":airline{i}" for i in range(len(airlines)))
+        params = {f"airline{i}": airline for i, airline in enumerate(airlines)}
+        return self._run(QUERY_DELAYED_FLIGHTS_BY_AIRLINE.format(placeholders=placeholders), params, stream=stream)
+
+    @instrumented
+    def get_delayed_flights_by_airport(self, airport_code: str, stream: bool = False) -> List | Iterator:
         """
         Query 6: Ruft verspätete Flüge von einem bestimmten Abflugflughafen ab.
 
         Parameter:
             airport_code (str): Der IATA-Code des Abflugflughafens.
+            stream (bool): Liefert einen Iterator, der die Zeilen batchweise aus der Datenbank holt.
 
         Rückgabe:
-            list: Abfrageergebnisse als Liste von Row-Objekten.
+            list: Abfrageergebnisse als Liste von Row-Objekten (oder Iterator bei stream=True).
         """
-        query = (
-            "SELECT id AS ID, "
-            "flight_number, "
-            "origin_airport AS ORIGIN_AIRPORT, "
-            "departure_delay AS DELAY "
-            "FROM flights "
-            "WHERE origin_airport = :airport_code "
-            "AND departure_delay IS NOT NULL "
-            "AND departure_delay >= 20"
-        )
-        return self._execute_query(query, {"airport_code": airport_code})
+        if self._cache is not None:
+            results = self._cache.get_delayed_flights_by_airport(airport_code)
+            return iter(results) if stream else results
+        if self._partitions is not None:
+            return self._partitions.get_delayed_flights_by_airport(airport_code, stream=stream)
+        return self._run(QUERY_DELAYED_FLIGHTS_BY_AIRPORT, {"airport_code": airport_code}, stream=stream)
 
-    def get_all_delayed_flights(self) -> List:
+    @instrumented
+    def get_all_delayed_flights(self, stream: bool = False) -> List | Iterator:
         """
         Query 4: Ruft alle verspäteten Flüge ab, sortiert nach Verspätung.
 
+        Parameter:
+            stream (bool): Liefert einen Iterator, der die Zeilen batchweise aus der Datenbank holt.
+
         Rückgabe:
-            list: Abfrageergebnisse als Liste von Row-Objekten.
+            list: Abfrageergebnisse als Liste von Row-Objekten (oder Iterator bei stream=True).
         """
-        query = (
-            "SELECT id AS ID, "
-            "year, month, day, "
-            "origin_airport AS ORIGIN_AIRPORT, "
-            "destination_airport AS DESTINATION_AIRPORT, "
-            "departure_delay AS DELAY "
-            "FROM flights "
-            "WHERE departure_delay IS NOT NULL "
-            "AND departure_delay >= 20 "
-            "ORDER BY departure_delay DESC"
-        )
-        return self._execute_query(query)
+        if self._cache is not None:
+            results = self._cache.get_all_delayed_flights()
+            return iter(results) if stream else results
+        if self._partitions is not None:
+            return self._partitions.get_all_delayed_flights(stream=stream)
+        return self._run(QUERY_ALL_DELAYED_FLIGHTS, stream=stream)
 
+    @instrumented
     def get_average_delay_by_airline(self) -> List:
         """
         Query 5: Berechnet die durchschnittliche Verspätung pro Fluggesellschaft.
@@ -169,13 +620,15 @@ class FlightData:
         Rückgabe:
             list: Liste von Row-Objekten mit Fluggesellschaft und Durchschnitt.
         """
-        query = (
-            "SELECT airline AS AIRLINE, AVG(departure_delay) AS AVERAGE_DELAY "
-            "FROM flights "
-            "GROUP BY airline"
-        )
-        return self._execute_query(query)
+        if self._cache is not None:
+            return self._cache.get_average_delay_by_airline()
+        if self._partitions is not None:
+            return self._partitions.get_average_delay_by_airline()
+        if self.use_summary_tables:
+            return self._execute_query(QUERY_AVERAGE_DELAY_FROM_SUMMARY)
+        return self._execute_query(QUERY_AVERAGE_DELAY_BY_AIRLINE)
 
+    @instrumented
     def get_delayed_flights_per_day(self) -> List:
         """
         Query 7: Zählt verspätete Flüge pro Tag.
@@ -183,15 +636,61 @@ class FlightData:
         Rückgabe:
             list: Liste von Row-Objekten mit Datum und Anzahl.
         """
-        query = (
-            "SELECT year, month, day, COUNT(*) AS DELAYED_FLIGHTS "
-            "FROM flights "
-            "WHERE departure_delay IS NOT NULL "
-            "AND departure_delay >= 20 "
-            "GROUP BY year, month, day "
-            "ORDER BY year, month, day"
-        )
-        return self._execute_query(query)
+        if self._cache is not None:
+            return self._cache.get_delayed_flights_per_day()
+        if self._partitions is not None:
+            return self._partitions.get_delayed_flights_per_day()
+        if self.use_summary_tables:
+            return self._execute_query(QUERY_DELAYED_PER_DAY_FROM_SUMMARY)
+        return self._execute_query(QUERY_DELAYED_FLIGHTS_PER_DAY)
+
+    def _delay_quantiles(self, dimension: str, key_field: str, quantiles: Sequence[float]) -> List:
+        if self._partitions is not None:
+            return self._partitions.delay_quantiles(dimension, key_field, quantiles)
+        # Die drei Quantil-Abfragen laufen in main.py gleichzeitig und sollen denselben Store teilen.
+        with self._delay_sketches_lock:
+            if self._delay_sketches is None:
+                # Import erst hier, damit der reine SQL-Modus ohne NumPy auskommt.
+                from delay_sketch import DelaySketchStore
+                self._delay_sketches = DelaySketchStore(self.engine, self.db_path)
+        return self._delay_sketches.quantile_rows(dimension, key_field, quantiles)
+
+    @instrumented
+    def get_delay_quantiles_by_airline(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> List:
+        """
+        Verspätungsquantile (Standard: p50/p90/p99) pro Fluggesellschaft.
+
+        Alle Quantil-Methoden teilen sich einen Durchlauf über die Flugtabelle, der KLL-Sketches pro
+        Gruppe baut. Die Sketches werden neben der Datenbank gespeichert und erst nach einer Änderung
+        der Datenbankdatei neu berechnet. Die Werte sind Näherungen (Rangfehler etwa 1 %).
+
+        Parameter:
+            quantiles (list): Gewünschte Anteile zwischen 0 und 1.
+
+        Rückgabe:
+            list: Zeilen mit AIRLINE, FLIGHTS (Flüge mit Verspätungsangabe) und P<Prozent> je Quantil.
+        """
+        return self._delay_quantiles("airline", "AIRLINE", quantiles)
+
+    @instrumented
+    def get_delay_quantiles_by_origin_airport(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> List:
+        """
+        Verspätungsquantile pro Abflughafen (siehe get_delay_quantiles_by_airline).
+
+        Rückgabe:
+            list: Zeilen mit ORIGIN_AIRPORT, FLIGHTS und P<Prozent> je Quantil.
+        """
+        return self._delay_quantiles("origin_airport", "ORIGIN_AIRPORT", quantiles)
+
+    @instrumented
+    def get_delay_quantiles_by_weekday(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> List:
+        """
+        Verspätungsquantile pro Wochentag, Montag bis Sonntag (siehe get_delay_quantiles_by_airline).
+
+        Rückgabe:
+            list: Zeilen mit WEEKDAY, FLIGHTS und P<Prozent> je Quantil.
+        """
+        return self._delay_quantiles("weekday", "WEEKDAY", quantiles)
 
 
 if __name__ == "__main__":
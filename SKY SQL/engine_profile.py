@@ -0,0 +1,78 @@
+"""
+Engine-Profile für die Flugdatenbank.
+
+Dieses Modul erzeugt die SQLAlchemy-Engine für FlightData. Neben dem Standardprofil gibt es ein
+leseoptimiertes Profil (schreibgeschützt über eine SQLite-URI, dauerhaft gepoolte Verbindungen,
+großes mmap und Page-Cache) und ein Schreibprofil mit WAL-Journal.
+"""
+
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+PROFILES = ("default", "read", "write")
+
+# Gemeinsame Pragmas für "read" und "write"; einzelne Werte lassen sich per pragmas überschreiben.
+TUNED_PRAGMAS = {
+    "mmap_size": 256 * 1024 * 1024,  # Datei bis 256 MiB direkt aus dem Page-Cache des Betriebssystems lesen
+    "cache_size": -64 * 1024,        # negativ = KiB, also 64 MiB Page-Cache pro Verbindung
+    "temp_store": "MEMORY",          # temporäre B-Trees (ORDER BY/GROUP BY) im Speicher
+}
+READ_PRAGMAS = {"query_only": "ON"}
+WRITE_PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL"}
+
+
+def _read_only_uri(db_uri: str) -> str:
+    """Wandelt 'sqlite:///pfad' in eine schreibgeschützte SQLite-URI um."""
+    path = db_uri[len('sqlite:///'):]
+    return f"sqlite:///file:{quote(path)}?mode=ro&uri=true"
+
+
+def build_engine(db_uri: str, profile: str = "default", pool_size: int = 5,
+                 pragmas: Optional[Dict[str, Any]] = None):
+    """
+    Erzeugt eine SQLAlchemy-Engine für das angegebene Profil.
+
+    Parameter:
+        db_uri (str): Der Datenbank-URI (z. B. 'sqlite:///data/flights.sqlite3').
+        profile (str): "default" (SQLAlchemy-Standard), "read" (schreibgeschützt, query_only)
+            oder "write" (WAL-Journal).
+        pool_size (int): Anzahl dauerhaft offener Verbindungen ("read" und "write").
+        pragmas (dict, optional): Zusätzliche oder abweichende Pragmas, z. B. {"mmap_size": 0}.
+
+    Rückgabe:
+        Engine: Die konfigurierte SQLAlchemy-Engine.
+
+    Raises:
+        ValueError: Wenn das Profil unbekannt ist.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unbekanntes Engine-Profil '{profile}'. Erlaubt: {', '.join(PROFILES)}")
+    if profile == "default":
+        return create_engine(db_uri)
+
+    settings = dict(TUNED_PRAGMAS)
+    settings.update(READ_PRAGMAS if profile == "read" else WRITE_PRAGMAS)
+    settings.update(pragmas or {})
+
+    url = _read_only_uri(db_uri) if profile == "read" else db_uri
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=pool_size,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in settings.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return engine
@@ -0,0 +1,227 @@
+"""
+Spaltenbasierter In-Memory-Cache für Flugdaten.
+
+Dieses Modul lädt die Tabelle 'flights' einmalig in kompakte NumPy-Spalten und beantwortet
+alle Abfragen von FlightData mit vektorisierten Masken und Gruppierungen, ohne die Datenbank
+erneut abzufragen. Die Ergebnisse entsprechen denen der SQL-Abfragen (gleiche Spalten, gleiche
+Reihenfolge, gleiche NULL-Behandlung).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from airline_index import like_to_regex
+from rows import CachedRow, make_rows
+
+LOAD_QUERY = (
+    "SELECT id, year, month, day, airline, flight_number, "
+    "origin_airport, destination_airport, departure_delay "
+    "FROM flights "
+    "ORDER BY id"
+)
+LOAD_BATCH_SIZE = 100_000
+MIN_DELAY = 20
+
+
+class _Categorical:
+    """
+    Kodiert eine Textspalte als Ganzzahl-Codes plus Wörterbuch der unterschiedlichen Werte.
+    """
+
+    def __init__(self) -> None:
+        self.values: List[Optional[str]] = []
+        self._lookup: Dict[Optional[str], int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self._lookup[value] = code
+            self.values.append(value)
+        return code
+
+    def code_of(self, value: Optional[str]) -> int:
+        """Gibt den Code eines Werts zurück oder -1, wenn der Wert nicht vorkommt."""
+        return self._lookup.get(value, -1)
+
+
+class FlightColumnCache:
+    """
+    Hält die Tabelle 'flights' als NumPy-Spalten und beantwortet die FlightData-Abfragen.
+    """
+
+    def __init__(self, engine) -> None:
+        """
+        Lädt alle Flüge einmalig aus der Datenbank.
+
+        Parameter:
+            engine: SQLAlchemy-Engine der Flugdatenbank.
+        """
+        self.airlines = _Categorical()
+        self.airports = _Categorical()
+        self._load(engine)
+
+    def _load(self, engine) -> None:
+        ids, years, months, days, flight_numbers = [], [], [], [], []
+        airline_codes, origin_codes, destination_codes, delays = [], [], [], []
+        self.delay_is_integer = True
+
+        with engine.connect() as conn:
+            result = conn.execute(text(LOAD_QUERY))
+            while True:
+                batch = result.fetchmany(LOAD_BATCH_SIZE)
+                if not batch:
+                    break
+                for flight_id, year, month, day, airline, number, origin, destination, delay in batch:
+                    ids.append(flight_id)
+                    years.append(year)
+                    months.append(month)
+                    days.append(day)
+                    flight_numbers.append(number)
+                    airline_codes.append(self.airlines.encode(airline))
+                    origin_codes.append(self.airports.encode(origin))
+                    destination_codes.append(self.airports.encode(destination))
+                    if delay is None:
+                        delays.append(np.nan)
+                    else:
+                        if not isinstance(delay, int):
+                            self.delay_is_integer = False
+                        delays.append(delay)
+
+        self.id = np.asarray(ids, dtype=np.int64)
+        self.year = np.asarray(years, dtype=np.int16)
+        self.month = np.asarray(months, dtype=np.int8)
+        self.day = np.asarray(days, dtype=np.int8)
+        self.flight_number = np.asarray(flight_numbers, dtype=object)
+        self.airline = np.asarray(airline_codes, dtype=np.int32)
+        self.origin = np.asarray(origin_codes, dtype=np.int32)
+        self.destination = np.asarray(destination_codes, dtype=np.int32)
+        self.departure_delay = np.asarray(delays, dtype=np.float64)
+
+        self.date_key = (self.year.astype(np.int32) * 10000
+                         + self.month.astype(np.int32) * 100
+                         + self.day.astype(np.int32))
+        # NaN-Vergleiche sind False, damit entspricht die Maske "IS NOT NULL AND >= 20".
+        self.delayed = self.departure_delay >= MIN_DELAY
+
+    def _delay_column(self, indices: np.ndarray) -> List[Any]:
+        values = self.departure_delay[indices]
+        missing = np.isnan(values)
+        if self.delay_is_integer:
+            column = np.where(missing, 0, values).astype(np.int64).tolist()
+        else:
+            column = values.tolist()
+        if missing.any():
+            for position in np.flatnonzero(missing).tolist():
+                column[position] = None
+        return column
+
+    def _rows(self, indices: np.ndarray, fields: Sequence[str]) -> List[CachedRow]:
+        """Baut Ergebniszeilen für die angegebenen Positionen und Spalten."""
+        airline_names = np.asarray(self.airlines.values, dtype=object)
+        airport_names = np.asarray(self.airports.values, dtype=object)
+        builders = {
+            "ID": lambda: self.id[indices].tolist(),
+            "year": lambda: self.year[indices].tolist(),
+            "month": lambda: self.month[indices].tolist(),
+            "day": lambda: self.day[indices].tolist(),
+            "YEAR": lambda: self.year[indices].tolist(),
+            "MONTH": lambda: self.month[indices].tolist(),
+            "DAY": lambda: self.day[indices].tolist(),
+            "flight_number": lambda: self.flight_number[indices].tolist(),
+            "ORIGIN_AIRPORT": lambda: airport_names[self.origin[indices]].tolist(),
+            "DESTINATION_AIRPORT": lambda: airport_names[self.destination[indices]].tolist(),
+            "AIRLINE": lambda: airline_names[self.airline[indices]].tolist(),
+            "DELAY": lambda: self._delay_column(indices),
+        }
+        columns = [builders[field]() for field in fields]
+        return make_rows(fields, zip(*columns))
+
+    def get_flight_by_id(self, flight_id: int) -> List[CachedRow]:
+        position = int(np.searchsorted(self.id, flight_id))
+        if position >= len(self.id) or self.id[position] != flight_id:
+            return []
+        return self._rows(np.array([position]), (
+            "ID", "year", "month", "day", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "DELAY"))
+
+    def get_flights_by_date(self, day: int, month: int, year: int) -> List[CachedRow]:
+        mask = self.date_key == year * 10000 + month * 100 + day
+        return self._rows(np.flatnonzero(mask), ("ID", "flight_number", "ORIGIN_AIRPORT", "DELAY"))
+
+    def get_delayed_flights_by_airline(self, airline_name: str) -> List[CachedRow]:
+        pattern = like_to_regex(f"%{airline_name}%")
+        codes = [code for code, name in enumerate(self.airlines.values)
+                 if name is not None and pattern.fullmatch(str(name))]
+        mask = self.delayed & np.isin(self.airline, codes)
+        return self._rows(np.flatnonzero(mask), (
+            "ID", "flight_number", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "DELAY"))
+
+    def get_delayed_flights_by_airport(self, airport_code: str) -> List[CachedRow]:
+        code = self.airports.code_of(airport_code)
+        if code < 0:
+            return []
+        mask = self.delayed & (self.origin == code)
+        return self._rows(np.flatnonzero(mask), ("ID", "flight_number", "ORIGIN_AIRPORT", "DELAY"))
+
+    def get_all_delayed_flights(self) -> List[CachedRow]:
+        indices = np.flatnonzero(self.delayed)
+        order = np.argsort(-self.departure_delay[indices], kind="stable")
+        return self._rows(indices[order], (
+            "ID", "year", "month", "day", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "DELAY"))
+
+    def _group(self, indices: np.ndarray, fields: Sequence[str], keys: Sequence, key_column: np.ndarray,
+               key_values: Sequence) -> Dict[Any, List[CachedRow]]:
+        """Verteilt die Zeilen an den Positionen auf die Schlüssel; key_column[i] gehört zu key_values."""
+        grouped = {key: [] for key in keys}
+        lookup = dict(zip(key_values, keys))
+        for row, value in zip(self._rows(indices, fields), key_column[indices].tolist()):
+            grouped[lookup[value]].append(row)
+        return grouped
+
+    def get_flights_by_ids(self, flight_ids: Sequence[int]) -> Dict[int, List[CachedRow]]:
+        wanted = np.asarray(flight_ids, dtype=np.int64)
+        positions = np.searchsorted(self.id, wanted)
+        positions = positions[positions < len(self.id)]
+        positions = np.unique(positions[np.isin(self.id[positions], wanted)])
+        return self._group(positions, (
+            "ID", "year", "month", "day", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "DELAY"),
+            flight_ids, self.id, flight_ids)
+
+    def get_delayed_flights_by_airports(self, airport_codes: Sequence[str]) -> Dict[str, List[CachedRow]]:
+        codes = [self.airports.code_of(code) for code in airport_codes]
+        mask = self.delayed & np.isin(self.origin, codes)
+        return self._group(np.flatnonzero(mask), ("ID", "flight_number", "ORIGIN_AIRPORT", "DELAY"),
+                           airport_codes, self.origin, codes)
+
+    def get_flights_by_dates(self, dates: Sequence[Tuple[int, int, int]]) -> Dict[Tuple, List[CachedRow]]:
+        date_keys = [year * 10000 + month * 100 + day for day, month, year in dates]
+        mask = np.isin(self.date_key, date_keys)
+        return self._group(np.flatnonzero(mask), (
+            "ID", "flight_number", "ORIGIN_AIRPORT", "DELAY", "YEAR", "MONTH", "DAY"),
+            dates, self.date_key, date_keys)
+
+    def get_average_delay_by_airline(self) -> List[CachedRow]:
+        has_delay = ~np.isnan(self.departure_delay)
+        size = len(self.airlines.values)
+        present = np.bincount(self.airline, minlength=size) > 0
+        counts = np.bincount(self.airline[has_delay], minlength=size)
+        sums = np.bincount(self.airline[has_delay], weights=self.departure_delay[has_delay], minlength=size)
+
+        # GROUP BY sortiert NULL zuerst, danach die Namen in Binärreihenfolge.
+        codes = sorted(np.flatnonzero(present).tolist(),
+                       key=lambda c: (self.airlines.values[c] is not None, self.airlines.values[c] or ""))
+        fields = ("AIRLINE", "AVERAGE_DELAY")
+        return make_rows(fields, (
+            (self.airlines.values[c], float(sums[c] / counts[c]) if counts[c] else None)
+            for c in codes
+        ))
+
+    def get_delayed_flights_per_day(self) -> List[CachedRow]:
+        keys, counts = np.unique(self.date_key[self.delayed], return_counts=True)
+        fields = ("year", "month", "day", "DELAYED_FLIGHTS")
+        return make_rows(fields, (
+            (key // 10000, key // 100 % 100, key % 100, count)
+            for key, count in zip(keys.tolist(), counts.tolist())
+        ))
@@ -0,0 +1,145 @@
+"""
+Generator für synthetische Flugdatenbanken.
+
+Erzeugt eine SQLite-Datei mit einer Tabelle 'flights' im Schema, das FlightData erwartet, in
+beliebiger Größe (z. B. 1 bis 50 Millionen Zeilen). Fluggesellschaften und Flughäfen sind
+Zipf-verteilt (wenige große Drehkreuze, viele kleine Flughäfen), Verspätungen folgen einer
+Mischung aus pünktlichen Flügen, einem exponentiellen Verspätungsschwanz und Ausfällen (NULL).
+
+Beispiel:
+    python generate_flights.py --rows 5000000 --output data/bench_5m.sqlite3
+"""
+
+import argparse
+import os
+import sqlite3
+import string
+import time
+
+import numpy as np
+
+AIRLINES = [
+    "Southwest Airlines Co.", "Delta Air Lines Inc.", "American Airlines Inc.", "Skywest Airlines Inc.",
+    "Atlantic Southeast Airlines", "United Air Lines Inc.", "American Eagle Airlines Inc.", "JetBlue Airways",
+    "US Airways Inc.", "Alaska Airlines Inc.", "Spirit Air Lines", "Frontier Airlines Inc.",
+    "Hawaiian Airlines Inc.", "Virgin America",
+]
+
+MAJOR_AIRPORTS = [
+    "ATL", "ORD", "DFW", "DEN", "LAX", "SFO", "PHX", "IAH", "LAS", "MSP", "MCO", "SEA", "DTW", "BOS",
+    "EWR", "CLT", "LGA", "SLC", "JFK", "BWI", "MDW", "DCA", "FLL", "SAN", "MIA", "PHL", "TPA", "DAL",
+    "HOU", "BNA", "PDX", "STL", "HNL", "OAK", "AUS", "MCI", "MSY", "SJC", "SMF", "SNA",
+]
+AIRPORT_COUNT = 320
+
+CREATE_TABLE = (
+    "CREATE TABLE flights ("
+    "id INTEGER PRIMARY KEY, "
+    "year INTEGER, month INTEGER, day INTEGER, day_of_week INTEGER, "
+    "airline TEXT, flight_number INTEGER, "
+    "origin_airport TEXT, destination_airport TEXT, "
+    "departure_delay INTEGER)"
+)
+INSERT_ROW = "INSERT INTO flights VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+CHUNK_SIZE = 500_000
+
+
+def _airport_codes(rng: np.random.Generator) -> list:
+    """Die großen US-Flughäfen plus zufällige, eindeutige Drei-Buchstaben-Codes."""
+    codes = list(MAJOR_AIRPORTS)
+    taken = set(codes)
+    letters = np.array(list(string.ascii_uppercase))
+    while len(codes) < AIRPORT_COUNT:
+        code = "".join(rng.choice(letters, 3))
+        if code not in taken:
+            taken.add(code)
+            codes.append(code)
+    return codes
+
+
+def _zipf_weights(count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _delays(rng: np.random.Generator, size: int) -> np.ndarray:
+    """
+    Verspätungen in Minuten: 65 % um die Abflugzeit (-15 bis 15), 33 % exponentieller
+    Verspätungsschwanz (Mittel 40 min, vereinzelt mehrere Stunden), 2 % Ausfälle (NaN = NULL).
+    """
+    kind = rng.random(size)
+    delays = np.rint(rng.normal(-2.0, 6.0, size)).clip(-15, 15)
+    late = kind >= 0.65
+    delays[late] = np.rint(rng.exponential(40.0, late.sum()) + 1)
+    delays[kind >= 0.98] = np.nan
+    return delays
+
+
+def generate(path: str, rows: int, first_year: int = 2015, years: int = 1, seed: int = 42) -> None:
+    """
+    Schreibt eine neue Flugdatenbank mit der angegebenen Anzahl Zeilen.
+
+    Parameter:
+        path (str): Zieldatei; eine vorhandene Datei wird überschrieben.
+        rows (int): Anzahl Flüge.
+        first_year (int): Erstes Jahr der Daten.
+        years (int): Anzahl Jahre, über die die Flüge gleichmäßig verteilt werden.
+        seed (int): Startwert des Zufallsgenerators (gleicher Seed = gleiche Datenbank).
+    """
+    rng = np.random.default_rng(seed)
+    airports = np.array(_airport_codes(rng), dtype=object)
+    airlines = np.array(AIRLINES, dtype=object)
+    airport_weights = _zipf_weights(len(airports), 1.1)
+    airline_weights = _zipf_weights(len(airlines), 0.8)
+    first_day = np.datetime64(f"{first_year}-01-01")
+    day_span = int((np.datetime64(f"{first_year + years}-01-01") - first_day).astype(int))
+
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute(CREATE_TABLE)
+
+    for start in range(0, rows, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, rows - start)
+        dates = first_day + np.sort(rng.integers(0, day_span, size)).astype("timedelta64[D]")
+        years_, months, days = (dates.astype("datetime64[Y]").astype(int) + 1970,
+                                dates.astype("datetime64[M]").astype(int) % 12 + 1,
+                                (dates - dates.astype("datetime64[M]")).astype(int) + 1)
+        day_of_week = (dates.astype(int) + 3) % 7 + 1  # 1970-01-01 war ein Donnerstag; 1 = Montag
+        origin = rng.choice(len(airports), size, p=airport_weights)
+        destination = rng.choice(len(airports), size, p=airport_weights)
+        same = origin == destination
+        destination[same] = (destination[same] + 1) % len(airports)
+        delays = _delays(rng, size)
+
+        connection.executemany(INSERT_ROW, zip(
+            range(start + 1, start + size + 1),
+            years_.tolist(), months.tolist(), days.tolist(), day_of_week.tolist(),
+            airlines[rng.choice(len(airlines), size, p=airline_weights)].tolist(),
+            rng.integers(1, 7000, size).tolist(),
+            airports[origin].tolist(), airports[destination].tolist(),
+            [None if np.isnan(delay) else int(delay) for delay in delays.tolist()],
+        ))
+        connection.commit()
+    connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetische Flugdatenbank für Benchmarks erzeugen")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Anzahl Flüge (Standard: 1.000.000)")
+    parser.add_argument("--output", default=os.path.join("data", "bench_flights.sqlite3"), help="Zieldatei")
+    parser.add_argument("--first-year", type=int, default=2015, help="Erstes Jahr der Daten")
+    parser.add_argument("--years", type=int, default=1, help="Anzahl Jahre")
+    parser.add_argument("--seed", type=int, default=42, help="Startwert des Zufallsgenerators")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    started = time.perf_counter()
+    generate(args.output, args.rows, args.first_year, args.years, args.seed)
+    print(f"{args.rows} Flüge in {time.perf_counter() - started:.1f} s nach {args.output} geschrieben.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Indexverwaltung für die Flugdatenbank.
+
+Dieses Modul legt die Indizes an, die zu den Abfragen von FlightData passen, und prüft jede
+Abfrage mit EXPLAIN QUERY PLAN darauf, ob sie noch die komplette Tabelle 'flights' durchläuft.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# Indexname -> Spalten. Jeder Index ist auf eine oder mehrere get_*-Abfragen zugeschnitten.
+FLIGHT_INDEXES = {
+    # get_flights_by_date
+    "idx_flights_date": "year, month, day",
+    # get_delayed_flights_by_airport: Gleichheit auf dem Flughafen, Bereich auf der Verspätung
+    "idx_flights_origin_delay": "origin_airport, departure_delay",
+    # get_delayed_flights_by_airline und get_average_delay_by_airline (deckend für AVG)
+    "idx_flights_airline_delay": "airline, departure_delay",
+    # get_all_delayed_flights (Bereich + Sortierung) und get_delayed_flights_per_day (deckend)
+    "idx_flights_delay_date": "departure_delay, year, month, day",
+}
+
+
+class IndexManager:
+    """
+    Legt die Indizes für FlightData an und prüft die Query-Pläne.
+    """
+
+    def __init__(self, engine) -> None:
+        """
+        Parameter:
+            engine: SQLAlchemy-Engine der Flugdatenbank.
+        """
+        self.engine = engine
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Legt alle fehlenden Indizes an und aktualisiert die Planer-Statistiken.
+
+        Rückgabe:
+            list: Namen der neu angelegten Indizes.
+
+        Raises:
+            SQLAlchemyError: Wenn die Datenbank nicht beschreibbar ist.
+        """
+        with self.engine.begin() as conn:
+            existing = {
+                row[0] for row in conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'flights'"))
+            }
+            created = []
+            for name, columns in FLIGHT_INDEXES.items():
+                if name not in existing:
+                    conn.execute(text(f"CREATE INDEX {name} ON flights ({columns})"))
+                    created.append(name)
+            if created:
+                conn.execute(text("ANALYZE flights"))
+        return created
+
+    def explain(self, query: str) -> List[str]:
+        """
+        Gibt die Zeilen von EXPLAIN QUERY PLAN für eine Abfrage zurück.
+
+        Parameter werden mit NULL gebunden; der Plan hängt nicht von ihren Werten ab.
+        """
+        params = {name: None for name in text(query).compile().params}
+        with self.engine.connect() as conn:
+            return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)]
+
+    def find_full_scans(self, queries: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Prüft die Abfragen und meldet alle, die 'flights' ohne Index durchlaufen.
+
+        Parameter:
+            queries (dict): Methodenname -> SQL-Abfrage.
+
+        Rückgabe:
+            dict: Methodenname -> vollständiger Query-Plan, nur für Abfragen mit Full Table Scan.
+        """
+        full_scans = {}
+        for name, query in queries.items():
+            try:
+                plan = self.explain(query)
+            except SQLAlchemyError as e:
+                print(f"Query-Plan für {name} konnte nicht ermittelt werden: {e}")
+                continue
+            # "SCAN flights" ohne "USING ... INDEX" bedeutet einen Durchlauf der ganzen Tabelle.
+            if any(detail.startswith(("SCAN flights", "SCAN TABLE flights")) and "INDEX" not in detail
+                   for detail in plan):
+                full_scans[name] = plan
+        return full_scans
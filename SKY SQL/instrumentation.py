@@ -0,0 +1,186 @@
+"""
+Messpunkte und Slow-Query-Log für FlightData.
+
+Dieses Modul misst jede öffentliche Abfragemethode (Gesamtzeit inklusive Cache-Pfad) und jede
+SQL-Ausführung getrennt nach Ausführung (execute) und Zeilen-Materialisierung (fetch). Abfragen
+über dem Schwellwert landen mit Parametern, Zeilenzahl und EXPLAIN QUERY PLAN in einem
+rotierenden Logfile. Für die Ausgabe im Menü werden pro Methode Latenz-Histogramme geführt.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional
+
+# Obergrenzen der Histogramm-Klassen in Millisekunden; die letzte Klasse ist offen.
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+_current_method: ContextVar[str] = ContextVar("current_method", default="-")
+
+
+class LatencyHistogram:
+    """
+    Zählt Messwerte in festen Latenzklassen und merkt sich Anzahl, Summe und Maximum.
+    """
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        position = len(HISTOGRAM_BOUNDS_MS)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if milliseconds <= bound:
+                position = i
+                break
+        self.buckets[position] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryStats:
+    """
+    Sammelt Latenzen pro Methode und schreibt langsame Abfragen in das Slow-Query-Log.
+    """
+
+    def __init__(self, slow_query_ms: float = 500.0, slow_query_log: Optional[str] = None,
+                 explain: Optional[Callable[[str], List[str]]] = None) -> None:
+        """
+        Parameter:
+            slow_query_ms (float): Ab dieser Dauer (SQL plus Materialisierung) gilt eine Abfrage als langsam.
+            slow_query_log (str, optional): Pfad des rotierenden Slow-Query-Logs; None schreibt keine Datei.
+                Alle QueryStats mit derselben Datei (z. B. die der Partitionen) schreiben über einen
+                gemeinsamen Handler, damit die Rotation nicht mehrere offene Dateien durcheinanderbringt.
+            explain (callable, optional): Liefert den Query-Plan einer SQL-Abfrage.
+        """
+        self.slow_query_ms = slow_query_ms
+        self.methods: Dict[str, LatencyHistogram] = {}
+        self.execute: Dict[str, LatencyHistogram] = {}
+        self.fetch: Dict[str, LatencyHistogram] = {}
+        self.rows: Dict[str, int] = {}
+        self.slow_queries = 0
+        self._explain = explain
+        self._plans: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        if slow_query_log:
+            self._logger = logging.getLogger(f"skysql.slow_queries:{os.path.abspath(slow_query_log)}")
+            if not self._logger.handlers:
+                self._logger.setLevel(logging.INFO)
+                self._logger.propagate = False
+                handler = RotatingFileHandler(slow_query_log, maxBytes=SLOW_LOG_MAX_BYTES,
+                                              backupCount=SLOW_LOG_BACKUPS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self._logger.addHandler(handler)
+
+    def record_call(self, method: str, seconds: float) -> None:
+        """Erfasst die Gesamtdauer eines Methodenaufrufs."""
+        with self._lock:
+            self.methods.setdefault(method, LatencyHistogram()).add(seconds * 1000)
+
+    def record_query(self, query: str, params: Optional[Dict[str, Any]], execute_seconds: float,
+                     fetch_seconds: float, rows: int, method: Optional[str] = None) -> None:
+        """
+        Erfasst eine SQL-Ausführung und protokolliert sie, falls sie langsam war.
+
+        Ohne method wird die Ausführung der gerade laufenden instrumentierten Methode zugeordnet.
+        """
+        method = method or current_method()
+        execute_ms, fetch_ms = execute_seconds * 1000, fetch_seconds * 1000
+        with self._lock:
+            self.execute.setdefault(method, LatencyHistogram()).add(execute_ms)
+            self.fetch.setdefault(method, LatencyHistogram()).add(fetch_ms)
+            self.rows[method] = self.rows.get(method, 0) + rows
+        if execute_ms + fetch_ms < self.slow_query_ms:
+            return
+        with self._lock:
+            self.slow_queries += 1
+        if self._logger is not None:
+            self._logger.info(json.dumps({
+                "method": method,
+                "wall_ms": round(execute_ms + fetch_ms, 3),
+                "execute_ms": round(execute_ms, 3),
+                "fetch_ms": round(fetch_ms, 3),
+                "rows": rows,
+                "params": params or {},
+                "plan": self.plan(query),
+                "query": query,
+            }, ensure_ascii=False, default=str))
+
+    def plan(self, query: str) -> List[str]:
+        """Query-Plan einer Abfrage; wird pro SQL-Text nur einmal ermittelt."""
+        if self._explain is None:
+            return []
+        plan = self._plans.get(query)
+        if plan is None:
+            try:
+                plan = self._explain(query)
+            except Exception as e:
+                plan = [f"EXPLAIN fehlgeschlagen: {e}"]
+            self._plans[query] = plan
+        return plan
+
+
+def current_method() -> str:
+    """Name der instrumentierten Methode, die gerade im aktuellen Thread läuft ('-' außerhalb)."""
+    return _current_method.get()
+
+
+def _timed_stream(stats: QueryStats, method: str, rows: Iterator, seconds: float) -> Iterator:
+    """
+    Reicht die Zeilen eines Stroms durch und erfasst den Aufruf erst, wenn der Strom erschöpft oder
+    vorzeitig geschlossen ist (z. B. durch --limit). Gezählt wird nur die Zeit, in der der Strom
+    Zeilen liefert, nicht die Verarbeitung beim Aufrufer.
+    """
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - started
+            yield row
+    finally:
+        stats.record_call(method, seconds)
+
+
+def instrumented(method: Callable) -> Callable:
+    """
+    Dekorator für FlightData-Methoden: misst den Aufruf und ordnet die darin ausgeführten
+    SQL-Abfragen dem Methodennamen zu. Liefert die Methode einen Iterator (stream=True), wird
+    der Aufruf erst beim Verbrauchen des Iterators zu Ende gemessen.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        token = _current_method.set(method.__name__)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except BaseException:
+            self.stats.record_call(method.__name__, time.perf_counter() - started)
+            raise
+        finally:
+            _current_method.reset(token)
+        seconds = time.perf_counter() - started
+        if isinstance(result, Iterator):
+            return _timed_stream(self.stats, method.__name__, result, seconds)
+        self.stats.record_call(method.__name__, seconds)
+        return result
+    return wrapper
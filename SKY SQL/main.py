@@ -3,15 +3,27 @@ Sky SQL - Flugdatenverwaltung
 
 Dieses Programm bietet eine Benutzeroberfläche zur Abfrage von Flugdaten aus einer SQLite-Datenbank.
 Es unterstützt alle 7 Abfragen aus der Aufgabe 'Day 2 - Data Queries'.
+Mit --batch FILE laufen die Befehle aus einer Datei oder stdin ohne Menü (siehe batch.py).
 """
 
 from datetime import datetime
-from data import FlightData
-from typing import List
+from batch import run_batch
+from data import DEFAULT_BATCH_SIZE, FlightData
+from instrumentation import HISTOGRAM_BOUNDS_MS
+from output import SINKS, ResultPrinter, open_sink
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Iterable, Optional
+import argparse
+import contextlib
 import os
+import sys
+import time
 
 SQLITE_URI = 'sqlite:///data/flights.sqlite3'  # Relativer Pfad, wird absolut gemacht
 
+# Ausgabe der Menü-Ergebnisse; wird in main() aus den Kommandozeilenoptionen erzeugt.
+result_printer = None
+
 def flight_by_id(data_manager: FlightData) -> None:
     """Query 1 & 2: Zeigt Informationen zu einem Flug basierend auf seiner ID an."""
     while True:
@@ -44,7 +56,7 @@ def delayed_flights_by_airline(data_manager: FlightData) -> None:
     if not airline_input:
         print("Bitte einen Namen eingeben.")
         return
-    results = data_manager.get_delayed_flights_by_airline(airline_input)
+    results = data_manager.get_delayed_flights_by_airline(airline_input, stream=True)
     print_results(results, f"Verspätete Flüge für Fluggesellschaft '{airline_input}'")
 
 def delayed_flights_by_airport(data_manager: FlightData) -> None:
@@ -52,72 +64,72 @@ def delayed_flights_by_airport(data_manager: FlightData) -> None:
     while True:
         airport_input = input("Enter origin airport IATA code: ").upper().strip()
         if airport_input.isalpha() and len(airport_input) == 3:
-            results = data_manager.get_delayed_flights_by_airport(airport_input)
+            results = data_manager.get_delayed_flights_by_airport(airport_input, stream=True)
             print_results(results, f"Verspätete Flüge von Flughafen {airport_input}")
             break
         print("Ungültiger IATA-Code (muss 3 Buchstaben sein). Versuche es erneut.")
 
 def additional_queries(data_manager: FlightData) -> None:
-    """Führt Query 4, 5 und 7 aus."""
+    """Führt Query 4 (gestreamt), danach Query 5 und 7 gleichzeitig aus."""
     print("\nQuery 4 - Alle verspäteten Flüge (sortiert nach Verspätung):")
-    results = data_manager.get_all_delayed_flights()
+    results = data_manager.get_all_delayed_flights(stream=True)
     print_results(results, "Alle verspäteten Flüge")
 
+    average_delays, delayed_per_day = data_manager.run_concurrently([
+        ("get_average_delay_by_airline", ()),
+        ("get_delayed_flights_per_day", ()),
+    ])
+
     print("\nQuery 5 - Durchschnittliche Verspätung pro Fluggesellschaft:")
-    results = data_manager.get_average_delay_by_airline()
-    print_results(results, "Durchschnittliche Verspätung pro Fluggesellschaft")
+    print_results(average_delays, "Durchschnittliche Verspätung pro Fluggesellschaft")
 
     print("\nQuery 7 - Anzahl verspäteter Flüge pro Tag:")
-    results = data_manager.get_delayed_flights_per_day()
-    print_results(results, "Verspätete Flüge pro Tag")
-
-def print_results(results: List, title: str = "Ergebnisse") -> None:
-    """Gibt die Ergebnisse einer Datenbankabfrage formatiert aus."""
-    print(f"\n{title}:")
-    print(f"Got {len(results)} results.")
-    if not results:
-        print("Keine Ergebnisse gefunden.")
-        return
+    print_results(delayed_per_day, "Verspätete Flüge pro Tag")
 
-    for result in results:
-        try:
-            mapping = result._mapping
-
-            if 'ID' in mapping and 'year' in mapping:
-                flight_id = mapping.get('ID', 'N/A')
-                year = mapping.get('year', 'N/A')
-                month = mapping.get('month', 'N/A')
-                day = mapping.get('day', 'N/A')
-                origin = mapping.get('ORIGIN_AIRPORT', 'N/A')
-                destination = mapping.get('DESTINATION_AIRPORT', 'N/A')
-                airline = mapping.get('AIRLINE', 'N/A')
-                delay = int(mapping.get('DELAY', 0))
-                print(f"{flight_id}. {origin} -> {destination} by {airline}, Date: {day}/{month}/{year}, Delay: {delay} minutes")
-
-            elif 'flight_number' in mapping:
-                flight_id = mapping.get('ID', 'N/A')
-                flight_number = mapping.get('flight_number', 'N/A')
-                origin = mapping.get('ORIGIN_AIRPORT', 'N/A')
-                delay = int(mapping.get('DELAY', 0))
-                print(f"{flight_id}. {origin} ({flight_number}), Delay: {delay} minutes")
-
-            elif 'AVERAGE_DELAY' in mapping:
-                airline = mapping.get('AIRLINE', 'N/A')
-                avg_delay = round(float(mapping.get('AVERAGE_DELAY', 0)), 2)
-                print(f"{airline}: Durchschnittliche Verspätung {avg_delay} Minuten")
-
-            elif 'DELAYED_FLIGHTS' in mapping:
-                year = mapping.get('year', 'N/A')
-                month = mapping.get('month', 'N/A')
-                day = mapping.get('day', 'N/A')
-                count = mapping.get('DELAYED_FLIGHTS', 0)
-                print(f"{day}/{month}/{year}: {count} verspätete Flüge")
-
-            else:
-                print(f"Unbekanntes Ergebnisformat: {result}")
-        except Exception as e:
-            print(f"Fehler beim Verarbeiten des Ergebnisses: {e}")
-            print(f"Rohdaten: {result}")
+def print_results(results: Iterable, title: str = "Ergebnisse") -> None:
+    """
+    Gibt die Ergebnisse einer Datenbankabfrage formatiert aus.
+
+    Listen werden mit vorangestellter Anzahl ausgegeben. Iteratoren (stream=True) werden
+    zeilenweise verbraucht, sodass die Ausgabe sofort beginnt; die Anzahl folgt am Ende.
+    Format, Ziel und Paging legt main() über --format, --output, --limit und --offset fest.
+    """
+    global result_printer
+    if result_printer is None:
+        sink = open_sink("table", flush_rows=DEFAULT_BATCH_SIZE)
+        result_printer = ResultPrinter(sink, messages=sink.stream)
+    result_printer.print_results(results, title)
+
+def delay_percentiles(data_manager: FlightData) -> None:
+    """Zeigt p50/p90/p99 der Verspätung pro Fluggesellschaft, Abflughafen und Wochentag an."""
+    airlines, airports, weekdays = data_manager.run_concurrently([
+        ("get_delay_quantiles_by_airline", ()),
+        ("get_delay_quantiles_by_origin_airport", ()),
+        ("get_delay_quantiles_by_weekday", ()),
+    ])
+    print_results(airlines, "Verspätungsquantile pro Fluggesellschaft")
+    print_results(airports, "Verspätungsquantile pro Abflughafen")
+    print_results(weekdays, "Verspätungsquantile pro Wochentag")
+
+def show_stats(data_manager: FlightData) -> None:
+    """Zeigt pro Methode Aufrufe, Latenzen (SQL, Materialisierung, gesamt) und ein Latenz-Histogramm."""
+    stats = data_manager.stats
+    if not stats.methods:
+        print("Noch keine Abfragen ausgeführt.")
+        return
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    print(f"\nAbfragestatistik ({stats.slow_queries} langsame Abfragen über {stats.slow_query_ms:g} ms):")
+    for method, histogram in sorted(stats.methods.items()):
+        print(f"\n{method}: {histogram.count} Aufrufe, "
+              f"Mittel {histogram.mean_ms:.1f} ms, Max {histogram.max_ms:.1f} ms")
+        if method in stats.execute:
+            print(f"  SQL {stats.execute[method].mean_ms:.1f} ms, "
+                  f"Materialisierung {stats.fetch[method].mean_ms:.1f} ms (Mittel), "
+                  f"{stats.rows[method]} Zeilen")
+        widest = max(histogram.buckets)
+        for label, count in zip(labels, histogram.buckets):
+            if count:
+                print(f"  {label:>9} {'#' * max(1, round(count / widest * 40))} {count}")
 
 def show_menu_and_get_input() -> callable:
     """Zeigt das Menü an und gibt die ausgewählte Funktion zurück."""
@@ -127,36 +139,137 @@ def show_menu_and_get_input() -> callable:
         3: (delayed_flights_by_airline, "Delayed flights by airline"),
         4: (delayed_flights_by_airport, "Delayed flights by origin airport (Query 6)"),
         5: (additional_queries, "Run additional queries (Query 4, 5, 7)"),
-        6: (quit, "Exit")
+        6: (delay_percentiles, "Delay percentiles by airline, airport and weekday"),
+        7: (show_stats, "Show query statistics"),
+        8: (quit, "Exit")
     }
     print("\n=== Sky SQL - Flugdatenverwaltung ===")
     for key, (_, description) in menu_options.items():
         print(f"{key}. {description}")
     while True:
         try:
-            choice = int(input("Choose an option (1-6): ").strip())
+            choice = int(input("Choose an option (1-8): ").strip())
             if choice in menu_options:
                 return menu_options[choice][0]
-            print("Ungültige Option. Bitte wähle zwischen 1 und 6.")
+            print("Ungültige Option. Bitte wähle zwischen 1 und 8.")
         except ValueError:
             print("Ungültige Eingabe. Bitte eine Zahl eingeben.")
 
+def report_index_check(data_manager: FlightData) -> None:
+    """Legt die Indizes an und meldet Abfragen, die weiterhin die ganze Tabelle lesen."""
+    try:
+        full_scans = data_manager.ensure_indexes()
+    except SQLAlchemyError as error:
+        print(f"Indizes konnten nicht angelegt werden: {error}")
+        return
+    if not full_scans:
+        print("Alle Abfragen verwenden einen Index.")
+        return
+    for method, plan in full_scans.items():
+        print(f"Full Table Scan in {method}:")
+        for detail in plan:
+            print(f"  {detail}")
+
+def run_batch_mode(data_manager: FlightData, command_file: str, sink, offset: int = 0,
+                   limit: Optional[int] = None) -> None:
+    """Führt die Befehle aus der Datei (oder stdin) aus und schreibt die Ergebnisse gepuffert in den Sink."""
+    if command_file == "-":
+        failures = run_batch(data_manager, sys.stdin, sink, offset=offset, limit=limit)
+    else:
+        with open(command_file, "r", encoding="utf-8") as commands:
+            failures = run_batch(data_manager, commands, sink, offset=offset, limit=limit)
+    if failures:
+        sys.exit(1)
+
 def main() -> None:
     """Hauptfunktion, die das Programm ausführt."""
+    global result_printer
+    parser = argparse.ArgumentParser(description="Sky SQL - Flugdatenverwaltung")
+    parser.add_argument("--cached", action="store_true",
+                        help="Flugdaten einmalig in den Speicher laden und Abfragen daraus beantworten")
+    parser.add_argument("--ensure-indexes", action="store_true",
+                        help="Passende Indizes anlegen und Query-Pläne auf Full Table Scans prüfen")
+    parser.add_argument("--summary-tables", action="store_true",
+                        help="Query 5 und 7 aus per Trigger gepflegten Summentabellen beantworten")
+    parser.add_argument("--result-cache", type=int, default=0, metavar="N",
+                        help="Die letzten N Abfrageergebnisse zwischenspeichern (0 = aus)")
+    parser.add_argument("--profile", choices=("default", "read", "write"), default="default",
+                        help="Engine-Profil: 'read' öffnet die Datenbank schreibgeschützt mit gepoolten, "
+                             "leseoptimierten Verbindungen, 'write' verwendet WAL")
+    parser.add_argument("--slow-query-ms", type=float, default=500.0,
+                        help="Schwellwert in Millisekunden für das Slow-Query-Log")
+    parser.add_argument("--slow-query-log", metavar="FILE",
+                        help="Langsame Abfragen mit Parametern und Query-Plan in FILE protokollieren (rotierend)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Befehle aus FILE ('-' für stdin) ohne Menü ausführen und Ergebnisse auf stdout schreiben")
+    parser.add_argument("--format", choices=sorted(SINKS),
+                        help="Ausgabeformat der Ergebnisse (Standard: 'table' im Menü, 'jsonl' im Batch-Modus)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="Ergebniszeilen in FILE statt auf stdout schreiben (für 'parquet' erforderlich)")
+    parser.add_argument("--limit", type=int, metavar="N", help="Höchstens N Zeilen pro Ergebnis ausgeben")
+    parser.add_argument("--offset", type=int, default=0, metavar="N", help="Die ersten N Zeilen jedes Ergebnisses überspringen")
+    parser.add_argument("--db", metavar="PATH",
+                        help="Datenbankdatei oder Verzeichnis mit Jahres-/Monatspartitionen "
+                             "(Standard: data/flights.sqlite3 neben diesem Skript)")
+    args = parser.parse_args()
+    if args.offset < 0 or (args.limit is not None and args.limit < 0):
+        parser.error("--limit und --offset dürfen nicht negativ sein")
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet benötigt --output FILE")
+
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(base_dir, 'data', 'flights.sqlite3')
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(base_dir, 'data', 'flights.sqlite3')
     absolute_uri = f'sqlite:///{db_path}'
 
     try:
-        data_manager = FlightData(absolute_uri)
+        data_manager = FlightData(absolute_uri, use_cache=args.cached, use_summary_tables=args.summary_tables,
+                                  result_cache_size=args.result_cache, profile=args.profile,
+                                  slow_query_ms=args.slow_query_ms, slow_query_log=args.slow_query_log)
+    except ValueError as ve:
+        print(f"Fehler bei der Datenbankinitialisierung: {ve}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        # Im Menü soll gestreamte Ausgabe blockweise erscheinen, nicht erst, wenn 1 MiB voll ist.
+        interactive = not args.batch and not args.output
+        sink = open_sink(args.format or ("jsonl" if args.batch else "table"), args.output,
+                         flush_rows=data_manager.batch_size if interactive else None)
+        if args.batch:
+            if args.ensure_indexes:
+                with contextlib.redirect_stdout(sys.stderr):
+                    report_index_check(data_manager)
+            try:
+                run_batch_mode(data_manager, args.batch, sink, args.offset, args.limit)
+            finally:
+                sink.close()
+            return
+        result_printer = ResultPrinter(sink, args.offset, args.limit,
+                                       messages=sink.stream if not args.output else None)
         print("Verbindung zur Datenbank erfolgreich hergestellt.")
+        if args.ensure_indexes:
+            report_index_check(data_manager)
         while True:
             selected_function = show_menu_and_get_input()
-            selected_function(data_manager)
+            started = time.perf_counter()
+            try:
+                selected_function(data_manager)
+            except SQLAlchemyError as error:
+                # Eine fehlgeschlagene Abfrage beendet nicht das Menü.
+                print(f"SQLAlchemy-Fehler bei Abfrage: {error}", file=sys.stderr)
+                continue
+            if selected_function is not show_stats:
+                # Gesamtzeit inkl. Ausgabe; abzüglich der Methodenzeit bleibt die Formatierung.
+                data_manager.stats.record_call(f"menu:{selected_function.__name__}", time.perf_counter() - started)
     except ValueError as ve:
-        print(f"Fehler bei der Datenbankinitialisierung: {ve}")
+        # z. B. fehlendes pyarrow für --format parquet oder ungültige Eingaben in einer Abfrage.
+        print(f"Fehler: {ve}", file=sys.stderr)
+        sys.exit(1)
     except Exception as error:
-        print(f"Ein unerwarteter Fehler ist aufgetreten: {error}")
+        print(f"Ein unerwarteter Fehler ist aufgetreten: {error}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        # Auch beim Beenden über das Menü (SystemExit): Verbindungen und Worker-Prozesse freigeben.
+        data_manager.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,385 @@
+"""
+Ausgabeformate für Abfrageergebnisse.
+
+Dieses Modul schreibt Ergebniszeilen (SQLAlchemy-Rows oder CachedRows) als lesbare Tabelle, CSV,
+JSON Lines oder Parquet. Die Spaltenfolge und damit das Zeilenformat wird einmal pro Ergebnisblock
+bestimmt statt für jede Zeile neu; geschrieben wird über einen großen Puffer statt mit einem
+print() pro Zeile. Im interaktiven Menü wird der Puffer zusätzlich nach jedem Block von Zeilen
+geleert, damit gestreamte Ergebnisse sofort sichtbar werden.
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Sized, TextIO
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+PARQUET_BATCH_ROWS = 64 * 1024
+
+
+def open_stdout(buffer_size: int = OUTPUT_BUFFER_SIZE) -> TextIO:
+    """
+    Öffnet stdout als Textstrom mit großem Schreibpuffer.
+
+    Der Aufrufer muss den Strom mit flush() leeren; stdout selbst bleibt geöffnet.
+    """
+    raw = open(sys.stdout.fileno(), "wb", buffering=buffer_size, closefd=False)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=False)
+
+
+def paginate(rows: Iterable, offset: int = 0, limit: Optional[int] = None) -> Iterable:
+    """
+    Überspringt offset Zeilen und begrenzt auf limit Zeilen.
+
+    Listen werden geschnitten, Iteratoren (stream=True) nur so weit verbraucht wie nötig.
+    """
+    if not offset and limit is None:
+        return rows
+    stop = None if limit is None else offset + limit
+    if isinstance(rows, Sequence):
+        return rows[offset:stop]
+    return itertools.islice(rows, offset, stop)
+
+
+class _TextSink:
+    """Gemeinsame Basis der Textformate: ein gepufferter Strom, der am Ende geleert wird."""
+
+    def __init__(self, stream: TextIO, flush_rows: Optional[int] = None) -> None:
+        """
+        Parameter:
+            stream (TextIO): Zielstrom.
+            flush_rows (int, optional): Leert den Strom zusätzlich nach jeweils so vielen Zeilen.
+        """
+        self.stream = stream
+        self.flush_rows = flush_rows
+
+    def _rows(self, rows: Iterable) -> Iterable:
+        """Gibt die Zeilen weiter; mit flush_rows wird der Strom nach jeweils so vielen Zeilen geleert."""
+        return self._flushing(rows) if self.flush_rows else rows
+
+    def _flushing(self, rows: Iterable) -> Iterator:
+        for count, row in enumerate(rows, 1):
+            yield row
+            if count % self.flush_rows == 0:
+                self.stream.flush()
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Leert den Puffer und schließt den Strom (ein Strom aus open_stdout() lässt stdout offen)."""
+        self.stream.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def _minutes(value: Any) -> Any:
+    return "N/A" if value is None else int(value)
+
+
+def _table_layout(fields: Sequence[str]) -> Callable[[Sequence[Any]], str]:
+    """
+    Wählt anhand der Spalten das Zeilenformat der Menüausgabe.
+
+    Rückgabe:
+        callable: Formatiert eine Zeile (Tupel in der Reihenfolge von fields) inklusive Zeilenumbruch.
+    """
+    position = {name: i for i, name in enumerate(fields)}
+
+    def column(name: str) -> Callable[[Sequence[Any]], Any]:
+        i = position.get(name)
+        return (lambda row: "N/A") if i is None else (lambda row: row[i])
+
+    if "ID" in position and "year" in position:
+        flight_id, year, month, day = column("ID"), column("year"), column("month"), column("day")
+        origin, destination = column("ORIGIN_AIRPORT"), column("DESTINATION_AIRPORT")
+        airline, delay = column("AIRLINE"), column("DELAY")
+        return lambda row: (f"{flight_id(row)}. {origin(row)} -> {destination(row)} by {airline(row)}, "
+                            f"Date: {day(row)}/{month(row)}/{year(row)}, Delay: {_minutes(delay(row))} minutes\n")
+
+    if "flight_number" in position:
+        flight_id, flight_number = column("ID"), column("flight_number")
+        origin, delay = column("ORIGIN_AIRPORT"), column("DELAY")
+        return lambda row: f"{flight_id(row)}. {origin(row)} ({flight_number(row)}), Delay: {_minutes(delay(row))} minutes\n"
+
+    if "AVERAGE_DELAY" in position:
+        airline, average = column("AIRLINE"), column("AVERAGE_DELAY")
+        return lambda row: (f"{airline(row)}: Durchschnittliche Verspätung "
+                            f"{'N/A' if average(row) is None else round(float(average(row)), 2)} Minuten\n")
+
+    if "FLIGHTS" in position:
+        flights = column("FLIGHTS")
+        quantiles = [(name.lower(), i) for name, i in position.items() if name.startswith("P")]
+
+        def quantile_line(row: Sequence[Any]) -> str:
+            values = ", ".join(f"{name} {row[i]:g}" for name, i in quantiles if row[i] is not None)
+            return f"{row[0]}: {values} Minuten ({flights(row)} Flüge)\n"
+        return quantile_line
+
+    if "DELAYED_FLIGHTS" in position:
+        year, month, day, delayed = column("year"), column("month"), column("day"), column("DELAYED_FLIGHTS")
+        return lambda row: f"{day(row)}/{month(row)}/{year(row)}: {delayed(row)} verspätete Flüge\n"
+
+    return lambda row: ", ".join(f"{name}={value}" for name, value in zip(fields, row)) + "\n"
+
+
+class TableSink(_TextSink):
+    """
+    Schreibt Zeilen im lesbaren Format des Menüs, z. B. '1. LAX -> JFK by ..., Delay: 25 minutes'.
+    """
+
+    def write_rows(self, rows: Iterable, extra: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Schreibt alle Zeilen; extra-Felder (z. B. die Abfrage) erscheinen als Überschrift.
+
+        Rückgabe:
+            int: Anzahl geschriebener Zeilen.
+        """
+        write = self.stream.write
+        if extra:
+            write("# " + ", ".join(f"{key}: {value}" for key, value in extra.items()) + "\n")
+        layout = None
+        count = 0
+        for row in self._rows(rows):
+            if layout is None:
+                layout = _table_layout(row._fields)
+            write(layout(row))
+            count += 1
+        return count
+
+
+class CsvSink(_TextSink):
+    """
+    Schreibt Zeilen als CSV. Ändert sich die Spaltenfolge, wird eine neue Kopfzeile geschrieben.
+    """
+
+    def __init__(self, stream: TextIO, flush_rows: Optional[int] = None) -> None:
+        super().__init__(stream, flush_rows)
+        self._writer = csv.writer(stream)
+        self._header = None
+
+    def write_rows(self, rows: Iterable, extra: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Schreibt alle Zeilen; extra-Spalten (z. B. die Abfrage) werden jeder Zeile vorangestellt.
+
+        Rückgabe:
+            int: Anzahl geschriebener Zeilen.
+        """
+        extra = extra or {}
+        prefix = list(extra.values())
+        count = 0
+        for row in self._rows(rows):
+            if count == 0:
+                header = list(extra) + list(row._fields)
+                if header != self._header:
+                    self._writer.writerow(header)
+                    self._header = header
+            self._writer.writerow(prefix + list(row))
+            count += 1
+        return count
+
+
+class JsonlSink(_TextSink):
+    """
+    Schreibt jede Zeile als JSON-Objekt in eine eigene Zeile (JSON Lines).
+    """
+
+    def __init__(self, stream: TextIO, flush_rows: Optional[int] = None) -> None:
+        super().__init__(stream, flush_rows)
+        self._encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+    def write_rows(self, rows: Iterable, extra: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Schreibt alle Zeilen; extra-Felder (z. B. die Abfrage) werden jedem Objekt vorangestellt.
+
+        Rückgabe:
+            int: Anzahl geschriebener Zeilen.
+        """
+        extra = extra or {}
+        keys = None
+        count = 0
+        write = self.stream.write
+        encode = self._encoder.encode
+        for row in self._rows(rows):
+            if keys is None:
+                keys = list(extra) + list(row._fields)
+                prefix = list(extra.values())
+            write(encode(dict(zip(keys, prefix + list(row)))))
+            write("\n")
+            count += 1
+        return count
+
+
+class ParquetSink:
+    """
+    Schreibt Zeilen spaltenweise als Parquet (benötigt pyarrow).
+
+    Eine Parquet-Datei hat genau ein Schema. Ändert sich die Spaltenfolge, beginnt daher eine neue
+    Datei: 'ergebnis.parquet', 'ergebnis-2.parquet', ...
+    """
+
+    stream = None
+
+    def __init__(self, path: str, batch_rows: int = PARQUET_BATCH_ROWS) -> None:
+        """
+        Parameter:
+            path (str): Zieldatei der ersten Spaltenfolge.
+            batch_rows (int): Zeilen pro Row Group; so viele Zeilen liegen höchstens im Speicher.
+
+        Raises:
+            ValueError: Wenn pyarrow nicht installiert ist.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Für das Format 'parquet' wird pyarrow benötigt (pip install pyarrow).") from None
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.batch_rows = batch_rows
+        self.files: List[str] = []
+        self._writer = None
+        self._header = None
+        self._schema = None
+
+    def _open(self, header: List[str]) -> None:
+        self.close()
+        stem, extension = os.path.splitext(self.path)
+        self.files.append(self.path if not self.files else f"{stem}-{len(self.files) + 1}{extension or '.parquet'}")
+        self._header = header
+
+    def _write_batch(self, batch: List[List[Any]]) -> None:
+        pa = self._pa
+        columns = list(zip(*batch))
+        if self._writer is None:
+            # Das Schema ergibt sich aus dem ersten Block; reine NULL-Spalten werden als Zahl geführt.
+            arrays = [pa.array(column) for column in columns]
+            self._schema = pa.schema([
+                (name, pa.float64() if pa.types.is_null(array.type) else array.type)
+                for name, array in zip(self._header, arrays)
+            ])
+            self._writer = self._pq.ParquetWriter(self.files[-1], self._schema)
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def write_rows(self, rows: Iterable, extra: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Schreibt alle Zeilen blockweise; extra-Spalten werden jeder Zeile vorangestellt.
+
+        Rückgabe:
+            int: Anzahl geschriebener Zeilen.
+        """
+        extra = extra or {}
+        prefix = list(extra.values())
+        batch = []
+        count = 0
+        for row in rows:
+            if count == 0:
+                header = list(extra) + list(row._fields)
+                if header != self._header:
+                    self._open(header)
+            batch.append(prefix + list(row))
+            count += 1
+            if len(batch) >= self.batch_rows:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        return count
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Schließt die aktuelle Datei (schreibt den Parquet-Footer)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+SINKS = {
+    "table": TableSink,
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+
+def open_sink(output_format: str, path: Optional[str] = None, flush_rows: Optional[int] = None):
+    """
+    Erzeugt einen Sink für das Format; Textformate schreiben gepuffert nach path oder stdout.
+
+    Parameter:
+        output_format (str): Schlüssel aus SINKS.
+        path (str, optional): Zieldatei; für 'parquet' erforderlich.
+        flush_rows (int, optional): Nur für stdout: Leert die Ausgabe nach jeweils so vielen Zeilen
+            (z. B. nach jedem fetchmany()-Block) und verwendet statt des großen Puffers den
+            Standardpuffer. Für das interaktive Menü; Batch-Läufe und Dateien bleiben groß gepuffert.
+
+    Rückgabe:
+        Ein Sink mit write_rows(), flush() und close().
+
+    Raises:
+        ValueError: Wenn 'parquet' ohne Zieldatei gewählt wird oder pyarrow fehlt.
+    """
+    if output_format == "parquet":
+        if not path:
+            raise ValueError("Das Format 'parquet' benötigt eine Ausgabedatei (--output).")
+        return ParquetSink(path)
+    if path:
+        return SINKS[output_format](open(path, "w", encoding="utf-8", newline="", buffering=OUTPUT_BUFFER_SIZE))
+    if flush_rows:
+        return SINKS[output_format](open_stdout(io.DEFAULT_BUFFER_SIZE), flush_rows)
+    return SINKS[output_format](open_stdout())
+
+
+class ResultPrinter:
+    """
+    Gibt Ergebnisblöcke im Menü aus: Titel und Anzahl als Text, die Zeilen über den Sink.
+    """
+
+    def __init__(self, sink, offset: int = 0, limit: Optional[int] = None,
+                 messages: Optional[TextIO] = None) -> None:
+        """
+        Parameter:
+            sink: Ziel der Zeilen (siehe open_sink).
+            offset (int): Anzahl der übersprungenen Zeilen pro Ergebnis.
+            limit (int, optional): Höchstens so viele Zeilen pro Ergebnis ausgeben.
+            messages (TextIO, optional): Ziel für Titel und Anzahl (Standard: sys.stdout). Schreibt der
+                Sink auf stdout, sollte hier derselbe Strom stehen, damit die Reihenfolge erhalten bleibt.
+        """
+        self.sink = sink
+        self.offset = offset
+        self.limit = limit
+        self.messages = messages or sys.stdout
+
+    def print_results(self, results: Iterable, title: str = "Ergebnisse") -> None:
+        """
+        Gibt ein Ergebnis aus. Listen werden mit vorangestellter Anzahl ausgegeben; Iteratoren
+        (stream=True) werden während der Ausgabe verbraucht, die Anzahl folgt am Ende.
+        """
+        sys.stdout.flush()
+        write = self.messages.write
+        write(f"\n{title}:\n")
+        paged = self.offset or self.limit is not None
+        if isinstance(results, Sized):
+            total = len(results)
+            write(f"Got {total} results.\n")
+            if not total:
+                write("Keine Ergebnisse gefunden.\n")
+        written = self.sink.write_rows(paginate(results, self.offset, self.limit))
+        if not isinstance(results, Sized):
+            if paged:
+                write(f"Got {written} results (ab Zeile {self.offset + 1}).\n")
+            else:
+                write(f"Got {written} results.\n")
+                if not written:
+                    write("Keine Ergebnisse gefunden.\n")
+        elif paged:
+            write(f"Zeilen {self.offset + 1} bis {self.offset + written} von {total} angezeigt.\n")
+        self.sink.flush()
+        self.messages.flush()
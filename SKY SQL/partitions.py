@@ -0,0 +1,261 @@
+"""
+Partitionierte Flugdaten über mehrere SQLite-Dateien.
+
+Statt einer einzigen flights.sqlite3 kann FlightData ein Verzeichnis mit einer Datei pro Jahr oder
+Monat verwenden, z. B. 'flights_2015.sqlite3' oder 'flights_2015_01.sqlite3'. Jede Datei enthält
+eine vollständige Tabelle 'flights' mit den Flügen ihres Zeitraums.
+
+- Abfragen mit Datum (Query 3) lesen nur die Partitionen, deren Zeitraum zum Datum passt.
+- Zeilenabfragen ohne Datum werden nacheinander auf allen Partitionen ausgeführt und
+  zusammengefügt; Query 4 wird über die vorsortierten Teilergebnisse gemischt.
+- Aggregationen (Query 5 und 7, Verspätungsquantile) laufen in einem Prozess-Pool mit einem
+  Auftrag pro Partition. Die Teilergebnisse (Summen, Anzahlen, Sketches) werden am Ende
+  zusammengeführt, so dass die Aggregation alle CPU-Kerne nutzen kann.
+"""
+
+import heapq
+import itertools
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from rows import make_rows
+
+# Jahr und optional Monat im Dateinamen, z. B. flights_2015.sqlite3, 2015-01.sqlite3.
+PARTITION_FILE = re.compile(r"(?<!\d)(\d{4})(?:[-_](\d{2}))?\.sqlite3$")
+
+QUERY_PARTIAL_AVERAGE_DELAY = (
+    "SELECT airline, SUM(departure_delay), COUNT(departure_delay) "
+    "FROM flights "
+    "GROUP BY airline"
+)
+
+QUERY_PARTIAL_DELAYED_PER_DAY = (
+    "SELECT year, month, day, COUNT(*) "
+    "FROM flights "
+    "WHERE departure_delay IS NOT NULL "
+    "AND departure_delay >= 20 "
+    "GROUP BY year, month, day"
+)
+
+
+class Partition(NamedTuple):
+    """Eine Partitionsdatei; year/month sind None, wenn der Dateiname keinen Zeitraum nennt."""
+    path: str
+    year: Optional[int]
+    month: Optional[int]
+
+    def covers(self, month: int, year: int) -> bool:
+        """Ob Flüge des angegebenen Monats in dieser Partition liegen können."""
+        if self.year is None:
+            return True
+        return self.year == year and (self.month is None or self.month == month)
+
+
+def discover_partitions(directory: str) -> List[Partition]:
+    """
+    Sucht alle Partitionsdateien (*.sqlite3) in einem Verzeichnis.
+
+    Parameter:
+        directory (str): Verzeichnis mit einer SQLite-Datei pro Jahr oder Monat.
+
+    Rückgabe:
+        list: Die Partitionen, nach Dateiname sortiert.
+
+    Raises:
+        ValueError: Wenn das Verzeichnis keine .sqlite3-Dateien enthält.
+    """
+    partitions = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".sqlite3"):
+            continue
+        match = PARTITION_FILE.search(name)
+        year = int(match.group(1)) if match else None
+        month = int(match.group(2)) if match and match.group(2) else None
+        partitions.append(Partition(os.path.join(directory, name), year, month))
+    if not partitions:
+        raise ValueError(f"Keine Partitionen (*.sqlite3) in '{directory}' gefunden.")
+    return partitions
+
+
+def _partial_aggregate(path: str, query: str) -> List[Tuple]:
+    """Führt eine Teilaggregation auf einer Partition aus; läuft in einem Worker-Prozess."""
+    connection = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True)
+    try:
+        return connection.execute(query).fetchall()
+    finally:
+        connection.close()
+
+
+def _partition_sketches(path: str) -> Dict[str, Dict[Any, Any]]:
+    """Liefert die Verspätungs-Sketches einer Partition; läuft in einem Worker-Prozess."""
+    # Import erst hier, damit der reine SQL-Modus ohne NumPy auskommt.
+    from delay_sketch import DelaySketchStore
+    from engine_profile import build_engine
+    engine = build_engine(f"sqlite:///{path}", "read", pool_size=1)
+    try:
+        return DelaySketchStore(engine, path).sketches()
+    finally:
+        engine.dispose()
+
+
+def _none_first(value: Any) -> Tuple[bool, Any]:
+    """Sortierschlüssel wie in SQLite: NULL vor allen anderen Werten."""
+    return value is not None, value
+
+
+class FlightPartitions:
+    """
+    Beantwortet die FlightData-Abfragen über ein Verzeichnis von Partitionsdateien.
+
+    Jede Partition wird über eine eigene FlightData-Instanz angesprochen; Indizes, Airline-Index
+    und Streaming funktionieren daher pro Partition genauso wie bei einer einzelnen Datei.
+    """
+
+    def __init__(self, directory: str, max_workers: Optional[int] = None, **options: Any) -> None:
+        """
+        Parameter:
+            directory (str): Verzeichnis mit den Partitionsdateien.
+            max_workers (int, optional): Anzahl der Worker-Prozesse für Aggregationen
+                (Standard: eine pro Partition, höchstens so viele wie CPU-Kerne).
+            options: Weitere FlightData-Optionen für jede Partition (z. B. profile, batch_size).
+        """
+        # Import erst hier: data.py importiert dieses Modul selbst nur bei Bedarf.
+        from data import FlightData
+        self.directory = directory
+        self.partitions = discover_partitions(directory)
+        self.members = [FlightData(f"sqlite:///{partition.path}", **options) for partition in self.partitions]
+        self.max_workers = max_workers or min(len(self.partitions), os.cpu_count() or 1)
+        # Schon hier angelegt, weil _map aus mehreren Threads gleichzeitig aufgerufen wird;
+        # die Worker-Prozesse startet der Pool erst beim ersten Auftrag.
+        self._executor = None
+        if self.max_workers >= 2 and len(self.partitions) >= 2:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._sketch_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Beendet den Prozess-Pool der Aggregationen und schließt die Partitionen."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for member in self.members:
+            member.close()
+
+    def _map(self, function: Callable, *arguments: Any) -> List:
+        """Ruft function(pfad, *arguments) für jede Partition auf, parallel, sofern sinnvoll."""
+        paths = [partition.path for partition in self.partitions]
+        if self._executor is None:
+            return [function(path, *arguments) for path in paths]
+        futures = [self._executor.submit(function, path, *arguments) for path in paths]
+        return [future.result() for future in futures]
+
+    def _members_for(self, month: int, year: int) -> List:
+        return [member for partition, member in zip(self.partitions, self.members)
+                if partition.covers(month, year)]
+
+    def _collect(self, method: str, *arguments: Any, stream: bool = False,
+                 members: Optional[Sequence] = None) -> List | Iterator:
+        """Führt eine Zeilenabfrage auf mehreren Partitionen aus und hängt die Ergebnisse aneinander."""
+        members = self.members if members is None else members
+        if stream:
+            return itertools.chain.from_iterable(
+                getattr(member, method)(*arguments, stream=True) for member in members)
+        return [row for member in members for row in getattr(member, method)(*arguments)]
+
+    def resolve_airlines(self, airline_name: str) -> List[Any]:
+        """Vereinigung der passenden Fluggesellschaften aller Partitionen."""
+        airlines = itertools.chain.from_iterable(member.resolve_airlines(airline_name) for member in self.members)
+        return list(dict.fromkeys(airlines))
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Legt die Indizes in jeder Partition an; Schlüssel der Full Scans: '<Datei>: <Methode>'."""
+        full_scans = {}
+        for partition, member in zip(self.partitions, self.members):
+            for method, plan in member.ensure_indexes().items():
+                full_scans[f"{os.path.basename(partition.path)}: {method}"] = plan
+        return full_scans
+
+    def get_flight_by_id(self, flight_id: int) -> List:
+        for member in self.members:
+            results = member.get_flight_by_id(flight_id)
+            if results:
+                return results
+        return []
+
+    def get_flights_by_ids(self, flight_ids: Sequence[int]) -> Dict[int, List]:
+        grouped = {flight_id: [] for flight_id in flight_ids}
+        missing = list(flight_ids)
+        for member in self.members:
+            if not missing:
+                break
+            for flight_id, rows in member.get_flights_by_ids(missing).items():
+                grouped[flight_id].extend(rows)
+            missing = [flight_id for flight_id in missing if not grouped[flight_id]]
+        return grouped
+
+    def get_flights_by_date(self, day: int, month: int, year: int, stream: bool = False) -> List | Iterator:
+        return self._collect("get_flights_by_date", day, month, year, stream=stream,
+                             members=self._members_for(month, year))
+
+    def get_flights_by_dates(self, dates: Sequence[Tuple[int, int, int]]) -> Dict[Tuple[int, int, int], List]:
+        grouped = {date: [] for date in dates}
+        for partition, member in zip(self.partitions, self.members):
+            wanted = [date for date in dates if partition.covers(date[1], date[2])]
+            if wanted:
+                for date, rows in member.get_flights_by_dates(wanted).items():
+                    grouped[date].extend(rows)
+        return grouped
+
+    def get_delayed_flights_by_airline(self, airline_name: str, stream: bool = False) -> List | Iterator:
+        return self._collect("get_delayed_flights_by_airline", airline_name, stream=stream)
+
+    def get_delayed_flights_by_airport(self, airport_code: str, stream: bool = False) -> List | Iterator:
+        return self._collect("get_delayed_flights_by_airport", airport_code, stream=stream)
+
+    def get_delayed_flights_by_airports(self, airport_codes: Sequence[str]) -> Dict[str, List]:
+        grouped = {code: [] for code in airport_codes}
+        for member in self.members:
+            for code, rows in member.get_delayed_flights_by_airports(airport_codes).items():
+                grouped[code].extend(rows)
+        return grouped
+
+    def get_all_delayed_flights(self, stream: bool = False) -> List | Iterator:
+        # Jede Partition liefert bereits nach Verspätung absteigend; die Ströme nur noch mischen.
+        merged = heapq.merge(*(member.get_all_delayed_flights(stream=True) for member in self.members),
+                             key=lambda row: row.DELAY, reverse=True)
+        return merged if stream else list(merged)
+
+    def get_average_delay_by_airline(self) -> List:
+        totals: Dict[Any, List] = {}
+        for partial in self._map(_partial_aggregate, QUERY_PARTIAL_AVERAGE_DELAY):
+            for airline, delay_sum, delay_count in partial:
+                total = totals.setdefault(airline, [0, 0])
+                total[0] += delay_sum or 0
+                total[1] += delay_count
+        return make_rows(("AIRLINE", "AVERAGE_DELAY"), (
+            (airline, delay_sum / delay_count if delay_count else None)
+            for airline, (delay_sum, delay_count) in sorted(totals.items(), key=lambda item: _none_first(item[0]))
+        ))
+
+    def get_delayed_flights_per_day(self) -> List:
+        counts: Dict[Tuple, int] = {}
+        for partial in self._map(_partial_aggregate, QUERY_PARTIAL_DELAYED_PER_DAY):
+            for year, month, day, delayed in partial:
+                counts[(year, month, day)] = counts.get((year, month, day), 0) + delayed
+        return make_rows(("year", "month", "day", "DELAYED_FLIGHTS"), (
+            (*date, delayed)
+            for date, delayed in sorted(counts.items(), key=lambda item: tuple(map(_none_first, item[0])))
+        ))
+
+    def delay_quantiles(self, dimension: str, key_field: str, quantiles: Sequence[float]) -> List:
+        """Verspätungsquantile aus den zusammengeführten Sketches aller Partitionen."""
+        from delay_sketch import merge_sketches, quantile_rows
+        # Nacheinander: nur die erste Abfrage berechnet fehlende Sketches, die weiteren lesen sie
+        # aus den Cache-Dateien der Partitionen.
+        with self._sketch_lock:
+            sketches = merge_sketches(self._map(_partition_sketches))
+        return quantile_rows(sketches, dimension, key_field, quantiles)
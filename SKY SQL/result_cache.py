@@ -0,0 +1,137 @@
+"""
+Ergebnis-Cache für FlightData-Abfragen.
+
+Dieses Modul stellt einen begrenzten LRU-Cache mit Ablaufzeit (TTL) bereit, der Abfrageergebnisse
+unter dem SQL-Text plus den gebundenen Parametern ablegt. Der komplette Cache wird verworfen,
+sobald sich die Datenbank ändert: SQLite erhöht dann 'PRAGMA data_version' (Änderungen über
+andere Verbindungen) oder Änderungszeit bzw. Größe der Datenbankdatei ändern sich.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+
+def make_key(query: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+    """Bildet den Cache-Schlüssel aus SQL-Text und gebundenen Parametern."""
+    return query, tuple(sorted((params or {}).items()))
+
+
+def _file_stamp(path: str) -> Tuple:
+    """(mtime_ns, Größe) einer Datei, (None, None), wenn sie nicht existiert."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DatabaseVersion:
+    """
+    Ermittelt einen Versionsstempel der Datenbank aus 'PRAGMA data_version' und den Dateimetadaten.
+    """
+
+    def __init__(self, engine, db_path: str, persistent: bool = True) -> None:
+        """
+        Parameter:
+            engine: SQLAlchemy-Engine der Flugdatenbank.
+            db_path (str): Pfad der Datenbankdatei.
+            persistent (bool): Hält eine Verbindung für 'PRAGMA data_version' offen. data_version gilt
+                pro Verbindung und ist nur über dieselbe Verbindung vergleichbar; ohne sie beruht der
+                Stempel allein auf Änderungszeit und Größe der Datenbank- und der WAL-Datei.
+        """
+        self.db_path = db_path
+        self._connection = engine.raw_connection() if persistent else None
+        self._lock = threading.Lock()
+
+    def current(self) -> Tuple:
+        """Gibt (data_version, mtime_ns, Dateigröße, WAL-mtime_ns, WAL-Größe) zurück; ändert sich bei jeder Schreiboperation."""
+        data_version = None
+        if self._connection is not None:
+            with self._lock:
+                cursor = self._connection.cursor()
+                try:
+                    data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+                finally:
+                    cursor.close()
+        return (data_version, *_file_stamp(self.db_path), *_file_stamp(self.db_path + "-wal"))
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class QueryResultCache:
+    """
+    Begrenzter LRU-Cache mit TTL und Treffer-/Fehlzählern.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0) -> None:
+        """
+        Parameter:
+            max_entries (int): Maximale Anzahl gespeicherter Ergebnisse.
+            ttl (float): Lebensdauer eines Eintrags in Sekunden.
+
+        Raises:
+            ValueError: Wenn max_entries oder ttl nicht positiv sind.
+        """
+        if max_entries < 1 or ttl <= 0:
+            raise ValueError("Cache-Größe und TTL müssen positiv sein.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Sequence]]" = OrderedDict()
+        self._version: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def validate(self, version: Tuple) -> None:
+        """Verwirft den gesamten Cache, wenn sich der Versionsstempel der Datenbank geändert hat."""
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+
+    def get(self, key: Hashable) -> Optional[Sequence]:
+        """Gibt das gespeicherte Ergebnis zurück oder None, wenn es fehlt oder abgelaufen ist."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, rows: Sequence) -> None:
+        """Speichert ein Ergebnis und verdrängt bei Bedarf den am längsten ungenutzten Eintrag."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), tuple(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Treffer, Fehlzugriffe, Trefferquote, Invalidierungen und Füllstand zurück."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
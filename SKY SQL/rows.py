@@ -0,0 +1,41 @@
+"""
+Leichtgewichtige Ergebniszeilen.
+
+Cache, Sketches und partitionierte Aggregationen erzeugen Ergebnisse nicht über SQLAlchemy. Damit
+Ausgabe und Aufrufer nicht unterscheiden müssen, haben diese Zeilen dieselbe Schnittstelle wie eine
+SQLAlchemy-Row (Tupel, Attributzugriff, `_fields`, `_mapping`).
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+
+class CachedRow(tuple):
+    """
+    Schlanke Nachbildung einer SQLAlchemy-Row: ein Tupel mit Spaltennamen und `_mapping`.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    @property
+    def _mapping(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+    def __getattr__(self, name: str) -> Any:
+        # Nur für Spaltennamen aufgerufen; Methoden und _fields/_mapping findet Python vorher.
+        try:
+            return self[self._fields.index(name)]
+        except ValueError:
+            raise AttributeError(f"Zeile hat keine Spalte '{name}'") from None
+
+
+@lru_cache(maxsize=None)
+def _row_class(fields: Tuple[str, ...]) -> type:
+    """Liefert eine CachedRow-Unterklasse für genau diese Spaltenfolge."""
+    return type("CachedRow", (CachedRow,), {"__slots__": (), "_fields": fields})
+
+
+def make_rows(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[CachedRow]:
+    """Erzeugt CachedRow-Objekte mit den angegebenen Spaltennamen."""
+    return list(map(_row_class(tuple(fields)), rows))
@@ -0,0 +1,133 @@
+"""
+Materialisierte Kennzahlen für Verspätungsstatistiken.
+
+Dieses Modul legt zwei Summentabellen an, die SQLite-Trigger bei jedem INSERT, UPDATE und
+DELETE auf 'flights' aktuell halten:
+
+    airline_delay_stats: Fluggesellschaft -> Anzahl Flüge, Summe und Anzahl der Verspätungen
+    daily_delay_stats:   Datum -> Anzahl verspäteter Flüge
+
+get_average_delay_by_airline und get_delayed_flights_per_day lesen dann nur noch diese kleinen
+Tabellen, statt die komplette Flugtabelle neu zu aggregieren.
+"""
+
+from sqlalchemy import text
+
+# Entspricht der Definition aus data.py: nicht NULL und mindestens 20 Minuten.
+_IS_DELAYED = "{row}.departure_delay IS NOT NULL AND {row}.departure_delay >= 20"
+
+_CREATE_TABLES = [
+    "CREATE TABLE IF NOT EXISTS airline_delay_stats ("
+    "airline PRIMARY KEY, "
+    "flight_count INTEGER NOT NULL DEFAULT 0, "
+    "delay_sum NUMERIC NOT NULL DEFAULT 0, "
+    "delay_count INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS daily_delay_stats ("
+    "year INTEGER, month INTEGER, day INTEGER, "
+    "delayed_count INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (year, month, day))",
+]
+
+_BACKFILL = [
+    "DELETE FROM airline_delay_stats",
+    "DELETE FROM daily_delay_stats",
+    "INSERT INTO airline_delay_stats (airline, flight_count, delay_sum, delay_count) "
+    "SELECT airline, COUNT(*), IFNULL(SUM(departure_delay), 0), COUNT(departure_delay) "
+    "FROM flights GROUP BY airline",
+    "INSERT INTO daily_delay_stats (year, month, day, delayed_count) "
+    "SELECT year, month, day, COUNT(*) FROM flights "
+    f"WHERE {_IS_DELAYED.format(row='flights')} "
+    "GROUP BY year, month, day",
+]
+
+
+def _add_statements(row: str, sign: str) -> str:
+    """
+    Erzeugt die Trigger-Anweisungen, die eine Zeile (NEW oder OLD) zu den Summen addieren
+    (sign='+') oder von ihnen abziehen (sign='-'). NULL-Schlüssel werden mit IS verglichen.
+    """
+    delayed = _IS_DELAYED.format(row=row)
+    same_airline = f"airline IS {row}.airline"
+    same_day = f"year IS {row}.year AND month IS {row}.month AND day IS {row}.day"
+    statements = []
+    if sign == "+":
+        statements.append(
+            "INSERT INTO airline_delay_stats (airline) "
+            f"SELECT {row}.airline WHERE NOT EXISTS (SELECT 1 FROM airline_delay_stats WHERE {same_airline});")
+        statements.append(
+            "INSERT INTO daily_delay_stats (year, month, day) "
+            f"SELECT {row}.year, {row}.month, {row}.day WHERE {delayed} "
+            f"AND NOT EXISTS (SELECT 1 FROM daily_delay_stats WHERE {same_day});")
+    statements.append(
+        "UPDATE airline_delay_stats SET "
+        f"flight_count = flight_count {sign} 1, "
+        f"delay_sum = delay_sum {sign} IFNULL({row}.departure_delay, 0), "
+        f"delay_count = delay_count {sign} ({row}.departure_delay IS NOT NULL) "
+        f"WHERE {same_airline};")
+    statements.append(
+        f"UPDATE daily_delay_stats SET delayed_count = delayed_count {sign} 1 "
+        f"WHERE {delayed} AND {same_day};")
+    if sign == "-":
+        statements.append(f"DELETE FROM airline_delay_stats WHERE {same_airline} AND flight_count = 0;")
+        statements.append(f"DELETE FROM daily_delay_stats WHERE {same_day} AND delayed_count = 0;")
+    return "\n".join(statements)
+
+
+_CREATE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS trg_flights_stats_insert AFTER INSERT ON flights BEGIN\n"
+    f"{_add_statements('NEW', '+')}\nEND",
+    "CREATE TRIGGER IF NOT EXISTS trg_flights_stats_delete AFTER DELETE ON flights BEGIN\n"
+    f"{_add_statements('OLD', '-')}\nEND",
+    "CREATE TRIGGER IF NOT EXISTS trg_flights_stats_update "
+    "AFTER UPDATE OF airline, departure_delay, year, month, day ON flights BEGIN\n"
+    f"{_add_statements('OLD', '-')}\n{_add_statements('NEW', '+')}\nEND",
+]
+
+QUERY_AVERAGE_DELAY_FROM_SUMMARY = (
+    "SELECT airline AS AIRLINE, "
+    "CASE WHEN delay_count > 0 THEN CAST(delay_sum AS REAL) / delay_count END AS AVERAGE_DELAY "
+    "FROM airline_delay_stats "
+    "ORDER BY airline"
+)
+
+QUERY_DELAYED_PER_DAY_FROM_SUMMARY = (
+    "SELECT year, month, day, delayed_count AS DELAYED_FLIGHTS "
+    "FROM daily_delay_stats "
+    "ORDER BY year, month, day"
+)
+
+
+class SummaryTables:
+    """
+    Legt die Summentabellen und Trigger an und befüllt sie einmalig aus 'flights'.
+    """
+
+    def __init__(self, engine) -> None:
+        """
+        Parameter:
+            engine: SQLAlchemy-Engine der Flugdatenbank.
+        """
+        self.engine = engine
+
+    def ensure(self) -> bool:
+        """
+        Legt Tabellen und Trigger an, falls sie fehlen, und befüllt sie beim ersten Mal.
+
+        Tabellen, Trigger und Befüllung laufen in einer Transaktion, damit zwischendurch
+        eingefügte Flüge weder fehlen noch doppelt gezählt werden.
+
+        Rückgabe:
+            bool: True, wenn die Tabellen neu angelegt und befüllt wurden.
+
+        Raises:
+            SQLAlchemyError: Wenn die Datenbank nicht beschreibbar ist.
+        """
+        with self.engine.begin() as conn:
+            installed = conn.execute(text(
+                "SELECT COUNT(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND name LIKE 'trg_flights_stats_%'")).scalar()
+            if installed == len(_CREATE_TRIGGERS):
+                return False
+            for statement in _CREATE_TABLES + _CREATE_TRIGGERS + _BACKFILL:
+                conn.execute(text(statement))
+        return True
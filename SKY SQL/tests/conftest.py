@@ -0,0 +1,70 @@
+import os
+import random
+import sqlite3
+import sys
+
+import pytest
+
+# Die Module liegen flach im Projektordner und werden ohne Paketnamen importiert.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AIRLINES = ["Delta Air Lines Inc.", "American Airlines Inc.", "American Eagle Airlines Inc.",
+            "United Air Lines Inc.", "JetBlue Airways", None]
+AIRPORTS = ["ATL", "ORD", "LAX", "JFK", "SFO", "BOS", "SEA", None]
+
+CREATE_FLIGHTS = (
+    "CREATE TABLE flights ("
+    "id INTEGER PRIMARY KEY, "
+    "year INTEGER, month INTEGER, day INTEGER, day_of_week INTEGER, "
+    "airline TEXT, flight_number INTEGER, "
+    "origin_airport TEXT, destination_airport TEXT, "
+    "departure_delay INTEGER)"
+)
+
+
+def random_flights(count, seed=1, years=(2015,)):
+    """Zufällige Flüge als Tupel in Spaltenreihenfolge, mit NULL-Werten und vielen gleichen Verspätungen."""
+    rng = random.Random(seed)
+    flights = []
+    for flight_id in range(1, count + 1):
+        delay = rng.choice([None, rng.randint(-15, 19), rng.randint(20, 60), rng.randint(20, 400)])
+        flights.append((flight_id, rng.choice(years), rng.randint(1, 12), rng.randint(1, 28), rng.randint(1, 7),
+                        rng.choice(AIRLINES), rng.randint(1, 7000), rng.choice(AIRPORTS), rng.choice(AIRPORTS),
+                        delay))
+    return flights
+
+
+def write_flights(path, flights):
+    """Legt eine Flugdatenbank mit den angegebenen Zeilen an."""
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(CREATE_FLIGHTS)
+        connection.executemany("INSERT INTO flights VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", flights)
+        connection.commit()
+    finally:
+        connection.close()
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture(scope="session")
+def flights():
+    return random_flights(3000, years=(2015, 2016))
+
+
+@pytest.fixture(scope="session")
+def db_uri(tmp_path_factory, flights):
+    """Schreibgeschützt zu verwendende Flugdatenbank, einmal pro Testlauf erzeugt."""
+    return write_flights(str(tmp_path_factory.mktemp("flights") / "flights.sqlite3"), flights)
+
+
+@pytest.fixture
+def writable_db(tmp_path, flights):
+    """Eigene Kopie der Flugdatenbank für Tests, die schreiben: (URI, Pfad)."""
+    path = str(tmp_path / "flights.sqlite3")
+    return write_flights(path, flights), path
+
+
+@pytest.fixture(scope="session")
+def make_flight_db():
+    """write_flights(pfad, flüge) für Tests, die eigene Datenbanken brauchen."""
+    return write_flights
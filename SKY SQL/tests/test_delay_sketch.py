@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import delay_sketch
+from data import FlightData
+from delay_sketch import DelaySketchStore
+from engine_profile import build_engine
+
+
+@pytest.fixture
+def counted_builds(monkeypatch):
+    """Zählt die Aufrufe von build_sketches; jeder Aufruf dauert etwas, damit sich Threads überlappen."""
+    calls = []
+    build = delay_sketch.build_sketches
+
+    def slow_build(engine):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return build(engine)
+
+    monkeypatch.setattr(delay_sketch, "build_sketches", slow_build)
+    return calls
+
+
+def _counts(rows):
+    return {row.AIRLINE: row.FLIGHTS for row in rows}
+
+
+def test_concurrent_quantile_queries_build_once(writable_db, counted_builds):
+    uri, path = writable_db
+    data = FlightData(uri)
+    try:
+        methods = (data.get_delay_quantiles_by_airline, data.get_delay_quantiles_by_origin_airport,
+                   data.get_delay_quantiles_by_weekday)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = [future.result() for future in [pool.submit(method) for method in methods]]
+    finally:
+        data.close()
+    assert len(counted_builds) == 1
+    assert all(results)
+    directory = os.path.dirname(path)
+    assert sorted(os.listdir(directory)) == ["flights.sqlite3", "flights.sqlite3.delay_sketches.json"]
+
+
+def test_counts_match_sql_and_cache_is_reused(writable_db, counted_builds):
+    uri, path = writable_db
+    connection = sqlite3.connect(path)
+    expected = dict(connection.execute(
+        "SELECT airline, COUNT(*) FROM flights WHERE departure_delay IS NOT NULL GROUP BY airline"))
+    connection.close()
+    data = FlightData(uri)
+    try:
+        assert _counts(data.get_delay_quantiles_by_airline()) == expected
+    finally:
+        data.close()
+    data = FlightData(uri)
+    try:
+        assert _counts(data.get_delay_quantiles_by_airline()) == expected
+    finally:
+        data.close()
+    assert len(counted_builds) == 1
+
+
+def test_write_to_wal_invalidates_sketches(writable_db, counted_builds):
+    uri, path = writable_db
+    writer = sqlite3.connect(path)
+    try:
+        writer.execute("PRAGMA journal_mode=WAL")
+        engine = build_engine(uri, "default")
+        store = DelaySketchStore(engine, path)
+        assert "New Air" not in store.sketches()["airline"]
+        # Die Verbindung bleibt offen, damit die Änderung nur in der WAL-Datei steht.
+        writer.execute("INSERT INTO flights (id, year, month, day, airline, origin_airport, departure_delay) "
+                       "VALUES (100001, 2015, 6, 1, 'New Air', 'ATL', 99)")
+        writer.commit()
+        assert store.sketches()["airline"]["New Air"].count == 1
+        engine.dispose()
+    finally:
+        writer.close()
+    assert len(counted_builds) == 2
+
+
+def test_save_failure_is_reported_on_stderr(writable_db, tmp_path, capsys):
+    uri, path = writable_db
+    engine = build_engine(uri, "default")
+    try:
+        store = DelaySketchStore(engine, path, cache_path=str(tmp_path / "missing" / "sketches.json"))
+        assert store.sketches()["airline"]
+    finally:
+        engine.dispose()
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Sketch-Cache konnte nicht gespeichert werden" in captured.err
@@ -0,0 +1,110 @@
+import pytest
+
+from data import FlightData
+
+
+@pytest.fixture(scope="module")
+def sources(db_uri):
+    sql = FlightData(db_uri)
+    cached = FlightData(db_uri, use_cache=True)
+    yield sql, cached
+    sql.close()
+    cached.close()
+
+
+def _rows(rows):
+    return [(tuple(row._fields), tuple(row)) for row in rows]
+
+
+def _unordered(rows):
+    return sorted(_rows(rows), key=repr)
+
+
+@pytest.fixture(scope="module")
+def sample(flights):
+    """Flug-IDs, Daten, Häfen und Fluggesellschaften, die in der Datenbank vorkommen."""
+    ids = [flight[0] for flight in flights[::150]] + [0, 10 ** 9]
+    dates = sorted({(flight[3], flight[2], flight[1]) for flight in flights})[::15] + [(1, 1, 1990)]
+    airports = sorted({flight[7] for flight in flights if flight[7]}) + ["XXX"]
+    airlines = sorted({flight[5] for flight in flights if flight[5]})
+    return ids, dates, airports, airlines
+
+
+def test_flight_by_id(sources, sample):
+    sql, cached = sources
+    for flight_id in sample[0]:
+        assert _rows(cached.get_flight_by_id(flight_id)) == _rows(sql.get_flight_by_id(flight_id))
+
+
+def test_flights_by_date(sources, sample):
+    sql, cached = sources
+    for day, month, year in sample[1]:
+        assert _unordered(cached.get_flights_by_date(day, month, year)) == _unordered(
+            sql.get_flights_by_date(day, month, year))
+
+
+def test_delayed_flights_by_airline(sources, sample):
+    sql, cached = sources
+    for name in sample[3] + ["american", "Air Lines", "%", "_", "nobody"]:
+        assert _unordered(cached.get_delayed_flights_by_airline(name)) == _unordered(
+            sql.get_delayed_flights_by_airline(name)), name
+
+
+def test_delayed_flights_by_airport(sources, sample):
+    sql, cached = sources
+    for code in sample[2]:
+        assert _unordered(cached.get_delayed_flights_by_airport(code)) == _unordered(
+            sql.get_delayed_flights_by_airport(code))
+
+
+def test_all_delayed_flights(sources):
+    sql, cached = sources
+    expected, found = sql.get_all_delayed_flights(), cached.get_all_delayed_flights()
+    # Bei gleicher Verspätung ist die Reihenfolge in SQL nicht festgelegt.
+    assert [row._mapping["DELAY"] for row in found] == [row._mapping["DELAY"] for row in expected]
+    assert _unordered(found) == _unordered(expected)
+
+
+def test_average_delay_by_airline(sources):
+    sql, cached = sources
+    expected, found = sql.get_average_delay_by_airline(), cached.get_average_delay_by_airline()
+    assert [row[0] for row in found] == [row[0] for row in expected]
+    assert [row[1] for row in found] == pytest.approx([row[1] for row in expected])
+
+
+def test_delayed_flights_per_day(sources):
+    sql, cached = sources
+    assert _rows(cached.get_delayed_flights_per_day()) == _rows(sql.get_delayed_flights_per_day())
+
+
+def test_batch_lookups(sources, sample):
+    sql, cached = sources
+    ids, dates, airports, _ = sample
+    for method, keys in (("get_flights_by_ids", ids), ("get_flights_by_dates", dates),
+                         ("get_delayed_flights_by_airports", airports)):
+        expected, found = getattr(sql, method)(keys), getattr(cached, method)(keys)
+        assert list(found) == list(expected) == keys, method
+        assert {key: _unordered(rows) for key, rows in found.items()} == {
+            key: _unordered(rows) for key, rows in expected.items()}, method
+
+
+def test_batch_lookups_match_single_queries(sources, sample):
+    sql, _ = sources
+    ids, dates, airports, _ = sample
+    for flight_id, rows in sql.get_flights_by_ids(ids).items():
+        assert _rows(rows) == _rows(sql.get_flight_by_id(flight_id))
+    for code, rows in sql.get_delayed_flights_by_airports(airports).items():
+        assert _unordered(rows) == _unordered(sql.get_delayed_flights_by_airport(code))
+    for (day, month, year), rows in sql.get_flights_by_dates(dates).items():
+        assert sorted(row._mapping["ID"] for row in rows) == sorted(
+            row._mapping["ID"] for row in sql.get_flights_by_date(day, month, year))
+
+
+def test_cached_rows_behave_like_sql_rows(sources, sample):
+    sql, cached = sources
+    expected, = sql.get_flight_by_id(sample[0][0])
+    row, = cached.get_flight_by_id(sample[0][0])
+    assert row.ID == expected.ID and row.DELAY == expected.DELAY
+    assert row._mapping == dict(expected._mapping)
+    with pytest.raises(AttributeError):
+        row.missing
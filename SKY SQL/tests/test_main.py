@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def _main(db_path, *args, stdin=""):
+    return subprocess.run([sys.executable, MAIN, "--db", db_path, *args],
+                          input=stdin, capture_output=True, text=True)
+
+
+def test_batch_run_writes_results_and_exits_cleanly(db_uri):
+    result = _main(db_uri[len("sqlite:///"):], "--batch", "-", stdin="by_id 1\n")
+    assert result.returncode == 0, result.stderr
+    assert [json.loads(line)["ID"] for line in result.stdout.splitlines()] == [1]
+
+
+def test_initialization_error_is_reported_on_stderr(tmp_path):
+    result = _main(str(tmp_path), "--batch", "-")
+    assert result.returncode == 1
+    assert result.stdout == ""
+    assert result.stderr.startswith("Fehler bei der Datenbankinitialisierung: Keine Partitionen")
+
@@ -0,0 +1,112 @@
+import csv
+import io
+import itertools
+import json
+
+import pytest
+
+from output import CsvSink, JsonlSink, ParquetSink, ResultPrinter, TableSink, open_sink, paginate
+from rows import make_rows
+
+FLIGHTS = make_rows(("ID", "year", "month", "day", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "DELAY"),
+                    [(1, 2015, 1, 2, "LAX", "JFK", "Delta Air Lines Inc.", 25),
+                     (2, 2015, 1, 3, "ATL", "ORD", 'Spirit, "Air"', None)])
+PER_DAY = make_rows(("year", "month", "day", "DELAYED_FLIGHTS"), [(2015, 1, 2, 7)])
+
+
+def test_table_sink_formats_by_columns():
+    stream = io.StringIO()
+    sink = TableSink(stream)
+    assert sink.write_rows(FLIGHTS) == 2
+    assert sink.write_rows(PER_DAY, extra={"query": "q7"}) == 1
+    assert stream.getvalue().splitlines() == [
+        "1. LAX -> JFK by Delta Air Lines Inc., Date: 2/1/2015, Delay: 25 minutes",
+        '2. ATL -> ORD by Spirit, "Air", Date: 3/1/2015, Delay: N/A minutes',
+        "# query: q7",
+        "2/1/2015: 7 verspätete Flüge",
+    ]
+
+
+def test_csv_sink_writes_header_per_column_layout():
+    stream = io.StringIO()
+    sink = CsvSink(stream)
+    sink.write_rows(FLIGHTS[:1], extra={"query": "q1"})
+    sink.write_rows(FLIGHTS[1:], extra={"query": "q1"})
+    sink.write_rows(PER_DAY)
+    assert list(csv.reader(io.StringIO(stream.getvalue()))) == [
+        ["query", "ID", "year", "month", "day", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "DELAY"],
+        ["q1", "1", "2015", "1", "2", "LAX", "JFK", "Delta Air Lines Inc.", "25"],
+        ["q1", "2", "2015", "1", "3", "ATL", "ORD", 'Spirit, "Air"', ""],
+        ["year", "month", "day", "DELAYED_FLIGHTS"],
+        ["2015", "1", "2", "7"],
+    ]
+
+
+def test_jsonl_sink_round_trip():
+    stream = io.StringIO()
+    assert JsonlSink(stream).write_rows(FLIGHTS, extra={"query": "q1"}) == 2
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [{"query": "q1", **row._mapping} for row in FLIGHTS]
+    assert records[1]["DELAY"] is None
+
+
+def test_parquet_sink_starts_new_file_per_schema(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "result.parquet")
+    sink = ParquetSink(path, batch_rows=1)
+    sink.write_rows(FLIGHTS)
+    sink.write_rows(PER_DAY)
+    sink.close()
+    assert sink.files == [path, str(tmp_path / "result-2.parquet")]
+    assert parquet.read_table(sink.files[0]).to_pylist() == [dict(row._mapping) for row in FLIGHTS]
+    assert parquet.read_table(sink.files[1]).to_pylist() == [dict(row._mapping) for row in PER_DAY]
+
+
+def test_open_sink_requires_path_for_parquet():
+    with pytest.raises(ValueError):
+        open_sink("parquet")
+
+
+def test_paginate_lists_and_iterators():
+    assert paginate([1, 2, 3, 4], 1, 2) == [2, 3]
+    numbers = itertools.count()
+    assert list(paginate(numbers, 2, 3)) == [2, 3, 4]
+    assert next(numbers) == 5  # nur so weit verbraucht wie nötig
+
+
+def test_result_printer_pages_lists_and_streams():
+    rows, messages = io.StringIO(), io.StringIO()
+    printer = ResultPrinter(TableSink(rows), offset=1, limit=5, messages=messages)
+    printer.print_results(FLIGHTS, title="Query 1")
+    printer.print_results(iter(FLIGHTS), title="Query 2")
+    assert messages.getvalue() == ("\nQuery 1:\nGot 2 results.\nZeilen 2 bis 2 von 2 angezeigt.\n"
+                                   "\nQuery 2:\nGot 1 results (ab Zeile 2).\n")
+    assert rows.getvalue().count("2. ATL -> ORD") == 2
+
+
+class _FlushCounter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def flush(self):
+        self.flushed.append(self.getvalue().count("\n"))
+        super().flush()
+
+
+@pytest.mark.parametrize("sink_class", [TableSink, CsvSink, JsonlSink])
+def test_flush_rows_flushes_while_streaming(sink_class):
+    stream = _FlushCounter()
+    seen = []
+
+    def rows():
+        for row in FLIGHTS * 3:
+            seen.append(list(stream.flushed))
+            yield row
+
+    assert sink_class(stream, flush_rows=2).write_rows(rows()) == 6
+    header = 1 if sink_class is CsvSink else 0
+    # Zeilen 1-2 sind geleert, bevor Zeile 4 geholt wird, usw.
+    assert stream.flushed == [2 + header, 4 + header, 6 + header]
+    assert seen[3] == [2 + header]
+    assert sink_class(_FlushCounter()).write_rows(iter(FLIGHTS)) == 2
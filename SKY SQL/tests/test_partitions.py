@@ -0,0 +1,114 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from data import FlightData
+from partitions import FlightPartitions, Partition, discover_partitions
+
+def _rows(rows):
+    return [(tuple(row._fields), tuple(row)) for row in rows]
+
+
+def _unordered(rows):
+    return sorted(_rows(rows), key=repr)
+
+
+@pytest.fixture(scope="module")
+def directory(tmp_path_factory, make_flight_db, flights):
+    """2015 als Monatsdateien, 2016 als Jahresdatei, dazu eine leere Datei ohne Zeitraum im Namen."""
+    directory = tmp_path_factory.mktemp("partitions")
+    for month in range(1, 13):
+        make_flight_db(str(directory / f"flights_2015_{month:02d}.sqlite3"),
+                       [flight for flight in flights if flight[1] == 2015 and flight[2] == month])
+    make_flight_db(str(directory / "flights_2016.sqlite3"), [flight for flight in flights if flight[1] == 2016])
+    make_flight_db(str(directory / "extra.sqlite3"), [])
+    return str(directory)
+
+
+@pytest.fixture(scope="module")
+def sources(db_uri, directory):
+    single = FlightData(db_uri)
+    partitioned = FlightData(f"sqlite:///{directory}")
+    yield single, partitioned
+    single.close()
+    partitioned.close()
+
+
+def test_discover_partitions(directory):
+    partitions = discover_partitions(directory)
+    assert len(partitions) == 14
+    assert partitions[0] == Partition(os.path.join(directory, "extra.sqlite3"), None, None)
+    assert (partitions[1].year, partitions[1].month) == (2015, 1)
+    assert (partitions[-1].year, partitions[-1].month) == (2016, None)
+
+
+def test_discover_partitions_rejects_empty_directory(tmp_path):
+    with pytest.raises(ValueError):
+        discover_partitions(str(tmp_path))
+
+
+def test_date_queries_only_open_matching_partitions(directory):
+    partitions = FlightPartitions(directory, max_workers=1)
+    try:
+        partitions.get_flights_by_date(3, 4, 2015)
+        partitions.get_flights_by_date(3, 4, 2016)
+        queried = [os.path.basename(partition.path) for partition, member in zip(partitions.partitions, partitions.members)
+                   if member.stats.methods]
+        assert queried == ["extra.sqlite3", "flights_2015_04.sqlite3", "flights_2016.sqlite3"]
+    finally:
+        partitions.close()
+
+
+def test_row_queries_match_single_table(sources):
+    single, partitioned = sources
+    for method, arguments in (("get_flight_by_id", (17,)), ("get_flight_by_id", (10 ** 9,)),
+                              ("get_flights_by_date", (3, 4, 2015)), ("get_flights_by_date", (28, 12, 2016)),
+                              ("get_delayed_flights_by_airline", ("american",)),
+                              ("get_delayed_flights_by_airport", ("ATL",))):
+        expected = getattr(single, method)(*arguments)
+        assert _unordered(getattr(partitioned, method)(*arguments)) == _unordered(expected), method
+        if method != "get_flight_by_id":
+            streamed = getattr(partitioned, method)(*arguments, stream=True)
+            assert _unordered(streamed) == _unordered(expected), method
+
+
+def test_batch_lookups_match_single_table(sources):
+    single, partitioned = sources
+    for method, keys in (("get_flights_by_ids", [1, 500, 2999, 10 ** 9]),
+                         ("get_flights_by_dates", [(1, 1, 2015), (15, 6, 2016), (1, 1, 1990)]),
+                         ("get_delayed_flights_by_airports", ["ATL", "LAX", "XXX"])):
+        expected, found = getattr(single, method)(keys), getattr(partitioned, method)(keys)
+        assert {key: _unordered(rows) for key, rows in found.items()} == {
+            key: _unordered(rows) for key, rows in expected.items()}, method
+
+
+def test_all_delayed_flights_are_merged_in_order(sources):
+    single, partitioned = sources
+    expected = single.get_all_delayed_flights()
+    for found in (partitioned.get_all_delayed_flights(), list(partitioned.get_all_delayed_flights(stream=True))):
+        assert [row.DELAY for row in found] == [row.DELAY for row in expected]
+        assert _unordered(found) == _unordered(expected)
+
+
+def test_aggregations_match_single_table(sources):
+    single, partitioned = sources
+    expected, found = single.get_average_delay_by_airline(), partitioned.get_average_delay_by_airline()
+    assert [row[0] for row in found] == [row[0] for row in expected]
+    assert [row[1] for row in found] == pytest.approx([row[1] for row in expected])
+    assert _rows(partitioned.get_delayed_flights_per_day()) == _rows(single.get_delayed_flights_per_day())
+
+
+def test_concurrent_aggregations_share_one_pool(directory, sources):
+    single, _ = sources
+    partitions = FlightPartitions(directory, max_workers=2)
+    try:
+        executor = partitions._executor
+        assert executor is not None
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: partitions.get_delayed_flights_per_day(), range(4)))
+        assert partitions._executor is executor
+        expected = _rows(single.get_delayed_flights_per_day())
+        assert all(_rows(found) == expected for found in results)
+    finally:
+        partitions.close()
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+import result_cache
+from data import FlightData
+from result_cache import QueryResultCache
+
+
+@pytest.fixture
+def cached(writable_db):
+    uri, path = writable_db
+    data = FlightData(uri, result_cache_size=8)
+    yield data, path
+    data.close()
+
+
+def _ids(rows):
+    return sorted(row.ID for row in rows)
+
+
+def test_repeated_query_is_served_from_cache(cached):
+    data, _ = cached
+    first = data.get_delayed_flights_by_airport("ATL")
+    second = data.get_delayed_flights_by_airport("ATL")
+    assert _ids(second) == _ids(first)
+    stats = data.result_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_write_invalidates_cache(cached):
+    data, path = cached
+    before = _ids(data.get_delayed_flights_by_airport("ATL"))
+    connection = sqlite3.connect(path)
+    connection.execute("INSERT INTO flights (id, year, month, day, airline, origin_airport, departure_delay) "
+                       "VALUES (100001, 2015, 6, 1, 'New Air', 'ATL', 99)")
+    connection.commit()
+    connection.close()
+    assert _ids(data.get_delayed_flights_by_airport("ATL")) == sorted(before + [100001])
+    assert data.result_cache_stats()["invalidations"] == 1
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = QueryResultCache(max_entries=2, ttl=10)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.get("a") == (1,)
+    cache.put("c", [3])  # verdrängt "b", weil "a" zuletzt gelesen wurde
+    assert cache.get("b") is None and cache.get("c") == (3,)
+    now[0] += 11
+    assert cache.get("a") is None and cache.stats()["entries"] == 1
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        QueryResultCache(max_entries=0)
+    with pytest.raises(ValueError):
+        QueryResultCache(ttl=0)
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from data import FlightData
+from summary_tables import SummaryTables
+
+
+def _averages(data):
+    return sorted(((row[0] is not None, row[0]), row[1]) for row in data.get_average_delay_by_airline())
+
+
+def _per_day(data):
+    return [tuple(row) for row in data.get_delayed_flights_per_day()]
+
+
+def _assert_matches_flights(summary, plain):
+    expected, found = _averages(plain), _averages(summary)
+    assert [key for key, _ in found] == [key for key, _ in expected]
+    assert [value for _, value in found] == pytest.approx([value for _, value in expected])
+    assert _per_day(summary) == _per_day(plain)
+
+
+@pytest.fixture
+def databases(writable_db):
+    uri, path = writable_db
+    summary = FlightData(uri, use_summary_tables=True)
+    plain = FlightData(uri)
+    yield summary, plain, path
+    summary.close()
+    plain.close()
+
+
+def _write(path, *statements):
+    connection = sqlite3.connect(path)
+    try:
+        for statement, params in statements:
+            connection.execute(statement, params)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def test_backfill_matches_flights(databases):
+    summary, plain, _ = databases
+    _assert_matches_flights(summary, plain)
+    assert SummaryTables(summary.engine).ensure() is False
+
+
+def test_insert_updates_summary(databases):
+    summary, plain, path = databases
+    _write(path,
+           ("INSERT INTO flights (id, year, month, day, airline, origin_airport, departure_delay) "
+            "VALUES (100001, 2016, 2, 29, 'New Air', 'ATL', 45)", ()),
+           ("INSERT INTO flights (id, year, month, day, airline, origin_airport, departure_delay) "
+            "VALUES (100002, 2016, 2, 29, 'New Air', 'ATL', NULL)", ()),
+           ("INSERT INTO flights (id, year, month, day, airline, origin_airport, departure_delay) "
+            "VALUES (100003, 2015, 1, 1, NULL, 'ATL', 20)", ()))
+    _assert_matches_flights(summary, plain)
+    assert ((True, "New Air"), 45.0) in _averages(summary)
+    assert (2016, 2, 29, 1) in _per_day(summary)
+
+
+def test_update_and_delete_update_summary(databases):
+    summary, plain, path = databases
+    _write(path,
+           ("UPDATE flights SET departure_delay = 90 WHERE departure_delay IS NULL AND id % 3 = 0", ()),
+           ("UPDATE flights SET departure_delay = 5 WHERE departure_delay >= 20 AND id % 5 = 0", ()),
+           ("UPDATE flights SET airline = 'Moved Air', month = 12 WHERE id % 7 = 0", ()),
+           ("DELETE FROM flights WHERE airline = ?", ("JetBlue Airways",)),
+           ("DELETE FROM flights WHERE id % 11 = 0", ()))
+    _assert_matches_flights(summary, plain)
+    assert all(key != (True, "JetBlue Airways") for key, _ in _averages(summary))
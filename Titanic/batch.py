@@ -0,0 +1,234 @@
+"""
+Nicht-interaktiver Batch-Modus der Ships CLI.
+
+Führt mehrere Befehle gegen einen einmal geladenen ShipIndex aus und schreibt die Ergebnisse
+gepuffert als JSON Lines: ein Objekt pro Befehl, {"command": ..., "result": ...} oder bei einem
+fehlerhaften Befehl {"command": ..., "error": ...}.
+
+Befehle (wie im interaktiven Modus; Leerzeilen und Zeilen mit '#' werden ignoriert):
+
+    count_ships
+    list_ship_names
+    list_all_countries
+    list_unique_countries / show_countries
+    top_countries <n>
+    show_ship <id|name>
+    search_ship <text>
+    ships_near <lat> <lon> <km>
+    ships_in_box <min_lat> <min_lon> <max_lat> <max_lon>
+    nearest <ship_name> <k>
+    group_by <field>[,<field>...] [top <n>]
+    port_arrivals <port> <hours>
+    busiest_ports <n> <window> [<bucket>]
+"""
+
+import io
+import json
+import math
+import sys
+
+from spatial_index import valid_position
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
+def open_stdout(buffer_size=OUTPUT_BUFFER_SIZE):
+    """Öffnet stdout als Textstrom mit großem Schreibpuffer (wird erst beim flush() geschrieben)."""
+    raw = open(sys.stdout.fileno(), "wb", buffering=buffer_size, closefd=False)
+    return io.TextIOWrapper(raw, encoding="utf-8", write_through=False)
+
+
+def parse_group_by(parts):
+    """Liest 'group_by <feld>[,<feld>...] [top <n>]'; gibt (Felder, n) oder None zurück."""
+    top = None
+    if len(parts) >= 2 and parts[-2].lower() == "top":
+        if not parts[-1].isdigit():
+            return None
+        top = int(parts[-1])
+        parts = parts[:-2]
+    fields = [field.upper() for part in parts for field in part.split(",") if field]
+    return (fields, top) if fields else None
+
+
+def parse_numbers(parts, count):
+    """Liest genau count endliche Zahlen aus den Befehlsteilen; None bei falscher Anzahl oder ungültigen Werten."""
+    if len(parts) != count:
+        return None
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        return None
+    return numbers if all(map(math.isfinite, numbers)) else None
+
+
+def parse_circle(parts):
+    """Liest '<lat> <lon> <km>'; None, wenn die Position ungültig oder km negativ ist."""
+    numbers = parse_numbers(parts, 3)
+    if numbers and valid_position(numbers[0], numbers[1]) and numbers[2] >= 0:
+        return numbers
+    return None
+
+
+def parse_box(parts):
+    """Liest '<min_lat> <min_lon> <max_lat> <max_lon>'; None, wenn eine Ecke ungültig ist oder min_lat > max_lat."""
+    numbers = parse_numbers(parts, 4)
+    if numbers and valid_position(*numbers[:2]) and valid_position(*numbers[2:]) and numbers[0] <= numbers[2]:
+        return numbers
+    return None
+
+
+def parse_hours(text):
+    """Liest eine Zeitspanne in Stunden: '24', '36h' oder '2d'; None, wenn ungültig oder negativ."""
+    factor = 24 if text.endswith("d") else 1
+    try:
+        hours = float(text.rstrip("hd")) * factor
+    except ValueError:
+        return None
+    return hours if 0 <= hours < float("inf") else None
+
+
+def parse_busiest_ports(parts):
+    """Liest 'busiest_ports <n> <window> [<bucket>]'; gibt (n, Stunden, Abschnitt oder None) oder None zurück."""
+    if len(parts) not in (2, 3) or not parts[0].isdigit():
+        return None
+    hours = parse_hours(parts[1])
+    bucket_hours = parse_hours(parts[2]) if len(parts) == 3 else None
+    if hours is None or (len(parts) == 3 and not bucket_hours):
+        return None
+    return int(parts[0]), hours, bucket_hours
+
+
+def _count_pairs(pairs, key):
+    return [{key: value, "count": count} for value, count in pairs]
+
+
+def _distances(found):
+    return [{"distance_km": round(distance, 3), "ship": ship} for distance, ship in found]
+
+
+def _top_countries(index, argument):
+    if not argument.isdigit():
+        raise ValueError("Ungültige Eingabe. Beispiel: top_countries 3")
+    return _count_pairs(index.top_countries(int(argument)), "country")
+
+
+def _show_ship(index, argument):
+    if not argument:
+        raise ValueError("Ungültige Eingabe. Beispiel: show_ship 371681")
+    return index.find(argument)
+
+
+def _search_ship(index, argument):
+    if not argument:
+        raise ValueError("Ungültige Eingabe. Beispiel: search_ship queen mary")
+    return [{"coverage": round(coverage, 3), "similarity": round(similarity, 3), "field": field, "value": value,
+             "ship": ship}
+            for coverage, similarity, field, value, ship in index.search(argument)]
+
+
+def _ships_near(index, argument):
+    numbers = parse_circle(argument.split())
+    if not numbers:
+        raise ValueError("Ungültige Eingabe. Beispiel: ships_near 48.38 -4.45 50")
+    return _distances(index.ships_near(*numbers))
+
+
+def _ships_in_box(index, argument):
+    numbers = parse_box(argument.split())
+    if not numbers:
+        raise ValueError("Ungültige Eingabe. Beispiel: ships_in_box 40 -10 50 5")
+    return index.ships_in_box(*numbers)
+
+
+def _nearest(index, argument):
+    parts = argument.split()
+    if len(parts) < 2 or not parts[-1].isdigit():
+        raise ValueError("Ungültige Eingabe. Beispiel: nearest queen mary 2 5")
+    ship, neighbours = index.nearest(" ".join(parts[:-1]), int(parts[-1]))
+    if ship is None:
+        raise ValueError(f"Kein Schiff mit Namen '{' '.join(parts[:-1])}' und bekannter Position gefunden.")
+    return {"ship": ship, "neighbours": _distances(neighbours)}
+
+
+def _group_by(index, argument):
+    parsed = parse_group_by(argument.split())
+    if not parsed:
+        raise ValueError("Ungültige Eingabe. Beispiel: group_by type_summary,code2 top 5")
+    unknown = [field for field in parsed[0] if field not in index.columns]
+    if unknown:
+        raise ValueError(f"Unbekanntes Feld {', '.join(unknown)}. Verfügbar: {', '.join(sorted(index.columns))}")
+    return {field: _count_pairs(pairs, "value") for field, pairs in index.group_by(*parsed).items()}
+
+
+def _port_arrivals(index, argument):
+    parts = argument.split()
+    hours = parse_hours(parts[-1]) if len(parts) >= 2 else None
+    if hours is None:
+        raise ValueError("Ungültige Eingabe. Beispiel: port_arrivals brest 48")
+    reference, arrivals = index.port_arrivals(" ".join(parts[:-1]), hours)
+    return {"reference_time": reference, "arrivals": [{"eta": eta, "ship": ship} for eta, ship in arrivals]}
+
+
+def _busiest_ports(index, argument):
+    parsed = parse_busiest_ports(argument.split())
+    if parsed is None:
+        raise ValueError("Ungültige Eingabe. Beispiel: busiest_ports 10 24h 6h")
+    reference, bucket_hours, ports = index.busiest_ports(*parsed)
+    return {"reference_time": reference, "bucket_hours": bucket_hours,
+            "ports": [{"port": port, "country": country, "count": count, "buckets": buckets}
+                      for port, country, count, buckets in ports]}
+
+
+COMMANDS = {
+    "count_ships": lambda index, _: len(index),
+    "list_ship_names": lambda index, _: list(index.column("SHIPNAME")),
+    "list_all_countries": lambda index, _: list(index.column("COUNTRY")),
+    "list_unique_countries": lambda index, _: list(index.countries),
+    "show_countries": lambda index, _: list(index.countries),
+    "top_countries": _top_countries,
+    "show_ship": _show_ship,
+    "search_ship": _search_ship,
+    "ships_near": _ships_near,
+    "ships_in_box": _ships_in_box,
+    "nearest": _nearest,
+    "group_by": _group_by,
+    "port_arrivals": _port_arrivals,
+    "busiest_ports": _busiest_ports,
+}
+
+
+def read_commands(lines):
+    """Liefert (Zeile, Befehl, Argument) für jede nicht leere Zeile, die kein Kommentar ist."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        command, _, argument = line.partition(" ")
+        yield line, command.lower(), argument.strip()
+
+
+def run_batch(index, lines, out):
+    """
+    Führt alle Befehle aus und schreibt pro Befehl eine JSON-Zeile in out.
+
+    Parameter:
+        index (ShipIndex): Gemeinsamer Index für alle Befehle.
+        lines (iterable): Befehlszeilen, z. B. aus argv oder sys.stdin.
+        out (TextIO): Ziel der JSON-Zeilen, am besten gepuffert (siehe open_stdout).
+
+    Rückgabe:
+        int: Anzahl fehlgeschlagener Befehle.
+    """
+    failures = 0
+    for line, command, argument in read_commands(lines):
+        handler = COMMANDS.get(command)
+        try:
+            if handler is None:
+                raise ValueError(f"Unbekannter Befehl '{command}'.")
+            record = {"command": line, "result": handler(index, argument)}
+        except ValueError as error:
+            failures += 1
+            record = {"command": line, "error": str(error)}
+        json.dump(record, out, ensure_ascii=False)
+        out.write("\n")
+    return failures
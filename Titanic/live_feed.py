@@ -0,0 +1,70 @@
+"""
+Live-Feed mit Positionsmeldungen im Format JSON Lines (ein Schiffs-Datensatz pro Zeile).
+
+Der Feed wird nur fortlaufend ergänzt. FeedFollower merkt sich, bis wohin die Datei gelesen ist,
+und liefert bei jedem poll() nur die seitdem vollständig geschriebenen Zeilen, wie tail -f. Wird
+die Datei gekürzt oder durch eine neue ersetzt, beginnt das Lesen wieder am Anfang.
+"""
+
+import json
+import os
+
+
+class FeedFollower:
+    """
+    Liest die neuen Zeilen einer wachsenden JSON-Lines-Datei.
+    """
+
+    def __init__(self, filePath):
+        """
+        Parameter:
+            filePath (str): Pfad zur Feed-Datei; sie muss beim Start noch nicht existieren.
+        """
+        self.filePath = filePath
+        self.offset = 0
+        self._inode = None
+        self._partial = b""
+
+    def poll(self):
+        """
+        Liest alle seit dem letzten Aufruf angehängten, vollständigen Zeilen.
+
+        Eine Zeile ohne abschließenden Zeilenumbruch wird zurückgehalten, bis sie fertig
+        geschrieben ist.
+
+        Rückgabe:
+            tuple: (Liste der Datensätze mit SHIP_ID, Anzahl übersprungener ungültiger Zeilen).
+        """
+        try:
+            stat = os.stat(self.filePath)
+        except FileNotFoundError:
+            return [], 0
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            self._inode = stat.st_ino
+            self.offset = 0
+            self._partial = b""
+        if stat.st_size == self.offset:
+            return [], 0
+
+        with open(self.filePath, "rb") as handle:
+            handle.seek(self.offset)
+            data = handle.read()
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+
+        records = []
+        invalid = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                invalid += 1
+                continue
+            if isinstance(record, dict) and record.get("SHIP_ID") is not None:
+                records.append(record)
+            else:
+                invalid += 1
+        return records, invalid
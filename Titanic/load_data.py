@@ -1,6 +1,120 @@
 import json
 
+CHUNK_SIZE = 1024 * 1024
+# Obergrenze für einen einzelnen JSON-Wert (ein Schiff oder ein Wert der Hülle) in Zeichen.
+MAX_VALUE_SIZE = 64 * 1024 * 1024
+_WHITESPACE = " \t\n\r"
+# Längstes Token außer Strings, das unvollständig am Pufferende einen Fehler auslöst ("-Infinity").
+_TOKEN_TAIL = len("-Infinity")
+
+
 def load_data(filePath):
   """ Loads a JSON file """
   with open(filePath, "r") as handle:
     return json.load(handle)
+
+
+class _Reader:
+  """ Liest eine Datei blockweise und hält nur den noch nicht verarbeiteten Rest im Speicher. """
+
+  def __init__(self, handle, chunk_size, max_value_size):
+    self.handle = handle
+    self.chunk_size = chunk_size
+    self.max_value_size = max_value_size
+    self.buffer = ""
+    self.pos = 0
+    self.eof = False
+
+  def fill(self):
+    """ Hängt den nächsten Block an; verarbeitete Zeichen werden vorher verworfen. """
+    chunk = self.handle.read(self.chunk_size)
+    if not chunk:
+      self.eof = True
+      return False
+    self.buffer = self.buffer[self.pos:] + chunk
+    self.pos = 0
+    return True
+
+  def next_char(self):
+    """ Überspringt Leerraum und gibt das nächste Zeichen zurück (ohne es zu verbrauchen), am Ende "". """
+    while True:
+      while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+        self.pos += 1
+      if self.pos < len(self.buffer) or not self.fill():
+        return self.buffer[self.pos:self.pos + 1]
+
+  def expect(self, chars):
+    char = self.next_char()
+    if not char or char not in chars:
+      raise ValueError(f"Ungültiges JSON: '{chars}' erwartet, '{char}' gefunden.")
+    self.pos += 1
+    return char
+
+  def _incomplete(self, error):
+    """ True, wenn der Fehler nur vom abgeschnittenen Pufferende kommen kann und weitere Daten helfen. """
+    if len(self.buffer) - self.pos >= self.max_value_size:
+      return False
+    return error.pos >= len(self.buffer) - _TOKEN_TAIL or error.msg.startswith("Unterminated string")
+
+  def value(self, decoder):
+    """
+    Dekodiert den nächsten JSON-Wert; liest weitere Blöcke nach, bis der Wert vollständig ist.
+
+    Ein Fehler mitten im Puffer wird sofort gemeldet, statt bis zum Dateiende weiterzulesen.
+    """
+    self.next_char()
+    while True:
+      try:
+        value, end = decoder.raw_decode(self.buffer, self.pos)
+      except json.JSONDecodeError as error:
+        if self._incomplete(error) and self.fill():
+          continue
+        if len(self.buffer) - self.pos >= self.max_value_size:
+          raise ValueError(f"Ungültiges JSON: Ein Wert ist länger als {self.max_value_size} Zeichen.") from error
+        raise
+      # Eine Zahl am Blockende könnte im nächsten Block weitergehen.
+      if end == len(self.buffer) and not self.eof and self.fill():
+        continue
+      self.pos = end
+      return value
+
+
+def iter_ships(filePath, chunk_size=CHUNK_SIZE):
+  """
+  Liest die Schiffe aus einer Datei der Form {"data": [...], ...} als Strom.
+
+  Die Datei wird blockweise gelesen; im Speicher liegt nur der aktuelle Block und ein einzelner
+  Schiffs-Datensatz, nicht die ganze Liste. Andere Schlüssel der Hülle werden übersprungen.
+
+  Parameter:
+    filePath (str): Pfad zur JSON-Datei.
+    chunk_size (int): Anzahl Zeichen pro gelesenem Block.
+
+  Rückgabe:
+    Iterator: Die Schiffs-Datensätze (Dictionaries) in Dateireihenfolge.
+
+  Raises:
+    ValueError: Wenn die Datei kein gültiges JSON in dieser Form enthält.
+  """
+  decoder = json.JSONDecoder()
+  with open(filePath, "r", encoding="utf-8") as handle:
+    reader = _Reader(handle, chunk_size, MAX_VALUE_SIZE)
+    reader.expect("{")
+    if reader.next_char() == "}":
+      return
+    while True:
+      key = reader.value(decoder)
+      reader.expect(":")
+      if key == "data":
+        reader.expect("[")
+        if reader.next_char() == "]":
+          reader.pos += 1
+        else:
+          while True:
+            yield reader.value(decoder)
+            if reader.expect(",]") == "]":
+              break
+      else:
+        reader.value(decoder)
+      if reader.expect(",}") == "}":
+        return
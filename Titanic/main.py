@@ -1,126 +1,349 @@
 import argparse
-from load_data import load_data
+import contextlib
+import sys
+from datetime import datetime, timezone
+from batch import open_stdout, parse_box, parse_busiest_ports, parse_circle, parse_group_by, parse_hours, run_batch
+from live_feed import FeedFollower
+from ship_cache import load_index
+from snapshots import SnapshotSummary
 
 
-def show_countries(data):
+def format_time(epoch):
+    """Epoch-Sekunden als 'YYYY-MM-DD HH:MM UTC'."""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+
+def show_countries(index):
     """
     Zeigt eine Liste der einzigartigen Länder sortiert nach Alphabet.
     """
-    ships = data.get("data", [])  # Zugriff auf den korrekten Schlüssel
-    if not ships:
+    if not len(index):
         print("Keine Daten verfügbar.")
         return
 
-    unique_countries = sorted(set(ship.get("COUNTRY", "Unbekannt") for ship in ships))
     print("Countries of ships:")
-    for country in unique_countries:
-        print(f"- {country}")
+    for country in index.countries:
+        print(f"- {country or 'Unbekannt'}")
 
 
-def count_by_country(data):
+def count_by_country(index):
     """
-    Zählt die Schiffe nach Ländern und gibt ein Dictionary zurück.
+    Gibt die Anzahl der Schiffe pro Land als Dictionary zurück (vorberechnet im Index).
     """
-    ships = data.get("data", [])  # Zugriff auf den korrekten Schlüssel
-    country_counts = {}
-    for ship in ships:
-        country = ship.get("COUNTRY", "Unbekannt")
-        country_counts[country] = country_counts.get(country, 0) + 1
-    return country_counts
+    return index.country_counts
 
 
-def top_countries(data, num_countries):
+def top_countries(index, num_countries):
     """
     Zeigt die Top-Länder mit den meisten Schiffen an.
     """
-    country_counts = count_by_country(data)
-    if not country_counts:
+    if not index.country_counts:
         print("Keine Daten verfügbar.")
         return
 
-    sorted_counts = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)
     print(f"Top {num_countries} countries with the most ships:")
-    for country, count in sorted_counts[:num_countries]:
-        print(f"{country}: {count}")
+    for country, count in index.top_countries(num_countries):
+        print(f"{country or 'Unbekannt'}: {count}")
 
 
-def count_ships(data):
+def count_ships(index):
     """
     Gibt die Gesamtanzahl der Schiffe aus.
     """
-    ships = data.get("data", [])
-    print(f"Total number of ships: {len(ships)}")
+    print(f"Total number of ships: {len(index)}")
 
 
-def list_ship_names(data):
+def list_ship_names(index):
     """
     Gibt die Namen aller Schiffe aus.
     """
-    ships = data.get("data", [])
-    if not ships:
+    if not len(index):
         print("Keine Daten verfügbar.")
         return
     print("Ship names:")
-    for ship in ships:
-        print(f"- {ship.get('SHIPNAME', 'Unknown')}")
+    for name in index.column("SHIPNAME"):
+        print(f"- {name if name is not None else 'Unknown'}")
 
 
-def list_all_countries(data):
+def list_all_countries(index):
     """
     Gibt alle Länder der Schiffe aus.
     """
-    ships = data.get("data", [])
-    if not ships:
+    if not len(index):
         print("Keine Daten verfügbar.")
         return
     print("All ship countries:")
-    for ship in ships:
-        print(f"- {ship.get('COUNTRY', 'Unknown')}")
+    for country in index.column("COUNTRY"):
+        print(f"- {country if country is not None else 'Unknown'}")
 
 
-def list_unique_countries(data):
+def list_unique_countries(index):
     """
     Gibt alle einzigartigen Länder der Schiffe aus.
     """
-    ships = data.get("data", [])
-    if not ships:
+    if not len(index):
         print("Keine Daten verfügbar.")
         return
-    unique_countries = sorted(set(ship.get("COUNTRY", "Unknown") for ship in ships))
     print("Unique ship countries:")
-    for country in unique_countries:
-        print(f"- {country}")
+    for country in index.countries:
+        print(f"- {country or 'Unknown'}")
+
+
+def show_ship(index, key):
+    """
+    Zeigt die Schiffe mit der angegebenen SHIP_ID, MMSI, IMO oder dem exakten Namen an.
+    """
+    ships = index.find(key)
+    if not ships:
+        print(f"Kein Schiff mit SHIP_ID, MMSI, IMO oder Namen '{key}' gefunden.")
+        return
+    for ship in ships:
+        print(f"{ship.get('SHIPNAME', 'Unknown')} (SHIP_ID {ship.get('SHIP_ID')}, IMO {ship.get('IMO')}, "
+              f"MMSI {ship.get('MMSI')}): {ship.get('TYPE_SUMMARY', 'Unknown')}, {ship.get('COUNTRY', 'Unknown')}, "
+              f"Ziel {ship.get('DESTINATION') or 'unbekannt'}")
+
+
+def search_ship(index, text):
+    """
+    Zeigt die Schiffe an, deren Name, Rufzeichen oder Ziel dem Suchtext am ähnlichsten ist.
+    """
+    found = index.search(text)
+    if not found:
+        print(f"Kein Schiff passend zu '{text}' gefunden.")
+        return
+    print(f"Ships matching '{text}':")
+    for coverage, similarity, field, value, ship in found:
+        print(f"- {ship.get('SHIPNAME', 'Unknown')} (SHIP_ID {ship.get('SHIP_ID')}, {ship.get('COUNTRY', 'Unknown')}): "
+              f"{field} {value} (coverage {coverage:.0%}, similarity {similarity:.0%})")
+
+
+def group_by(index, fields, top=None):
+    """
+    Zeigt die Anzahl der Schiffe pro Wert eines oder mehrerer Felder an.
+    """
+    unknown = [field for field in fields if field not in index.columns]
+    if unknown:
+        print(f"Error: Unbekanntes Feld {', '.join(unknown)}. Verfügbar: {', '.join(sorted(index.columns))}")
+        return
+    for field, counts in index.group_by(fields, top).items():
+        print(f"Ships by {field}" + (f" (top {top})" if top is not None else "") + ":")
+        for value, count in counts:
+            print(f"{'Unknown' if value is None else value or '(leer)'}: {count}")
+
+
+def describe_ship(ship):
+    """Kurzbeschreibung eines Schiffs mit Position für die Ausgabe der Geo-Befehle."""
+    return (f"{ship.get('SHIPNAME', 'Unknown')} ({ship.get('COUNTRY', 'Unknown')}, "
+            f"{ship.get('TYPE_SUMMARY', 'Unknown')}) bei {ship.get('LAT')}, {ship.get('LON')}")
+
+
+def ships_near(index, lat, lon, km):
+    """
+    Zeigt alle Schiffe im Umkreis von km Kilometern um eine Position an.
+    """
+    found = index.ships_near(lat, lon, km)
+    print(f"{len(found)} ships within {km:g} km of {lat:g}, {lon:g}:")
+    for distance, ship in found:
+        print(f"- {describe_ship(ship)}: {distance:.1f} km")
+
+
+def ships_in_box(index, min_lat, min_lon, max_lat, max_lon):
+    """
+    Zeigt alle Schiffe in einem Rechteck aus Breiten- und Längengraden an.
+    """
+    found = index.ships_in_box(min_lat, min_lon, max_lat, max_lon)
+    print(f"{len(found)} ships between {min_lat:g}, {min_lon:g} and {max_lat:g}, {max_lon:g}:")
+    for ship in found:
+        print(f"- {describe_ship(ship)}")
+
+
+def nearest(index, ship_name, k):
+    """
+    Zeigt die k nächsten Schiffe zu einem Schiff an.
+    """
+    ship, neighbours = index.nearest(ship_name, k)
+    if ship is None:
+        print(f"Kein Schiff mit Namen '{ship_name}' und bekannter Position gefunden.")
+        return
+    print(f"{len(neighbours)} nearest ships to {describe_ship(ship)}:")
+    for distance, other in neighbours:
+        print(f"- {describe_ship(other)}: {distance:.1f} km")
+
+
+def port_arrivals(index, port, hours):
+    """
+    Zeigt die Schiffe an, die einen Hafen innerhalb der nächsten hours Stunden erreichen sollen.
+    """
+    reference, arrivals = index.port_arrivals(port, hours)
+    print(f"{len(arrivals)} ships arriving at {port.upper()} within {hours:g} h of {format_time(reference)}:")
+    for eta, ship in arrivals:
+        print(f"- {format_time(eta)}: {ship.get('SHIPNAME', 'Unknown')} ({ship.get('COUNTRY', 'Unknown')}, "
+              f"{ship.get('TYPE_SUMMARY', 'Unknown')})")
+
+
+def busiest_ports(index, num_ports, hours, bucket_hours=None):
+    """
+    Zeigt die Häfen mit den meisten erwarteten Ankünften in den nächsten hours Stunden an, mit der
+    Anzahl pro Zeitabschnitt von bucket_hours Stunden.
+    """
+    try:
+        reference, bucket_hours, ports = index.busiest_ports(num_ports, hours, bucket_hours)
+    except ValueError as error:
+        print(f"Error: {error}")
+        return
+    if not ports:
+        print(f"Keine erwarteten Ankünfte innerhalb von {hours:g} h nach {format_time(reference)}.")
+        return
+    print(f"Top {num_ports} ports by expected arrivals within {hours:g} h of {format_time(reference)} "
+          f"(per {bucket_hours:g} h):")
+    for port, country, count, buckets in ports:
+        print(f"{port} ({country or 'Unknown'}): {count}  [{' '.join(map(str, buckets))}]")
+
+
+def apply_feed(index, follower):
+    """
+    Übernimmt alle neuen Zeilen des Live-Feeds in den Index.
+    """
+    records, invalid = follower.poll()
+    for record in records:
+        index.upsert(record)
+    if records:
+        print(f"Live-Feed: {len(records)} Aktualisierungen übernommen, {len(index)} Schiffe.")
+    if invalid:
+        print(f"Warnung: {invalid} ungültige Zeilen im Live-Feed übersprungen.")
+
+
+def snapshot_report(summary, num_countries):
+    """
+    Gibt die zusammengeführten Kennzahlen eines Snapshot-Verzeichnisses aus.
+    """
+    first_day, last_day = summary.snapshots[0][0], summary.snapshots[-1][0]
+    print(f"{len(summary.snapshots)} snapshots from {first_day} to {last_day}, {summary.records} records.")
+    print(f"Unique ships (by SHIP_ID): {len(summary)}")
+    top_countries(summary, num_countries)
+    print("Ships by TYPE_SUMMARY:")
+    for type_summary, count in summary.top_types():
+        print(f"{type_summary or 'Unknown'}: {count}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Ships CLI Tool")
     parser.add_argument("--file", type=str, default="ships_data.json", help="Pfad zur JSON-Datei mit den Schiffs-Daten")
+    parser.add_argument("--no-cache", action="store_true", help="JSON-Datei immer neu einlesen, ohne den Binär-Cache daneben")
+    parser.add_argument("--follow", type=str, metavar="FILE", help="JSON-Lines-Feed mit Positionsmeldungen, der vor jedem Befehl nachgelesen wird (Upsert nach SHIP_ID)")
+    parser.add_argument("--batch", nargs="*", metavar="COMMAND",
+                        help="Befehle ohne Eingabeaufforderung ausführen und als JSON Lines ausgeben, "
+                             "z. B. --batch 'top_countries 10' count_ships; ohne Befehle werden sie von stdin gelesen")
+    parser.add_argument("--dir", type=str, metavar="DIR", help="Verzeichnis mit täglichen Snapshots (*.json) parallel auswerten und zusammengefasst ausgeben")
+    parser.add_argument("--days", type=int, metavar="N", help="Mit --dir: nur die Snapshots der letzten N Tage")
+    parser.add_argument("--top", type=int, default=10, metavar="N", help="Mit --dir: Anzahl der ausgegebenen Top-Länder (Standard: 10)")
+    parser.add_argument("--workers", type=int, metavar="N", help="Mit --dir: Anzahl der Worker-Prozesse (Standard: CPU-Kerne)")
     args = parser.parse_args()
+    if args.days is not None and args.days < 1:
+        parser.error("--days muss mindestens 1 sein")
+
+    if args.dir:
+        try:
+            summary = SnapshotSummary(args.dir, days=args.days, max_workers=args.workers)
+        except (OSError, ValueError) as error:
+            print(f"Error: {error}")
+            sys.exit(1)
+        snapshot_report(summary, args.top)
+        return
+
+    # Im Batch-Modus gehören auf stdout nur die JSON-Zeilen; Meldungen beim Laden gehen nach stderr.
+    with contextlib.redirect_stdout(sys.stderr if args.batch is not None else sys.stdout):
+        # Beim ersten Start werden die Schiffe direkt aus dem Datenstrom in den Index übernommen und
+        # als Binär-Cache neben der JSON-Datei abgelegt; spätere Starts laden den Cache.
+        index = load_index(args.file, use_cache=not args.no_cache)
+        follower = FeedFollower(args.follow) if args.follow else None
+        if follower and args.batch is not None:
+            apply_feed(index, follower)
+
+    if args.batch is not None:
+        out = open_stdout()
+        try:
+            failures = run_batch(index, args.batch or sys.stdin, out)
+        finally:
+            out.flush()
+        sys.exit(1 if failures else 0)
 
-    data = load_data(args.file)
     print("Welcome to the Ships CLI! Enter 'help' to view available commands.")
 
     while True:
         command = input("\nEnter a command (or 'help' to view commands): ").strip().lower()
+        if follower:
+            apply_feed(index, follower)
         if command == "help":
             print(
-                "Available commands: count_ships, list_ship_names, list_all_countries, list_unique_countries, top_countries <n>, show_countries, exit")
+                "Available commands: count_ships, list_ship_names, list_all_countries, list_unique_countries, top_countries <n>, show_countries, show_ship <id|name>, search_ship <text>, ships_near <lat> <lon> <km>, "
+                "ships_in_box <min_lat> <min_lon> <max_lat> <max_lon>, nearest <ship_name> <k>, "
+                "group_by <field>[,<field>...] [top <n>], port_arrivals <port> <hours>, busiest_ports <n> <window> [<bucket>], exit")
         elif command == "show_countries":
-            show_countries(data)
+            show_countries(index)
         elif command == "count_ships":
-            count_ships(data)
+            count_ships(index)
         elif command == "list_ship_names":
-            list_ship_names(data)
+            list_ship_names(index)
         elif command == "list_all_countries":
-            list_all_countries(data)
+            list_all_countries(index)
         elif command == "list_unique_countries":
-            list_unique_countries(data)
+            list_unique_countries(index)
         elif command.startswith("top_countries"):
             parts = command.split()
             if len(parts) == 2 and parts[1].isdigit():
-                top_countries(data, int(parts[1]))
+                top_countries(index, int(parts[1]))
             else:
                 print("Error: Ungültige Eingabe. Beispiel: top_countries 3")
+        elif command.startswith("show_ship"):
+            key = command[len("show_ship"):].strip()
+            if key:
+                show_ship(index, key)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: show_ship 371681")
+        elif command.startswith("search_ship"):
+            text = command[len("search_ship"):].strip()
+            if text:
+                search_ship(index, text)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: search_ship queen mary")
+        elif command.startswith("ships_near"):
+            numbers = parse_circle(command.split()[1:])
+            if numbers:
+                ships_near(index, *numbers)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: ships_near 48.38 -4.45 50")
+        elif command.startswith("ships_in_box"):
+            numbers = parse_box(command.split()[1:])
+            if numbers:
+                ships_in_box(index, *numbers)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: ships_in_box 40 -10 50 5")
+        elif command.startswith("nearest"):
+            parts = command.split()
+            if len(parts) >= 3 and parts[-1].isdigit():
+                nearest(index, " ".join(parts[1:-1]), int(parts[-1]))
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: nearest queen mary 2 5")
+        elif command.startswith("group_by"):
+            parsed = parse_group_by(command.split()[1:])
+            if parsed:
+                group_by(index, *parsed)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: group_by type_summary,code2 top 5")
+        elif command.startswith("port_arrivals"):
+            parts = command.split()[1:]
+            hours = parse_hours(parts[-1]) if len(parts) >= 2 else None
+            if hours is not None:
+                port_arrivals(index, " ".join(parts[:-1]), hours)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: port_arrivals brest 48")
+        elif command.startswith("busiest_ports"):
+            parsed = parse_busiest_ports(command.split()[1:])
+            if parsed is not None:
+                busiest_ports(index, *parsed)
+            else:
+                print("Error: Ungültige Eingabe. Beispiel: busiest_ports 10 24h 6h")
         elif command == "exit":
             print("Exiting the CLI. Goodbye!")
             break
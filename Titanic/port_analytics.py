@@ -0,0 +1,202 @@
+"""
+Ankunftsprognosen pro Hafen aus NEXT_PORT_NAME und ETA.
+
+Alle Schiffe mit Zielhafen und gültiger ETA (Epoch-Sekunden; "masked" oder None zählen nicht)
+werden einmal nach (Hafen, ETA) sortiert, zusammengefasst zu einem int64-Schlüssel
+Hafen-Code << 32 | ETA. Ein Zeitfenster ist danach nur noch eine searchsorted-Abfrage auf diesem
+Array: für einen Hafen ergibt sie den Ausschnitt seiner Ankünfte in ETA-Reihenfolge, für alle Häfen
+zugleich die Anzahl der Ankünfte pro Hafen und Zeitabschnitt, ohne Schleife über die einzelnen Schiffe.
+
+Änderungen aus dem Live-Feed werden pro Schiff vorgemerkt und vor der nächsten Abfrage in einem
+Schritt in die sortierten Arrays einsortiert, statt den Index aus allen Schiffen neu aufzubauen.
+
+Bezugszeitpunkt ist der Stand des Snapshots, also die jüngste Positionsmeldung (LAST_POS).
+"""
+
+import math
+import time
+
+import numpy as np
+
+_ETA_LIMIT = 1 << 32
+DEFAULT_BUCKET_HOURS = 6
+MAX_BUCKETS = 48
+
+
+def _epoch_seconds(value):
+    """ETA-Wert als Epoch-Sekunden (int oder Ziffern-Text); -1, wenn er fehlt oder ungültig ist."""
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < _ETA_LIMIT:
+        return value
+    return -1
+
+
+class ArrivalIndex:
+    """
+    Nach (Hafen, ETA) sortierte Ankünfte eines ShipIndex.
+    """
+
+    def __init__(self, index):
+        """
+        Baut die sortierten Arrays aus den Spalten NEXT_PORT_NAME, NEXT_PORT_COUNTRY, ETA und LAST_POS.
+
+        Parameter:
+            index (ShipIndex): Die Schiffe; spätere Änderungen meldet der ShipIndex über update().
+        """
+        self._index = index
+        ports, port_codes = index.encoded("NEXT_PORT_NAME")
+        # Eigene Kopie, die update() um neue Häfen erweitert.
+        self.ports = list(ports)
+        self._port_codes = {name: code for code, name in enumerate(self.ports)}
+        port_codes = np.frombuffer(port_codes, dtype=np.int32).astype(np.int64)
+        eta_values, eta_codes = index.encoded("ETA")
+        etas = np.array([_epoch_seconds(value) for value in eta_values], dtype=np.int64)[
+            np.frombuffer(eta_codes, dtype=np.int32)]
+
+        last_values, last_codes = index.encoded("LAST_POS")
+        last_positions = np.array([_epoch_seconds(value) for value in last_values], dtype=np.int64)
+        seen = np.unique(np.frombuffer(last_codes, dtype=np.int32))
+        self._latest = int(last_positions[seen].max()) if len(seen) else -1
+        self.reference_time = self._latest if self._latest >= 0 else int(time.time())
+
+        # Code 0 steht für "kein Zielhafen".
+        positions = np.flatnonzero((port_codes > 0) & (etas >= 0))
+        keys = (port_codes[positions] << 32) | etas[positions]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.positions = positions[order]
+        self._pending = {}
+        self._update_port_countries()
+
+    def _update_port_countries(self):
+        """Land pro Hafen: vom ersten Schiff mit diesem Zielhafen im sortierten Array."""
+        countries = self._index.column("NEXT_PORT_COUNTRY")
+        present, first = np.unique(self.keys >> 32, return_index=True)
+        self.port_countries = [None] * len(self.ports)
+        for code, position in zip(present.tolist(), self.positions[first].tolist()):
+            self.port_countries[code] = countries[position]
+
+    def update(self, position):
+        """
+        Merkt die aktuellen Ankunftsdaten eines neuen oder geänderten Schiffs vor.
+
+        Die sortierten Arrays werden erst vor der nächsten Abfrage angepasst, so dass viele Änderungen
+        aus dem Feed zusammen nur einmal einsortiert werden. Der Bezugszeitpunkt folgt der jüngsten
+        Positionsmeldung.
+
+        Parameter:
+            position (int): Position des Schiffs im ShipIndex.
+        """
+        index = self._index
+        port, eta, last = (index.columns[field][position] if field in index.columns else None
+                           for field in ("NEXT_PORT_NAME", "ETA", "LAST_POS"))
+        eta, last = _epoch_seconds(eta), _epoch_seconds(last)
+        key = -1
+        if port is not None:
+            # Neue Häfen in derselben Reihenfolge wie in der Spalte, damit die Codes zu einem Neuaufbau passen.
+            code = self._port_codes.get(port)
+            if code is None:
+                code = self._port_codes[port] = len(self.ports)
+                self.ports.append(port)
+            if eta >= 0:
+                key = (code << 32) | eta
+        self._pending[position] = key
+        if last > self._latest:
+            self._latest = self.reference_time = last
+
+    def _apply_pending(self):
+        """Entfernt die alten Einträge der vorgemerkten Schiffe und sortiert die neuen ein."""
+        if not self._pending:
+            return
+        changed = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        new_keys = np.fromiter(self._pending.values(), dtype=np.int64, count=len(self._pending))
+        self._pending = {}
+        keep = ~np.isin(self.positions, changed)
+        keys, positions = self.keys[keep], self.positions[keep]
+        added = np.flatnonzero(new_keys >= 0)
+        order = added[np.lexsort((changed[added], new_keys[added]))]
+        # Bei gleichem Schlüssel nach Position einsortieren, wie beim Aufbau mit stabiler Sortierung.
+        slots = []
+        for key, position in zip(new_keys[order].tolist(), changed[order].tolist()):
+            low = np.searchsorted(keys, key, side="left")
+            high = np.searchsorted(keys, key, side="right")
+            slots.append(low + np.searchsorted(positions[low:high], position))
+        self.keys = np.insert(keys, slots, new_keys[order])
+        self.positions = np.insert(positions, slots, changed[order])
+        self._update_port_countries()
+
+    def _window(self, port_codes, start, end):
+        """Anfang und Ende der Ankünfte in [start, end] im sortierten Array, für jeden Hafen-Code."""
+        port_codes = np.asarray(port_codes, dtype=np.int64) << 32
+        start, end = max(start, 0), min(end, _ETA_LIMIT - 1)
+        return (np.searchsorted(self.keys, port_codes | start, side="left"),
+                np.searchsorted(self.keys, port_codes | end, side="right"))
+
+    def arrivals(self, port, hours):
+        """
+        Schiffe, die innerhalb von hours Stunden nach dem Bezugszeitpunkt einen Hafen erreichen.
+
+        Parameter:
+            port (str): Hafenname (NEXT_PORT_NAME), ohne Groß-/Kleinschreibung.
+            hours (float): Länge des Zeitfensters in Stunden.
+
+        Rückgabe:
+            list: (ETA, Position im ShipIndex)-Paare, nach ETA sortiert.
+        """
+        self._apply_pending()
+        port = port.strip().upper()
+        codes = [code for code, name in enumerate(self.ports) if name and name.upper() == port]
+        if not codes:
+            return []
+        starts, ends = self._window(codes, self.reference_time, self.reference_time + int(hours * 3600))
+        slices = [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist())]
+        found = np.concatenate(slices)
+        # Mehrere Schreibweisen desselben Hafens: die Ausschnitte nach ETA mischen.
+        found = found[np.argsort(self.keys[found] & (_ETA_LIMIT - 1), kind="stable")]
+        return list(zip((self.keys[found] & (_ETA_LIMIT - 1)).tolist(), self.positions[found].tolist()))
+
+    def busiest(self, num_ports, hours, bucket_hours=None):
+        """
+        Häfen mit den meisten Ankünften innerhalb von hours Stunden nach dem Bezugszeitpunkt, mit der
+        Anzahl pro Zeitabschnitt von bucket_hours Stunden.
+
+        Parameter:
+            num_ports (int): Anzahl der Häfen.
+            hours (float): Länge des Zeitfensters in Stunden.
+            bucket_hours (float, optional): Länge eines Zeitabschnitts; Standard DEFAULT_BUCKET_HOURS,
+                bei langen Fenstern so viel länger, dass höchstens MAX_BUCKETS Abschnitte entstehen.
+
+        Rückgabe:
+            tuple: (Länge eines Abschnitts in Stunden, Liste von (Hafen, Land, Anzahl, Anzahl pro
+            Abschnitt)), absteigend nach Anzahl (bei Gleichstand alphabetisch). Der letzte Abschnitt
+            endet mit dem Fenster und kann kürzer sein.
+
+        Raises:
+            ValueError: Wenn bucket_hours nicht positiv ist oder mehr als MAX_BUCKETS Abschnitte ergibt.
+        """
+        self._apply_pending()
+        if bucket_hours is None:
+            bucket_hours = max(DEFAULT_BUCKET_HOURS, math.ceil(hours / MAX_BUCKETS))
+        elif not 0 < bucket_hours < float("inf") or hours / bucket_hours > MAX_BUCKETS:
+            raise ValueError(f"Ungültige Abschnittslänge {bucket_hours:g} h (höchstens {MAX_BUCKETS} Abschnitte).")
+        if len(self.ports) < 2 or num_ports <= 0:
+            return bucket_hours, []
+        start = self.reference_time
+        end = start + int(hours * 3600)
+        bounds = np.arange(start, end, max(int(bucket_hours * 3600), 1)) if end > start else np.array([start])
+        bounds = np.clip(bounds, 0, _ETA_LIMIT - 1)
+
+        codes = np.arange(1, len(self.ports), dtype=np.int64)
+        # Eine Zeile pro Hafen: Anfang jedes Abschnitts, dazu das Ende des Fensters.
+        edges = np.empty((len(codes), len(bounds) + 1), dtype=np.int64)
+        edges[:, :-1] = np.searchsorted(self.keys, ((codes << 32)[:, None] | bounds).ravel(),
+                                        side="left").reshape(len(codes), len(bounds))
+        edges[:, -1] = self._window(codes, start, end)[1]
+        buckets = np.diff(edges, axis=1)
+        counts = edges[:, -1] - edges[:, 0]
+        names = np.array([str(name) for name in self.ports[1:]])
+        ranking = np.lexsort((names, -counts))[:num_ports]
+        return bucket_hours, [(self.ports[code], self.port_countries[code], int(count), buckets[row].tolist())
+                              for row, code, count in zip(ranking.tolist(), codes[ranking].tolist(),
+                                                          counts[ranking].tolist()) if count]
@@ -0,0 +1,80 @@
+"""
+Nachschlagetabelle Schlüssel -> Positionen, in der sich Positionen in konstanter Zeit entfernen lassen.
+
+Jede Position steht unter höchstens einem Schlüssel (ein Schiff hat z. B. genau einen Namen). Neben
+den Listen pro Schlüssel merkt sich die Tabelle daher für jede Position, an welcher Stelle ihrer
+Liste sie steht (array 'i', 4 Byte pro Position). Beim Entfernen rückt der letzte Eintrag der Liste
+an die frei gewordene Stelle, statt die Liste zu durchsuchen; die Reihenfolge innerhalb einer Liste
+ist dadurch beliebig, get() liefert die Positionen deshalb sortiert.
+"""
+
+from array import array
+
+
+class PositionTable:
+    """
+    Schlüssel -> Liste der Positionen, mit add() und discard() in konstanter Zeit.
+    """
+
+    def __init__(self):
+        self._positions = {}
+        self._slots = array("i")  # Position -> Stelle in der Liste ihres Schlüssels
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Baut die Tabelle aus (Schlüssel, Position)-Paaren auf; schneller als add() für jedes Paar."""
+        table = cls()
+        lists = table._positions
+        for key, position in pairs:
+            positions = lists.get(key)
+            if positions is None:
+                positions = lists[key] = []
+            positions.append(position)
+        table._slots = array("i", bytes(4 * (1 + max(map(max, lists.values()), default=-1))))
+        for positions in lists.values():
+            for slot, position in enumerate(positions):
+                table._slots[position] = slot
+        return table
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def keys(self):
+        return self._positions.keys()
+
+    def get(self, key):
+        """Die Positionen unter key, aufsteigend sortiert (leer, wenn der Schlüssel fehlt)."""
+        return sorted(self._positions.get(key, ()))
+
+    def count(self, key):
+        """Anzahl der Positionen unter key."""
+        return len(self._positions.get(key, ()))
+
+    def add(self, key, position):
+        """Vermerkt position unter key; eine Position darf nur unter einem Schlüssel stehen."""
+        positions = self._positions.get(key)
+        if positions is None:
+            positions = self._positions[key] = []
+        if position >= len(self._slots):
+            # Mindestens verdoppeln, damit fortlaufend angehängte Positionen nicht jedes Mal kopieren.
+            self._slots.frombytes(bytes(4 * max(position + 1 - len(self._slots), len(self._slots))))
+        self._slots[position] = len(positions)
+        positions.append(position)
+
+    def discard(self, key, position):
+        """Entfernt position unter key; fehlt sie dort, passiert nichts. Leere Schlüssel werden gelöscht."""
+        positions = self._positions.get(key)
+        if positions is None or position >= len(self._slots):
+            return
+        slot = self._slots[position]
+        if slot >= len(positions) or positions[slot] != position:
+            return
+        last = positions.pop()
+        if last != position:
+            positions[slot] = last
+            self._slots[last] = slot
+        if not positions:
+            del self._positions[key]
@@ -0,0 +1,159 @@
+"""
+Binärer Cache der Schiffsdaten für einen schnellen Start der CLI.
+
+Nach dem ersten Einlesen einer JSON-Datei wird der ShipIndex spaltenweise neben der Quelle abgelegt:
+
+- <datei>.cache.npy: eine int32-Matrix mit einer Zeile Codes pro Feld, als rohes .npy-Array.
+- <datei>.cache.json: Felder, Anzahl der Schiffe und pro Feld die Liste der unterschiedlichen Werte,
+  so dass jeder Text nur einmal abgelegt ist.
+
+In der JSON-Datei sind Größe und Änderungszeit der Quelle vermerkt; stimmen beide beim nächsten
+Start noch, wird der Index aus dem Cache aufgebaut, statt die JSON-Datei erneut zu parsen. Die Codes
+werden dabei nicht gelesen, sondern mit mmap eingeblendet: der Start kostet nur die Wertelisten,
+Seiten der Matrix lädt das Betriebssystem erst, wenn eine Abfrage sie braucht, und mehrere Prozesse
+auf derselben Datei teilen sich den Page Cache. Erst eine Änderung (--follow) kopiert eine Spalte.
+
+Der Cache braucht NumPy. Ohne NumPy (oder mit --no-cache) wird die JSON-Datei wie bisher gelesen.
+"""
+
+import importlib.util
+import json
+import os
+
+from load_data import iter_ships
+from ship_index import ShipIndex
+
+CACHE_SUFFIX = ".cache.npy"
+META_SUFFIX = ".cache.json"
+CACHE_VERSION = 2
+
+
+def cache_path(filePath):
+    """Pfad der Code-Matrix des Caches zu einer JSON-Datei."""
+    return filePath + CACHE_SUFFIX
+
+
+def meta_path(filePath):
+    """Pfad der Metadaten (Quelle, Felder, Wertelisten) des Caches zu einer JSON-Datei."""
+    return filePath + META_SUFFIX
+
+
+def source_stamp(filePath):
+    """Größe und Änderungszeit der Quelle; ändert sich eines davon, ist der Cache veraltet."""
+    stat = os.stat(filePath)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _numpy_available():
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _write_atomic(path, write):
+    """Schreibt über eine temporäre Datei und ersetzt path erst danach."""
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "wb") as handle:
+            write(handle)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def save_cache(index, filePath, stamp):
+    """
+    Schreibt den Index als Cache neben die JSON-Datei.
+
+    Beide Dateien werden zuerst unter einem temporären Namen geschrieben und dann ersetzt. Die alten
+    Metadaten werden vorher entfernt und die neuen zuletzt geschrieben, damit ein abgebrochener Lauf
+    nie Metadaten neben einer nicht dazu passenden Code-Matrix hinterlässt.
+
+    Parameter:
+        index (ShipIndex): Der aus filePath aufgebaute Index.
+        filePath (str): Pfad zur JSON-Datei.
+        stamp (dict): Größe und Änderungszeit der Quelle vor dem Einlesen (siehe source_stamp).
+
+    Raises:
+        OSError: Wenn die Cache-Datei nicht geschrieben werden kann.
+    """
+    import numpy as np
+    columns = index.to_columns()
+    codes = np.empty((len(columns), len(index)), dtype=np.int32)
+    for number, (values, column_codes) in enumerate(columns.values()):
+        codes[number] = np.frombuffer(column_codes, dtype=np.int32)
+    meta = {"version": CACHE_VERSION, "source": stamp, "size": len(index), "fields": list(columns),
+            "values": [values for values, _ in columns.values()]}
+
+    if os.path.exists(meta_path(filePath)):
+        os.remove(meta_path(filePath))
+    _write_atomic(cache_path(filePath), lambda handle: np.save(handle, codes, allow_pickle=False))
+    _write_atomic(meta_path(filePath), lambda handle: handle.write(json.dumps(meta).encode("utf-8")))
+
+
+def load_cache(filePath, stamp):
+    """
+    Lädt den Index aus dem Cache einer JSON-Datei; die Codes bleiben memory-mapped.
+
+    Parameter:
+        filePath (str): Pfad zur JSON-Datei.
+        stamp (dict): Aktuelle Größe und Änderungszeit der Quelle.
+
+    Rückgabe:
+        ShipIndex: Der Index, oder None, wenn kein Cache existiert oder er zu einer anderen
+        Version der Quelle gehört.
+
+    Raises:
+        ValueError: Wenn die Cache-Datei beschädigt ist.
+    """
+    import numpy as np
+    path = cache_path(filePath)
+    if not os.path.exists(meta_path(filePath)):
+        return None
+    try:
+        with open(meta_path(filePath), "rb") as handle:
+            meta = json.loads(handle.read())
+        if meta.get("version") != CACHE_VERSION or meta.get("source") != stamp:
+            return None
+        fields, size = meta["fields"], meta["size"]
+        codes = np.load(path, mmap_mode="r", allow_pickle=False)
+        if codes.dtype != np.int32 or codes.shape != (len(fields), size):
+            raise ValueError(f"Code-Matrix {codes.dtype} {codes.shape} passt nicht zu {len(fields)} Feldern "
+                             f"und {size} Schiffen")
+        columns = {field: (values, codes[number]) for number, (field, values) in enumerate(zip(fields, meta["values"]))}
+        return ShipIndex.from_columns(size, columns)
+    except (OSError, EOFError, KeyError, TypeError, ValueError) as error:
+        raise ValueError(f"Cache '{path}' ist beschädigt ({error}).") from error
+
+
+def load_index(filePath, use_cache=True):
+    """
+    Baut den ShipIndex für eine JSON-Datei auf, wenn möglich aus dem Cache.
+
+    Ist kein gültiger Cache vorhanden, wird die JSON-Datei als Strom gelesen und der Cache danach
+    neu geschrieben. Ein beschädigter oder nicht schreibbarer Cache führt nur zu einer Warnung.
+
+    Parameter:
+        filePath (str): Pfad zur JSON-Datei.
+        use_cache (bool): False liest immer die JSON-Datei und schreibt keinen Cache.
+
+    Rückgabe:
+        ShipIndex: Der Index über alle Schiffe der Datei.
+    """
+    use_cache = use_cache and _numpy_available()
+    stamp = source_stamp(filePath)
+    if use_cache:
+        try:
+            index = load_cache(filePath, stamp)
+        except ValueError as error:
+            print(f"Warnung: {error} Die JSON-Datei wird neu gelesen.")
+            index = None
+        if index is not None:
+            return index
+
+    index = ShipIndex(iter_ships(filePath))
+    if use_cache:
+        try:
+            save_cache(index, filePath, stamp)
+        except OSError as error:
+            print(f"Warnung: Cache '{cache_path(filePath)}' konnte nicht geschrieben werden: {error}")
+    return index
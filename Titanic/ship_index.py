@@ -0,0 +1,522 @@
+"""
+Index über die Schiffsdaten.
+
+Der ShipIndex wird einmal beim Laden aufgebaut, Schiff für Schiff direkt aus dem Datenstrom
+(siehe load_data.iter_ships). Er hält die Anzahl pro Land, die sortierte Liste der Länder und
+Nachschlagetabellen für SHIP_ID, IMO, MMSI und SHIPNAME, damit die Befehle der CLI nicht bei
+jedem Aufruf alle Schiffe erneut durchlaufen müssen.
+
+Die Datensätze selbst werden nicht als Dictionaries aufbewahrt, sondern spaltenweise: eine Liste
+pro Feld, Texte mit sys.intern, so dass wiederkehrende Werte nur einmal im Speicher liegen. Felder
+mit wenigen unterschiedlichen Werten (Länder, Schiffstypen, Häfen) werden kategorial gespeichert,
+als Ganzzahl-Codes plus Werteliste; darüber zählt group_by() vektorisiert mit NumPy. In derselben
+Form (Codes plus Werte) lässt sich der Index über to_columns()/from_columns() speichern und wieder
+laden (siehe ship_cache.py); ein so geladener Index hält alle Spalten kodiert.
+
+NumPy wird erst für group_by(), search() und die Hafenabfragen gebraucht; NumPy und die Module, die
+es verwenden (trigram_index, port_analytics), werden daher erst dort importiert, damit die übrigen
+Befehle ohne NumPy auskommen.
+"""
+
+import bisect
+import heapq
+import sys
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+from position_table import PositionTable
+from spatial_index import GridIndex, parse_coordinate
+
+
+# Felder mit wenigen unterschiedlichen Werten; sie werden als Codes gespeichert.
+CATEGORICAL_FIELDS = (
+    "COUNTRY", "CODE2", "TYPE_SUMMARY", "TYPE_COLOR", "DESTINATION", "CURRENT_PORT", "PORT_ID",
+    "NEXT_PORT_NAME", "NEXT_PORT_COUNTRY", "NEXT_PORT_ID", "TIMEZONE", "ETA_OFFSET", "CTA_ROUTE_FORECAST",
+)
+
+# Felder, in denen search() unscharf sucht.
+SEARCH_FIELDS = ("SHIPNAME", "CALLSIGN", "DESTINATION")
+# Felder, aus denen der ArrivalIndex (port_analytics.py) seine Einträge bildet.
+ARRIVAL_FIELDS = ("NEXT_PORT_NAME", "NEXT_PORT_COUNTRY", "ETA", "LAST_POS")
+
+
+def _sort_key(country):
+    """Länder alphabetisch, fehlende Angaben (None) am Ende."""
+    return (country is None, country or "")
+
+
+def _compact(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Categorical:
+    """
+    Spalte als Ganzzahl-Codes (array 'i', aus dem Cache zunächst ein schreibgeschützter Puffer) plus
+    Liste der unterschiedlichen Werte; verhält sich beim Lesen wie eine Liste der Werte.
+    """
+
+    def __init__(self, size=0):
+        self.values = [None]
+        self._lookup = {None: 0}
+        self.codes = array("i", bytes(4 * size))
+
+    @classmethod
+    def from_codes(cls, values, codes):
+        """
+        Baut die Spalte aus einer Werteliste (values[0] ist None) und den int32-Codes in einem
+        beliebigen Puffer auf, z. B. Bytes oder ein memory-mapped Array aus dem Cache. Der Puffer
+        wird nicht kopiert, sondern erst beim ersten Schreiben in ein array('i') übernommen; die
+        Zuordnung Wert -> Code entsteht ebenfalls erst dann.
+        """
+        column = cls()
+        column.values = values
+        column._lookup = None
+        column.codes = memoryview(codes).cast("B").cast("i")
+        return column
+
+    def _writable(self):
+        if self._lookup is None:
+            self._lookup = {value: code for code, value in enumerate(self.values)}
+        if type(self.codes) is memoryview:
+            codes = array("i")
+            codes.frombytes(self.codes.cast("B"))
+            self.codes = codes
+
+    def append(self, value):
+        self._writable()
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, position):
+        return self.values[self.codes[position]]
+
+    def __setitem__(self, position, value):
+        self._writable()
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes[position] = code
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+    def value_counts(self):
+        """(Wert, Anzahl)-Paare aller vorkommenden Werte, in der Reihenfolge ihres ersten Auftretens."""
+        import numpy as np
+        counts = np.bincount(np.frombuffer(self.codes, dtype=np.int32), minlength=len(self.values))
+        return [(value, count) for value, count in zip(self.values, counts.tolist()) if count]
+
+
+def _new_column(field, size):
+    """Leere Spalte für ein neu auftauchendes Feld, mit None für die size bisherigen Schiffe."""
+    return _Categorical(size) if field in CATEGORICAL_FIELDS else [None] * size
+
+
+class ShipIndex:
+    """
+    Spaltenweise gespeicherte Schiffe mit vorberechneten Aggregaten und Nachschlagetabellen.
+    """
+
+    def __init__(self, ships=()):
+        """
+        Baut den Index in einem Durchlauf auf.
+
+        Parameter:
+            ships (iterable): Schiffs-Datensätze (Dictionaries), z. B. aus load_data.iter_ships().
+        """
+        self.columns = {}
+        self.size = 0
+        self.country_counts = {}
+        self.countries = []
+        self.by_ship_id = {}
+        # MMSI, IMO und Name können bei mehreren Schiffen gleich sein.
+        self.by_mmsi = PositionTable()
+        self.by_imo = PositionTable()
+        self.by_shipname = PositionTable()
+        self.spatial = GridIndex()
+        self._ranking = None
+        self._lookups_ready = True
+        self._search = None
+        self._arrivals = None
+        for ship in ships:
+            self.add(ship)
+
+    @classmethod
+    def from_data(cls, data):
+        """Baut den Index aus dem vollständig geladenen JSON ({"data": [...]})."""
+        return cls(data.get("data", []))
+
+    @classmethod
+    def from_columns(cls, size, columns):
+        """
+        Baut den Index aus dictionary-kodierten Spalten auf, wie sie to_columns() liefert.
+
+        Die Spalten bleiben kodiert (Codes plus Werte), die Anzahl pro Land wird sofort gezählt.
+        Nachschlagetabellen und Gitter entstehen erst bei der ersten Abfrage, die sie braucht, so
+        dass der Start nur die Spalten selbst kostet.
+
+        Parameter:
+            size (int): Anzahl der Schiffe.
+            columns (dict): Feld -> (Werteliste mit None an Position 0, int32-Codes als Bytes oder
+                anderer Puffer, siehe _Categorical.from_codes).
+
+        Raises:
+            ValueError: Wenn eine Spalte nicht size Einträge hat.
+        """
+        index = cls()
+        index.size = size
+        for field, (values, codes) in columns.items():
+            column = _Categorical.from_codes([_compact(value) for value in values], codes)
+            if len(column) != size:
+                raise ValueError(f"Spalte {field} hat {len(column)} statt {size} Einträge.")
+            index.columns[field] = column
+        # Counter zählt in der Reihenfolge des ersten Auftretens, wie add().
+        index.country_counts = dict(Counter(index.column("COUNTRY")))
+        index.countries = sorted(index.country_counts, key=_sort_key)
+        index._lookups_ready = False
+        return index
+
+    def _build_lookups(self):
+        """Baut Nachschlagetabellen und Gitter aus den Spalten auf, falls from_columns sie ausgelassen hat."""
+        if self._lookups_ready:
+            return
+        self.by_ship_id = {key: position for position, key in enumerate(self.column("SHIP_ID")) if key is not None}
+        self.by_mmsi = PositionTable.from_pairs(
+            (mmsi, position) for position, mmsi in enumerate(self.column("MMSI")) if mmsi is not None)
+        self.by_imo = PositionTable.from_pairs(
+            (imo, position) for position, imo in enumerate(self.column("IMO")) if imo not in (None, "", "0"))
+        self.by_shipname = PositionTable.from_pairs(
+            (name.upper(), position) for position, name in enumerate(self.column("SHIPNAME")) if name)
+        for position, (lat, lon) in enumerate(zip(self.column("LAT"), self.column("LON"))):
+            self.spatial.update(position, parse_coordinate(lat), parse_coordinate(lon))
+        self._lookups_ready = True
+
+    def encoded(self, field):
+        """
+        Eine Spalte dictionary-kodiert; nicht kategoriale Spalten werden dafür einmal durchlaufen.
+
+        Rückgabe:
+            tuple: (Werteliste mit None an Position 0, int32-Codes als array('i') oder Puffer, ein Code pro Schiff).
+        """
+        column = self.columns.get(field)
+        if column is None:
+            return [None], array("i", bytes(4 * self.size))
+        if not isinstance(column, _Categorical):
+            encoded = _Categorical()
+            for value in column:
+                encoded.append(value)
+            column = encoded
+        return column.values, column.codes
+
+    def to_columns(self):
+        """
+        Alle Spalten dictionary-kodiert: jeder unterschiedliche Wert einmal, dazu ein Code pro Schiff.
+
+        Rückgabe:
+            dict: Feld -> (Werteliste mit None an Position 0, array('i') der Codes).
+        """
+        return {field: self.encoded(field) for field in self.columns}
+
+    def add(self, ship):
+        """
+        Nimmt ein Schiff in die Spalten, Aggregate und Nachschlagetabellen auf.
+
+        Parameter:
+            ship (dict): Schiffs-Datensatz.
+
+        Rückgabe:
+            int: Position des Schiffs im Index.
+        """
+        self._build_lookups()
+        position = self.size
+        for field, column in self.columns.items():
+            value = ship.get(field)
+            column.append(sys.intern(value) if type(value) is str else value)
+        for field in [field for field in ship if field not in self.columns]:
+            self.columns[field] = _new_column(field, position)
+            self.columns[field].append(_compact(ship[field]))
+        self.size += 1
+        if self._arrivals is not None:
+            self._arrivals.update(position)
+
+        country = self.columns["COUNTRY"][position] if "COUNTRY" in self.columns else None
+        if country not in self.country_counts:
+            self.country_counts[country] = 0
+            bisect.insort(self.countries, country, key=_sort_key)
+        self.country_counts[country] += 1
+        self._ranking = None
+
+        if ship.get("SHIP_ID") is not None:
+            self.by_ship_id[ship["SHIP_ID"]] = position
+        if ship.get("MMSI") is not None:
+            self.by_mmsi.add(ship["MMSI"], position)
+        # IMO "0" steht für "keine IMO-Nummer" und kommt bei vielen Schiffen vor.
+        if ship.get("IMO") not in (None, "", "0"):
+            self.by_imo.add(ship["IMO"], position)
+        if ship.get("SHIPNAME"):
+            self.by_shipname.add(ship["SHIPNAME"].upper(), position)
+        self.spatial.update(position, parse_coordinate(ship.get("LAT")), parse_coordinate(ship.get("LON")))
+        if self._search is not None:
+            for field in SEARCH_FIELDS:
+                if ship.get(field):
+                    self._search.add(field, ship[field], position)
+        return position
+
+    def upsert(self, ship):
+        """
+        Übernimmt einen Datensatz aus dem Live-Feed.
+
+        Ein Schiff mit unbekannter SHIP_ID wird angehängt; ein bekanntes wird an seiner Position
+        aktualisiert, und zwar nur in den Feldern, die der Datensatz enthält. Anzahl pro Land,
+        Nachschlagetabellen, Suchindex und Gitter werden für die geänderten Felder angepasst,
+        ohne etwas neu aufzubauen.
+
+        Parameter:
+            ship (dict): Vollständiger oder teilweiser Datensatz mit SHIP_ID.
+
+        Rückgabe:
+            int: Position des Schiffs im Index.
+
+        Raises:
+            ValueError: Wenn der Datensatz keine SHIP_ID hat.
+        """
+        if ship.get("SHIP_ID") is None:
+            raise ValueError("Datensatz ohne SHIP_ID.")
+        self._build_lookups()
+        position = self.by_ship_id.get(ship["SHIP_ID"])
+        if position is None:
+            return self.add(ship)
+
+        old = {}
+        for field, value in ship.items():
+            value = _compact(value)
+            current = self.columns[field][position] if field in self.columns else None
+            if value != current:
+                old[field] = current
+                if field not in self.columns:
+                    self.columns[field] = _new_column(field, self.size)
+                self.columns[field][position] = value
+        if not old:
+            return position
+        if self._arrivals is not None and not old.keys().isdisjoint(ARRIVAL_FIELDS):
+            self._arrivals.update(position)
+
+        if "COUNTRY" in old:
+            self._count_country(old["COUNTRY"], -1)
+            self._count_country(ship["COUNTRY"], 1)
+        # Andere Schiffe mit derselben MMSI, IMO oder demselben Namen behalten ihre Einträge.
+        if "MMSI" in old:
+            self.by_mmsi.discard(old["MMSI"], position)
+            if ship["MMSI"] is not None:
+                self.by_mmsi.add(ship["MMSI"], position)
+        if "IMO" in old:
+            self.by_imo.discard(old["IMO"], position)
+            if ship["IMO"] not in (None, "", "0"):
+                self.by_imo.add(ship["IMO"], position)
+        if "SHIPNAME" in old:
+            if old["SHIPNAME"]:
+                self.by_shipname.discard(old["SHIPNAME"].upper(), position)
+            if ship["SHIPNAME"]:
+                self.by_shipname.add(ship["SHIPNAME"].upper(), position)
+        if self._search is not None:
+            for field in SEARCH_FIELDS:
+                if field in old:
+                    if old[field]:
+                        self._search.discard(field, old[field], position)
+                    if ship[field]:
+                        self._search.add(field, ship[field], position)
+        if "LAT" in old or "LON" in old:
+            lat, lon = (self.columns[field][position] if field in self.columns else None for field in ("LAT", "LON"))
+            self.spatial.update(position, parse_coordinate(lat), parse_coordinate(lon))
+        return position
+
+    def _count_country(self, country, delta):
+        """Passt die Anzahl pro Land an; Länder ohne Schiffe verschwinden aus der Liste."""
+        if country not in self.country_counts:
+            self.country_counts[country] = 0
+            bisect.insort(self.countries, country, key=_sort_key)
+        self.country_counts[country] += delta
+        if not self.country_counts[country]:
+            del self.country_counts[country]
+            self.countries.remove(country)
+        self._ranking = None
+
+    def __len__(self):
+        return self.size
+
+    def column(self, field):
+        """Alle Werte eines Felds in Index-Reihenfolge (None, wo das Feld fehlt)."""
+        return self.columns.get(field) or [None] * self.size
+
+    def ship(self, position):
+        """Baut den Datensatz an einer Position wieder als Dictionary auf (ohne leere Felder)."""
+        return {field: column[position] for field, column in self.columns.items() if column[position] is not None}
+
+    def top_countries(self, num_countries):
+        """
+        Gibt die Länder mit den meisten Schiffen zurück.
+
+        Die Rangfolge wird nur nach Änderungen neu sortiert (bei Gleichstand in der Reihenfolge
+        des ersten Auftretens); danach kostet jede Abfrage nur das Ausschneiden der ersten n Einträge.
+
+        Rückgabe:
+            list: (Land, Anzahl)-Paare, absteigend nach Anzahl.
+        """
+        if self._ranking is None:
+            self._ranking = sorted(self.country_counts.items(), key=lambda item: item[1], reverse=True)
+        return self._ranking[:num_countries]
+
+    def group_by(self, fields, top=None):
+        """
+        Zählt die Schiffe pro Wert für ein oder mehrere Felder.
+
+        Kategoriale Felder werden mit np.bincount über die Codes gezählt, andere Felder mit einem
+        Counter über die Spalte. Jede Spalte wird genau einmal gelesen; die Top-n-Auswahl läuft
+        über einen Heap statt über eine vollständige Sortierung.
+
+        Parameter:
+            fields (list): Feldnamen, z. B. ["TYPE_SUMMARY", "CODE2"].
+            top (int, optional): Nur die n häufigsten Werte pro Feld.
+
+        Rückgabe:
+            dict: Feld -> (Wert, Anzahl)-Paare, absteigend nach Anzahl (bei Gleichstand in der
+            Reihenfolge des ersten Auftretens).
+
+        Raises:
+            KeyError: Wenn ein Feld in keinem Datensatz vorkommt.
+        """
+        groups = {}
+        for field in dict.fromkeys(fields):
+            column = self.columns[field]
+            if isinstance(column, _Categorical):
+                pairs = column.value_counts()
+            else:
+                pairs = list(Counter(column).items())
+            if top is None:
+                groups[field] = sorted(pairs, key=itemgetter(1), reverse=True)
+            else:
+                groups[field] = heapq.nlargest(top, pairs, key=itemgetter(1))
+        return groups
+
+    def find(self, key):
+        """
+        Sucht Schiffe über SHIP_ID, MMSI, IMO oder den exakten Namen (ohne Groß-/Kleinschreibung).
+
+        Rückgabe:
+            list: Die gefundenen Schiffe als Dictionaries, ohne Duplikate.
+        """
+        self._build_lookups()
+        key = key.strip()
+        positions = [self.by_ship_id.get(key)] + self.by_mmsi.get(key)
+        positions += self.by_imo.get(key) + self.by_shipname.get(key.upper())
+        return [self.ship(position) for position in dict.fromkeys(positions) if position is not None]
+
+    def search(self, text, limit=10):
+        """
+        Unscharfe Suche in SHIPNAME, CALLSIGN und DESTINATION über einen Trigramm-Index.
+
+        Findet Teilstrings und toleriert Tippfehler; der Index wird bei der ersten Suche aufgebaut
+        und danach von add() fortgeschrieben.
+
+        Parameter:
+            text (str): Suchtext, z. B. "queen mray".
+            limit (int): Höchstens so viele Schiffe.
+
+        Rückgabe:
+            list: (Abdeckung 0..1, Ähnlichkeit 0..1, Feld, gefundener Text, Schiff)-Tupel, bester
+            Treffer zuerst, jedes Schiff einmal (siehe TrigramIndex.search).
+        """
+        if self._search is None:
+            from trigram_index import TrigramIndex
+            self._search = TrigramIndex()
+            for field in SEARCH_FIELDS:
+                for position, value in enumerate(self.column(field)):
+                    if value:
+                        self._search.add(field, value, position)
+        found = {}
+        # Ein Schiff kann über jedes seiner Suchfelder treffen; so viele Texte reichen für limit Schiffe.
+        for *match, positions in self._search.search(text, limit * len(SEARCH_FIELDS)):
+            for position in positions:
+                if len(found) < limit and position not in found:
+                    found[position] = match
+        return [(*match, self.ship(position)) for position, match in found.items()]
+
+    def port_arrivals(self, port, hours):
+        """
+        Schiffe, die einen Hafen (NEXT_PORT_NAME) innerhalb von hours Stunden erreichen sollen.
+
+        Die nach (Hafen, ETA) sortierten Ankünfte werden bei der ersten Abfrage aufgebaut; neue und
+        geänderte Schiffe werden danach einzeln nachgetragen (siehe port_analytics.py).
+
+        Rückgabe:
+            tuple: (Bezugszeitpunkt in Epoch-Sekunden, Liste von (ETA, Schiff) nach ETA sortiert).
+        """
+        arrivals = self._arrival_index()
+        return arrivals.reference_time, [(eta, self.ship(position)) for eta, position in arrivals.arrivals(port, hours)]
+
+    def busiest_ports(self, num_ports, hours, bucket_hours=None):
+        """
+        Die Häfen mit den meisten erwarteten Ankünften innerhalb von hours Stunden, aufgeteilt in
+        Zeitabschnitte von bucket_hours Stunden (siehe ArrivalIndex.busiest).
+
+        Rückgabe:
+            tuple: (Bezugszeitpunkt in Epoch-Sekunden, Abschnittslänge in Stunden, Liste von
+            (Hafen, Land, Anzahl, Anzahl pro Abschnitt)).
+
+        Raises:
+            ValueError: Wenn die Abschnittslänge ungültig ist.
+        """
+        arrivals = self._arrival_index()
+        bucket_hours, ports = arrivals.busiest(num_ports, hours, bucket_hours)
+        return arrivals.reference_time, bucket_hours, ports
+
+    def _arrival_index(self):
+        if self._arrivals is None:
+            from port_analytics import ArrivalIndex
+            self._arrivals = ArrivalIndex(self)
+        return self._arrivals
+
+    def ships_near(self, lat, lon, km):
+        """
+        Schiffe im Umkreis von km Kilometern um (lat, lon).
+
+        Rückgabe:
+            list: (Entfernung in km, Schiff)-Paare, aufsteigend nach Entfernung.
+        """
+        self._build_lookups()
+        return [(distance, self.ship(position)) for distance, position in self.spatial.near(lat, lon, km)]
+
+    def ships_in_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Schiffe im Rechteck zwischen zwei Ecken; min_lon > max_lon reicht über die Datumsgrenze.
+
+        Rückgabe:
+            list: Die Schiffe, nach Breite und Länge sortiert.
+        """
+        self._build_lookups()
+        return [self.ship(position) for position in self.spatial.in_box(min_lat, min_lon, max_lat, max_lon)]
+
+    def nearest(self, ship_name, k):
+        """
+        Die k nächsten Schiffe zu einem Schiff (exakter Name, ohne Groß-/Kleinschreibung).
+
+        Rückgabe:
+            tuple: (Schiff, Liste von (Entfernung in km, Schiff)) oder (None, []), wenn das Schiff
+            unbekannt ist oder keine Position hat.
+        """
+        self._build_lookups()
+        for position in self.by_shipname.get(ship_name.strip().upper()):
+            if position in self.spatial.points:
+                lat, lon = self.spatial.points[position]
+                neighbours = self.spatial.nearest(lat, lon, k, exclude=[position])
+                return self.ship(position), [(distance, self.ship(other)) for distance, other in neighbours]
+        return None, []
@@ -0,0 +1,137 @@
+"""
+Auswertung über ein Verzeichnis mit täglichen Schiffs-Snapshots.
+
+Jede Datei hat dasselbe Format wie ships_data.json, z. B. 'ships_2021-09-02.json' für den
+Snapshot eines Tages. Die Dateien werden in einem Prozess-Pool parallel gelesen (Map): jeder
+Worker liefert pro SHIP_ID Land und Schiffstyp seines Snapshots. Zusammengeführt wird in
+Datumsreihenfolge (Reduce), so dass jedes Schiff genau einmal zählt, mit den Angaben aus dem
+neuesten Snapshot, in dem es vorkommt.
+"""
+
+import datetime
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from load_data import iter_ships
+from ship_cache import load_cache, source_stamp
+
+# Datum im Dateinamen, z. B. ships_2021-09-02.json oder 20210902.json.
+SNAPSHOT_DATE = re.compile(r"(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)")
+
+
+def _snapshot_date(path):
+    """Datum aus dem Dateinamen, sonst das Änderungsdatum der Datei."""
+    match = SNAPSHOT_DATE.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime.date(*map(int, match.groups()))
+        except ValueError:
+            pass
+    return datetime.date.fromtimestamp(os.path.getmtime(path))
+
+
+def discover_snapshots(directory, days=None):
+    """
+    Sucht die Snapshot-Dateien (*.json) in einem Verzeichnis.
+
+    Parameter:
+        directory (str): Verzeichnis mit einer JSON-Datei pro Tag.
+        days (int, optional): Nur die Snapshots der letzten days Tage, gerechnet ab dem neuesten.
+
+    Rückgabe:
+        list: (Datum, Pfad)-Paare, nach Datum und Dateiname sortiert.
+
+    Raises:
+        ValueError: Wenn das Verzeichnis keine .json-Dateien enthält.
+    """
+    snapshots = sorted(
+        (_snapshot_date(path), path)
+        for path in (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json"))
+    )
+    if not snapshots:
+        raise ValueError(f"Keine Snapshots (*.json) in '{directory}' gefunden.")
+    if days is not None:
+        first_day = snapshots[-1][0] - datetime.timedelta(days=days - 1)
+        snapshots = [snapshot for snapshot in snapshots if snapshot[0] >= first_day]
+    return snapshots
+
+
+def _summarize_snapshot(path):
+    """
+    Map-Schritt für einen Snapshot; läuft in einem Worker-Prozess.
+
+    Verwendet den Binär-Cache der Datei, falls er aktuell ist, und liest sonst die JSON-Datei als
+    Strom, ohne einen vollständigen Index aufzubauen.
+
+    Rückgabe:
+        tuple: (Anzahl Datensätze, dict SHIP_ID -> (COUNTRY, TYPE_SUMMARY)).
+    """
+    try:
+        index = load_cache(path, source_stamp(path))
+    except (ImportError, ValueError):
+        index = None
+    if index is not None:
+        ships = zip(index.column("SHIP_ID"), index.column("COUNTRY"), index.column("TYPE_SUMMARY"))
+        return len(index), {ship_id: (country, type_summary) for ship_id, country, type_summary in ships
+                            if ship_id is not None}
+    records = 0
+    latest = {}
+    for ship in iter_ships(path):
+        records += 1
+        if ship.get("SHIP_ID") is not None:
+            latest[ship["SHIP_ID"]] = (ship.get("COUNTRY"), ship.get("TYPE_SUMMARY"))
+    return records, latest
+
+
+class SnapshotSummary:
+    """
+    Zusammengeführte Kennzahlen mehrerer Snapshots: eindeutige Schiffe, Anzahl pro Land und pro
+    Schiffstyp. Bietet len(), country_counts, countries und top_countries() wie der ShipIndex, so
+    dass die Ausgabefunktionen der CLI auch hierfür funktionieren.
+    """
+
+    def __init__(self, directory, days=None, max_workers=None):
+        """
+        Liest alle Snapshots parallel und führt die Teilergebnisse zusammen.
+
+        Parameter:
+            directory (str): Verzeichnis mit den Snapshot-Dateien.
+            days (int, optional): Nur die letzten days Tage (siehe discover_snapshots).
+            max_workers (int, optional): Anzahl der Worker-Prozesse (Standard: CPU-Kerne).
+
+        Raises:
+            ValueError: Wenn keine Snapshots gefunden werden oder eine Datei ungültig ist.
+        """
+        self.snapshots = discover_snapshots(directory, days)
+        self.max_workers = max_workers or min(len(self.snapshots), os.cpu_count() or 1)
+        self.records = 0
+        ships = {}
+        # Teilergebnisse in Datumsreihenfolge übernehmen: spätere Snapshots überschreiben frühere.
+        for records, latest in self._map([path for _, path in self.snapshots]):
+            self.records += records
+            ships.update(latest)
+        self.ships = ships
+        self.country_counts = dict(Counter(country for country, _ in ships.values()))
+        self.type_counts = dict(Counter(type_summary for _, type_summary in ships.values()))
+        self.countries = sorted(self.country_counts, key=lambda country: (country is None, country or ""))
+
+    def _map(self, paths):
+        """Ruft _summarize_snapshot für jeden Pfad auf, parallel, sofern sinnvoll; Ergebnisse in Pfad-Reihenfolge."""
+        if self.max_workers < 2 or len(paths) < 2:
+            yield from map(_summarize_snapshot, paths)
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(_summarize_snapshot, paths)
+
+    def __len__(self):
+        return len(self.ships)
+
+    def top_countries(self, num_countries):
+        """(Land, Anzahl eindeutiger Schiffe)-Paare, absteigend nach Anzahl."""
+        return sorted(self.country_counts.items(), key=lambda item: item[1], reverse=True)[:num_countries]
+
+    def top_types(self, num_types=None):
+        """(Schiffstyp, Anzahl eindeutiger Schiffe)-Paare, absteigend nach Anzahl."""
+        return sorted(self.type_counts.items(), key=lambda item: item[1], reverse=True)[:num_types]
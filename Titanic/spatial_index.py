@@ -0,0 +1,210 @@
+"""
+Räumlicher Index über die Schiffspositionen (LAT/LON).
+
+Die Erdoberfläche wird in ein gleichmäßiges Gitter aus Zellen von cell_degrees Grad aufgeteilt;
+jede Zelle kennt die Schiffe, die in ihr liegen. Umkreis- und Rechteckabfragen lesen nur die
+Zellen, die das Suchgebiet berühren, statt alle Schiffe zu prüfen. Positionen lassen sich einzeln
+ändern (ein Schiff wechselt dabei höchstens die Zelle), so dass der Index bei Live-Updates nicht
+neu aufgebaut werden muss.
+"""
+
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def parse_coordinate(value):
+    """Wandelt einen LAT/LON-Wert ("48.38464", 48.38, None) in eine Zahl um; None, wenn ungültig."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def valid_position(lat, lon):
+    """Ob lat/lon endliche Zahlen im Bereich -90 bis 90 bzw. -180 bis 180 Grad sind."""
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Großkreisentfernung zweier Punkte in Kilometern."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Gitterindex: Zelle (Zeile, Spalte) -> Menge der Positionen (z. B. aus dem ShipIndex).
+    """
+
+    def __init__(self, cell_degrees=1.0):
+        """
+        Parameter:
+            cell_degrees (float): Kantenlänge einer Zelle in Grad (1 Grad Breite sind etwa 111 km).
+        """
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.cols = math.ceil(360 / cell_degrees)
+        self.cells = {}
+        self.points = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, lat, lon):
+        row = min(int((lat + 90) // self.cell_degrees), self.rows - 1)
+        col = int(((lon + 180) % 360) // self.cell_degrees) % self.cols
+        return row, col
+
+    def update(self, position, lat, lon):
+        """
+        Setzt (oder entfernt, bei lat/lon None) die Position eines Eintrags.
+
+        Parameter:
+            position (int): Schlüssel des Eintrags, z. B. die Position im ShipIndex.
+            lat (float): Breite in Grad (-90 bis 90).
+            lon (float): Länge in Grad (-180 bis 180).
+        """
+        old = self.points.pop(position, None)
+        if old is not None:
+            cell = self._cell(*old)
+            self.cells[cell].discard(position)
+            if not self.cells[cell]:
+                del self.cells[cell]
+        if lat is None or lon is None or not -90 <= lat <= 90:
+            return
+        self.points[position] = (lat, lon)
+        self.cells.setdefault(self._cell(lat, lon), set()).add(position)
+
+    def _columns(self, min_lon, max_lon):
+        """Spalten zwischen zwei Längen; min_lon > max_lon bedeutet über die Datumsgrenze hinweg."""
+        if max_lon - min_lon >= 360:
+            return range(self.cols)
+        first = self._cell(0, min_lon)[1]
+        last = self._cell(0, max_lon)[1]
+        if first <= last and min_lon <= max_lon:
+            return range(first, last + 1)
+        return list(range(first, self.cols)) + list(range(0, last + 1))
+
+    def _candidates(self, min_lat, max_lat, columns):
+        first_row = self._cell(max(min_lat, -90), 0)[0]
+        last_row = self._cell(min(max_lat, 90), 0)[0]
+        for row in range(first_row, last_row + 1):
+            for col in columns:
+                yield from self.cells.get((row, col), ())
+
+    def in_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Alle Einträge im Rechteck; ist min_lon größer als max_lon, reicht es über die Datumsgrenze.
+
+        Rückgabe:
+            list: Positionen, nach Breite und Länge sortiert.
+
+        Raises:
+            ValueError: Wenn eine Ecke keine gültige Position ist.
+        """
+        if not (valid_position(min_lat, min_lon) and valid_position(max_lat, max_lon)):
+            raise ValueError(f"Ungültiges Rechteck {min_lat}, {min_lon} bis {max_lat}, {max_lon}.")
+        crosses = min_lon > max_lon
+        found = []
+        for position in self._candidates(min_lat, max_lat, self._columns(min_lon, max_lon)):
+            lat, lon = self.points[position]
+            inside_lon = (lon >= min_lon or lon <= max_lon) if crosses else min_lon <= lon <= max_lon
+            if min_lat <= lat <= max_lat and inside_lon:
+                found.append(position)
+        found.sort(key=lambda position: self.points[position])
+        return found
+
+    def _lon_span(self, lat, km):
+        """Halbe Breite des Suchgebiets in Längengraden auf der Breite lat (360 an den Polen)."""
+        cos_lat = math.cos(math.radians(min(89.999, abs(lat))))
+        return min(360.0, km / (KM_PER_DEGREE * cos_lat))
+
+    def near(self, lat, lon, km):
+        """
+        Alle Einträge im Umkreis von km Kilometern um (lat, lon).
+
+        Rückgabe:
+            list: (Entfernung in km, Position)-Paare, aufsteigend nach Entfernung.
+
+        Raises:
+            ValueError: Wenn (lat, lon) keine gültige Position oder km negativ bzw. nicht endlich ist.
+        """
+        if not valid_position(lat, lon) or not 0 <= km < math.inf:
+            raise ValueError(f"Ungültiger Umkreis {km} km um {lat}, {lon}.")
+        lat_span = km / KM_PER_DEGREE
+        min_lat, max_lat = lat - lat_span, lat + lat_span
+        # Die größte Längenausdehnung hat der Kreis auf der polnäheren Breite des Suchgebiets.
+        lon_span = self._lon_span(max(abs(min_lat), abs(max_lat)), km)
+        if min_lat <= -90 or max_lat >= 90:
+            lon_span = 360.0
+        columns = self._columns(lon - lon_span, lon + lon_span) if lon_span < 180 else range(self.cols)
+        found = []
+        for position in self._candidates(min_lat, max_lat, columns):
+            distance = haversine_km(lat, lon, *self.points[position])
+            if distance <= km:
+                found.append((distance, position))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k, exclude=()):
+        """
+        Die k nächsten Einträge zu (lat, lon).
+
+        Sucht ringförmig um die Startzelle nach außen und hört auf, sobald kein Eintrag in einem
+        weiteren Ring näher liegen kann als der k-te bisher gefundene.
+
+        Parameter:
+            exclude (iterable): Positionen, die nicht zurückgegeben werden (z. B. das Schiff selbst).
+
+        Rückgabe:
+            list: (Entfernung in km, Position)-Paare, aufsteigend nach Entfernung.
+        """
+        exclude = set(exclude) & self.points.keys()
+        remaining = len(self.points) - len(exclude)
+        if k <= 0 or not remaining:
+            return []
+        center_row, center_col = self._cell(lat, lon)
+        cos_lat = math.cos(math.radians(lat))
+        visited = set()
+        best = []  # Min-Heap über (-Entfernung, Position): die Wurzel ist der bisher k-t nächste Eintrag.
+        for ring in range(max(self.rows, self.cols)):
+            for row in range(center_row - ring, center_row + ring + 1):
+                if not 0 <= row < self.rows:
+                    continue
+                on_edge = row in (center_row - ring, center_row + ring)
+                cols = range(center_col - ring, center_col + ring + 1) if on_edge else (center_col - ring, center_col + ring)
+                for col in (c % self.cols for c in cols):
+                    # Ab einem halben Erdumfang überlappen sich die Ringe in Längenrichtung.
+                    if (row, col) in visited:
+                        continue
+                    visited.add((row, col))
+                    for position in self.cells.get((row, col), ()):
+                        if position in exclude:
+                            continue
+                        remaining -= 1
+                        entry = (-haversine_km(lat, lon, *self.points[position]), position)
+                        if len(best) < k:
+                            heapq.heappush(best, entry)
+                        elif entry > best[0]:
+                            heapq.heapreplace(best, entry)
+            if not remaining:
+                break
+            if len(best) == k:
+                # Unbesuchte Zellen liegen mindestens ring Zellen entfernt: in Breitenrichtung also
+                # mindestens so viele Grad, in Längenrichtung mindestens der Abstand zum Meridian
+                # im Winkel delta (sin d = cos(Breite) * sin(delta)).
+                delta = ring * self.cell_degrees
+                lat_bound = delta * KM_PER_DEGREE
+                if 2 * ring + 1 >= self.cols:
+                    lon_bound = lat_bound
+                else:
+                    lon_bound = EARTH_RADIUS_KM * math.asin(cos_lat * math.sin(math.radians(min(delta, 90.0))))
+                if -best[0][0] <= min(lat_bound, lon_bound):
+                    break
+        return sorted((-distance, position) for distance, position in best)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Die Module liegen flach im Projektordner und werden ohne Paketnamen importiert.
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+
+@pytest.fixture(scope="session")
+def ships_file():
+    """Pfad zum mitgelieferten Beispiel-Snapshot."""
+    return os.path.join(PROJECT_DIR, "ships_data.json")
@@ -0,0 +1,59 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from batch import run_batch
+from load_data import iter_ships
+from ship_index import ShipIndex
+
+
+@pytest.fixture(scope="module")
+def index(ships_file):
+    return ShipIndex(iter_ships(ships_file))
+
+
+def _run(index, lines):
+    out = io.StringIO()
+    failures = run_batch(index, lines, out)
+    return failures, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_results_match_index(index):
+    failures, records = _run(index, ["count_ships", "# Kommentar", "", "  top_countries 2  ", "show_ship 371681"])
+    assert failures == 0
+    assert [record["command"] for record in records] == ["count_ships", "top_countries 2", "show_ship 371681"]
+    assert records[0]["result"] == len(index)
+    assert records[1]["result"] == [{"country": country, "count": count} for country, count in index.top_countries(2)]
+    assert records[2]["result"][0]["SHIPNAME"] == "QUEEN MARY 2"
+
+
+def test_failures_are_counted_and_reported(index):
+    failures, records = _run(index, ["fly_to_moon", "top_countries x", "count_ships"])
+    assert failures == 2
+    assert "error" in records[0] and "error" in records[1]
+    assert records[2]["result"] == len(index)
+
+
+def _main(ships_file, *args, stdin=""):
+    main = os.path.join(os.path.dirname(ships_file), "main.py")
+    return subprocess.run([sys.executable, main, "--file", ships_file, "--no-cache", "--batch", *args],
+                          input=stdin, capture_output=True, text=True)
+
+
+def test_exit_code_reflects_failures(ships_file):
+    ok = _main(ships_file, "count_ships", "top_countries 3")
+    assert ok.returncode == 0
+    assert [json.loads(line)["command"] for line in ok.stdout.splitlines()] == ["count_ships", "top_countries 3"]
+    failed = _main(ships_file, "count_ships", "unknown_command")
+    assert failed.returncode == 1
+    assert len(failed.stdout.splitlines()) == 2
+
+
+def test_commands_from_stdin(ships_file):
+    result = _main(ships_file, stdin="count_ships\n\n# Kommentar\nshow_countries\n")
+    assert result.returncode == 0
+    assert [json.loads(line)["command"] for line in result.stdout.splitlines()] == ["count_ships", "show_countries"]
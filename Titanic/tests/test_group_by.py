@@ -0,0 +1,51 @@
+from collections import Counter
+
+import pytest
+
+from load_data import iter_ships
+from ship_index import CATEGORICAL_FIELDS, ShipIndex
+
+FIELDS = ["COUNTRY", "TYPE_SUMMARY", "NEXT_PORT_NAME", "HEADING", "SPEED", "DESTINATION"]
+
+
+@pytest.fixture(scope="module")
+def ships(ships_file):
+    ships = list(iter_ships(ships_file))
+    # Ein Feld, das nur ein Teil der Schiffe hat, und ein Schiff ohne Land.
+    for number, ship in enumerate(ships[::3]):
+        ship["HEADING"] = number % 7
+    ships.append({"SHIP_ID": "extra", "SHIPNAME": "EXTRA"})
+    return ships
+
+
+def _assert_counts(pairs, ships, field, top=None):
+    """Jedes Paar stimmt mit einem Counter überein, absteigend sortiert und, ohne top, vollständig."""
+    counts = Counter(ship.get(field) for ship in ships)
+    expected = sorted(counts.values(), reverse=True)
+    assert [count for _, count in pairs] == (expected if top is None else expected[:top]), field
+    assert all(counts[value] == count for value, count in pairs), field
+    assert len({value for value, _ in pairs}) == len(pairs), field
+
+
+def test_fields_cover_categorical_and_plain_columns():
+    assert set(FIELDS) & set(CATEGORICAL_FIELDS) and set(FIELDS) - set(CATEGORICAL_FIELDS)
+
+
+def test_group_by_matches_counter(ships):
+    groups = ShipIndex(ships).group_by(FIELDS)
+    assert list(groups) == FIELDS
+    for field in FIELDS:
+        _assert_counts(groups[field], ships, field)
+
+
+@pytest.mark.parametrize("top", [0, 1, 3, 1000])
+def test_group_by_top(ships, top):
+    groups = ShipIndex(ships).group_by(["COUNTRY", "HEADING", "COUNTRY"], top)
+    assert list(groups) == ["COUNTRY", "HEADING"]
+    for field, pairs in groups.items():
+        _assert_counts(pairs, ships, field, top)
+
+
+def test_group_by_unknown_field(ships):
+    with pytest.raises(KeyError):
+        ShipIndex(ships).group_by(["NO_SUCH_FIELD"])
@@ -0,0 +1,127 @@
+import json
+import random
+import shutil
+
+import pytest
+
+from live_feed import FeedFollower
+from load_data import iter_ships
+from ship_cache import load_index
+from ship_index import ShipIndex
+
+SEARCHES = ("queen mary", "brest", "hamburg", "zcef")
+
+
+def _updates(base, count=1500, seed=22):
+    """Zufällige Teil-Updates: Positionen, Länder, Namen, MMSI/IMO (auch kollidierende), neue Schiffe."""
+    rng = random.Random(seed)
+    countries = [("Germany", "DE"), ("Atlantis", "AT"), ("Bermuda", "BM"), (None, None)]
+    updates = []
+    for number in range(count):
+        ship = rng.choice(base)
+        update = {"SHIP_ID": ship["SHIP_ID"] if rng.random() < 0.9 else f"new{number % 100}"}
+        kind = rng.random()
+        if kind < 0.4:
+            update.update(LAT=str(round(rng.uniform(-89, 89), 4)), LON=str(round(rng.uniform(-180, 180), 4)))
+        elif kind < 0.55:
+            update["COUNTRY"], update["CODE2"] = rng.choice(countries)
+        elif kind < 0.65:
+            update["SHIPNAME"] = rng.choice(["QUEEN MARY 3", None, "", ship["SHIPNAME"] + " X"])
+        elif kind < 0.75:
+            update["MMSI"] = rng.choice([None, f"m{number}", rng.choice(base)["MMSI"]])
+        elif kind < 0.85:
+            update["IMO"] = rng.choice(["0", None, "9241061", str(rng.randint(1, 99))])
+        elif kind < 0.9:
+            update["DESTINATION"] = rng.choice(["BREST", "HAMBURG", None])
+        else:
+            update["LAT"] = None
+        updates.append(update)
+    return updates
+
+
+def _table(table):
+    """Schlüssel -> Position bzw. sortierte Positionen; die Reihenfolge in einer Liste ist beliebig."""
+    return {key: sorted(value) if isinstance(value, list) else value
+            for key, value in ((key, table.get(key)) for key in table.keys())}
+
+
+def _search(index, text):
+    return sorted(((*match, ship["SHIP_ID"]) for *match, ship in index.search(text, 5000)), key=str)
+
+
+def _assert_same(index, expected):
+    assert len(index) == len(expected)
+    for field in expected.columns:
+        assert list(index.column(field)) == list(expected.column(field)), field
+    assert index.country_counts == expected.country_counts
+    assert index.countries == expected.countries
+    for name in ("by_ship_id", "by_mmsi", "by_imo", "by_shipname"):
+        assert _table(getattr(index, name)) == _table(getattr(expected, name)), name
+    assert index.spatial.points == expected.spatial.points
+    assert index.spatial.cells == expected.spatial.cells
+    for text in SEARCHES:
+        assert _search(index, text) == _search(expected, text), text
+
+
+@pytest.fixture(scope="module")
+def base(ships_file):
+    return list(iter_ships(ships_file))
+
+
+@pytest.fixture(scope="module")
+def feed(base):
+    updates = _updates(base)
+    merged = {ship["SHIP_ID"]: dict(ship) for ship in base}
+    for update in updates:
+        merged.setdefault(update["SHIP_ID"], {}).update(update)
+    return updates, ShipIndex(merged.values())
+
+
+@pytest.mark.parametrize("search_first", [False, True])
+def test_upsert_matches_rebuild(base, feed, search_first):
+    updates, expected = feed
+    index = ShipIndex(base)
+    if search_first:
+        index.search("x")
+    for update in updates:
+        index.upsert(update)
+    _assert_same(index, expected)
+
+
+@pytest.mark.parametrize("search_first", [False, True])
+def test_upsert_on_cached_index_matches_rebuild(tmp_path, ships_file, feed, search_first):
+    updates, expected = feed
+    path = str(tmp_path / "ships.json")
+    shutil.copy(ships_file, path)
+    load_index(path)
+    index = load_index(path)
+    if search_first:
+        index.search("x")
+    for update in updates:
+        index.upsert(update)
+    _assert_same(index, expected)
+
+
+def test_mmsi_collision_keeps_both_ships(base):
+    index = ShipIndex(base[:2])
+    first, second = base[0]["SHIP_ID"], base[1]["SHIP_ID"]
+    index.upsert({"SHIP_ID": second, "MMSI": base[0]["MMSI"]})
+    assert sorted(ship["SHIP_ID"] for ship in index.find(base[0]["MMSI"])) == sorted([first, second])
+    index.upsert({"SHIP_ID": first, "MMSI": "1"})
+    assert [ship["SHIP_ID"] for ship in index.find(base[0]["MMSI"])] == [second]
+
+
+def test_feed_follower_applies_appended_lines(tmp_path, base):
+    path = tmp_path / "feed.jsonl"
+    path.write_text("")
+    follower = FeedFollower(str(path))
+    index = ShipIndex(base)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"SHIP_ID": base[0]["SHIP_ID"], "SHIPNAME": "NEW NAME"}) + "\n")
+        handle.write('{"SHIP_ID": "partial"')
+    updates, invalid = follower.poll()
+    for update in updates:
+        index.upsert(update)
+    assert invalid == 0
+    assert index.find("NEW NAME")[0]["SHIP_ID"] == base[0]["SHIP_ID"]
+    assert not index.find("partial")
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import load_data
+from load_data import iter_ships
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "ships.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 4096, 1024 * 1024])
+def test_iter_ships_matches_json_load(ships_file, chunk_size):
+    with open(ships_file, encoding="utf-8") as handle:
+        expected = json.load(handle)["data"]
+    assert list(iter_ships(ships_file, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{}', []),
+    ('{"data": []}', []),
+    (' { "meta" : {"data": [1]} , "data" : [ {"SHIP_ID": "1"} , {"SHIP_ID": "2"} ] , "x": [] } ',
+     [{"SHIP_ID": "1"}, {"SHIP_ID": "2"}]),
+    ('{"data": [{"LAT": 12345678.25, "NAME": "A\\u00e4 \\"B\\""}]}', [{"LAT": 12345678.25, "NAME": 'Aä "B"'}]),
+])
+def test_iter_ships_envelope(tmp_path, text, expected):
+    path = _write(tmp_path, text)
+    for chunk_size in (1, 3, 1024):
+        assert list(iter_ships(path, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("text", ['', '[]', '{"data": [{"SHIP_ID": "1"}', '{"data": [1 2]}', '{"data" [1]}'])
+def test_iter_ships_rejects_invalid_json(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iter_ships(_write(tmp_path, text), chunk_size=4))
+
+
+@pytest.fixture
+def counted_reads(monkeypatch):
+    calls = []
+    fill = load_data._Reader.fill
+
+    def counting_fill(self):
+        calls.append(len(self.buffer))
+        return fill(self)
+
+    monkeypatch.setattr(load_data._Reader, "fill", counting_fill)
+    return calls
+
+
+def test_malformed_record_fails_without_reading_to_the_end(tmp_path, counted_reads):
+    records = ", ".join(json.dumps({"SHIP_ID": str(number), "SHIPNAME": "X" * 50}) for number in range(2000))
+    path = _write(tmp_path, '{"data": [{"SHIP_ID": "0",, "LAT": 1}, ' + records + "]}")
+    with pytest.raises(ValueError):
+        list(iter_ships(path, chunk_size=256))
+    assert len(counted_reads) <= 3
+
+
+def test_unterminated_string_is_limited_by_max_value_size(tmp_path, counted_reads, monkeypatch):
+    monkeypatch.setattr(load_data, "MAX_VALUE_SIZE", 4096)
+    path = _write(tmp_path, '{"data": [{"SHIPNAME": "A' + "B" * 100_000 + '"}]}')
+    with pytest.raises(ValueError, match="4096"):
+        list(iter_ships(path, chunk_size=256))
+    assert len(counted_reads) <= 4096 // 256 + 2
+
+
+def test_long_values_across_many_chunks(tmp_path):
+    ships = [{"SHIPNAME": "A" * 5000, "LAT": -1.5e-7, "X": [True, False, None]}, {"SHIP_ID": "2"}]
+    path = _write(tmp_path, json.dumps({"data": ships}))
+    assert list(iter_ships(path, chunk_size=3)) == ships
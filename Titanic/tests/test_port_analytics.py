@@ -0,0 +1,122 @@
+import collections
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from load_data import iter_ships
+from port_analytics import ArrivalIndex, _epoch_seconds
+from ship_cache import load_index
+from ship_index import ShipIndex
+
+HOURS = [0, 1, 24, 72, 1e6]
+
+
+def _brute_force(index, reference, hours, end=None):
+    """Ankünfte pro Hafen in [reference, reference + hours] (bzw. [reference, end)), durch Prüfen jedes Schiffs."""
+    counts = collections.Counter()
+    for port, eta in zip(index.column("NEXT_PORT_NAME"), index.column("ETA")):
+        eta = _epoch_seconds(eta)
+        inside = eta <= reference + int(hours * 3600) if end is None else eta < end
+        if port and eta >= 0 and reference <= eta and inside:
+            counts[port] += 1
+    return counts
+
+
+@pytest.fixture(scope="module", params=["fresh", "cached"])
+def index(request, ships_file, tmp_path_factory):
+    if request.param == "fresh":
+        return ShipIndex(iter_ships(ships_file))
+    path = str(tmp_path_factory.mktemp("cache") / "ships.json")
+    shutil.copy(ships_file, path)
+    load_index(path)
+    return load_index(path)
+
+
+@pytest.mark.parametrize("hours", HOURS)
+def test_busiest_ports_matches_brute_force(index, hours):
+    reference, _, ports = index.busiest_ports(10, hours)
+    expected = sorted(_brute_force(index, reference, hours).items(), key=lambda item: (-item[1], item[0]))[:10]
+    assert [(port, count) for port, _, count, _ in ports] == expected
+    assert all(sum(buckets) == count for _, _, count, buckets in ports)
+
+
+@pytest.mark.parametrize("hours, bucket_hours", [(24, 6), (72, 5), (48, None), (1e6, None)])
+def test_busiest_ports_buckets_match_brute_force(index, hours, bucket_hours):
+    reference, bucket_hours, ports = index.busiest_ports(20, hours, bucket_hours)
+    assert len(ports[0][3]) == max(1, -(-int(hours * 3600) // int(bucket_hours * 3600)))
+    for port, _, count, buckets in ports:
+        for number, bucket in enumerate(buckets[:-1]):
+            start = reference + number * int(bucket_hours * 3600)
+            end = start + int(bucket_hours * 3600)
+            assert bucket == _brute_force(index, start, 0, end)[port], (port, number)
+        assert count == _brute_force(index, reference, hours)[port]
+
+
+def test_busiest_ports_rejects_too_many_buckets(index):
+    with pytest.raises(ValueError):
+        index.busiest_ports(5, 1000, 1)
+    with pytest.raises(ValueError):
+        index.busiest_ports(5, 24, 0)
+
+
+@pytest.mark.parametrize("hours", HOURS)
+def test_port_arrivals_matches_brute_force(index, hours):
+    reference, arrivals = index.port_arrivals("piraeus", hours)
+    assert len(arrivals) == _brute_force(index, reference, hours)["PIRAEUS"]
+    etas = [eta for eta, _ in arrivals]
+    assert etas == sorted(etas)
+    assert all(ship["NEXT_PORT_NAME"].upper() == "PIRAEUS" for _, ship in arrivals)
+
+
+def test_upsert_updates_arrivals(ships_file):
+    index = ShipIndex(iter_ships(ships_file))
+    reference, _, _ = index.busiest_ports(1, 24)
+    ship_id = index.column("SHIP_ID")[0]
+    index.upsert({"SHIP_ID": ship_id, "NEXT_PORT_NAME": "ZZTOP", "ETA": reference + 60})
+    _, arrivals = index.port_arrivals("zztop", 1)
+    assert [(eta, ship["SHIP_ID"]) for eta, ship in arrivals] == [(reference + 60, ship_id)]
+
+
+def test_incremental_updates_match_rebuilt_index(ships_file):
+    index = ShipIndex(iter_ships(ships_file))
+    arrivals = index._arrival_index()
+    rng = random.Random(3)
+    ports = sorted(port for port in set(index.column("NEXT_PORT_NAME")) if port) + ["NEW PORT", None]
+    reference = arrivals.reference_time
+    ship_ids = list(index.column("SHIP_ID"))
+    for round_number in range(5):
+        for _ in range(40):
+            update = {"SHIP_ID": rng.choice(ship_ids)}
+            if rng.random() < 0.7:
+                update["NEXT_PORT_NAME"] = rng.choice(ports)
+            if rng.random() < 0.7:
+                # Feste ETAs sorgen für gleiche Schlüssel, deren Reihenfolge dann die Position bestimmt.
+                update["ETA"] = rng.choice([reference + rng.randint(-3600, 72 * 3600), reference + 600,
+                                            reference + 7200, "masked", None])
+            if rng.random() < 0.2:
+                update["NEXT_PORT_COUNTRY"] = rng.choice(["GR", "FR", None])
+            index.upsert(update)
+        new_id = f"new-{round_number}"
+        ship_ids.append(new_id)
+        index.upsert({"SHIP_ID": new_id, "NEXT_PORT_NAME": rng.choice(ports[:-1]),
+                      "ETA": reference + rng.randint(0, 24 * 3600), "LAST_POS": reference + round_number})
+
+        assert index._arrivals is arrivals
+        rebuilt = ArrivalIndex(index)
+        assert arrivals.reference_time == rebuilt.reference_time
+        assert index.busiest_ports(15, 72, 6)[1:] == (6, rebuilt.busiest(15, 72, 6)[1])
+        for port in ("piraeus", "new port", ports[0]):
+            assert arrivals.arrivals(port, 72) == rebuilt.arrivals(port, 72)
+        # Gleiche Reihenfolge wie ein Neuaufbau, auch bei gleichen Schlüsseln.
+        names = [[arrivals.ports[key >> 32], key & 0xFFFFFFFF] for key in arrivals.keys.tolist()]
+        assert names == [[rebuilt.ports[key >> 32], key & 0xFFFFFFFF] for key in rebuilt.keys.tolist()]
+        assert arrivals.positions.tolist() == rebuilt.positions.tolist()
+
+
+def test_cli_starts_without_numpy(ships_file):
+    code = "import sys, main; sys.exit('numpy' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(ships_file)).returncode == 0
@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ship_cache
+from load_data import iter_ships
+from ship_cache import cache_path, load_index, meta_path
+from ship_index import ShipIndex
+
+
+@pytest.fixture
+def source(tmp_path, ships_file):
+    path = str(tmp_path / "ships.json")
+    shutil.copy(ships_file, path)
+    return path
+
+
+def _no_json(monkeypatch):
+    def fail(filePath):
+        raise AssertionError("JSON-Datei wurde trotz gültigem Cache gelesen")
+    monkeypatch.setattr(ship_cache, "iter_ships", fail)
+
+
+def _assert_same(index, expected):
+    assert len(index) == len(expected)
+    assert set(index.columns) == set(expected.columns)
+    for field in expected.columns:
+        assert list(index.column(field)) == list(expected.column(field)), field
+    assert index.country_counts == expected.country_counts
+    assert index.countries == expected.countries
+    for ship in ("371681", "QUEEN MARY 2", "9241061"):
+        assert index.find(ship) == expected.find(ship)
+
+
+def test_round_trip(source, monkeypatch):
+    expected = ShipIndex(iter_ships(source))
+    _assert_same(load_index(source), expected)
+    assert os.path.exists(cache_path(source)) and os.path.exists(meta_path(source))
+    _no_json(monkeypatch)
+    _assert_same(load_index(source), expected)
+
+
+def test_changed_source_invalidates_cache(source):
+    load_index(source)
+    with open(source, encoding="utf-8") as handle:
+        text = handle.read()
+    # Andere Größe, damit der Cache auch bei grober mtime-Auflösung als veraltet gilt.
+    with open(source, "w", encoding="utf-8") as handle:
+        handle.write(text.replace("QUEEN MARY 2", "QUEEN MARY 22", 1))
+    assert load_index(source).find("QUEEN MARY 22")
+    assert load_index(source).find("QUEEN MARY 22")
+
+
+def test_corrupt_cache_is_rebuilt(source, capsys):
+    load_index(source)
+    with open(cache_path(source), "wb") as handle:
+        handle.write(b"kein Cache")
+    assert len(load_index(source)) == len(ShipIndex(iter_ships(source)))
+    assert "Warnung" in capsys.readouterr().out
+    load_index(source)
+    assert capsys.readouterr().out == ""
+
+
+def test_no_cache(source):
+    load_index(source, use_cache=False)
+    assert not os.path.exists(cache_path(source))
+
+
+def test_cached_codes_are_memory_mapped_until_written(source, monkeypatch):
+    expected = ShipIndex(iter_ships(source))
+    load_index(source)
+    with open(cache_path(source), "rb") as handle:
+        before = handle.read()
+    _no_json(monkeypatch)
+    index = load_index(source)
+    codes = index.columns["SHIPNAME"].codes
+    assert isinstance(codes, memoryview) and isinstance(codes.obj, np.memmap)
+    ship = dict(index.ship(0), SHIPNAME="RENAMED")
+    index.upsert(ship)
+    assert index.column("SHIPNAME")[0] == "RENAMED"
+    assert not isinstance(index.columns["SHIPNAME"].codes, memoryview)
+    with open(cache_path(source), "rb") as handle:
+        assert handle.read() == before
+    _assert_same(load_index(source), expected)
+
+
+def test_missing_metadata_means_no_cache(source, monkeypatch):
+    load_index(source)
+    os.remove(meta_path(source))
+    calls = []
+    read = ship_cache.iter_ships
+    monkeypatch.setattr(ship_cache, "iter_ships", lambda filePath: calls.append(filePath) or read(filePath))
+    load_index(source)
+    assert calls == [source]
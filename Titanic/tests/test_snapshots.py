@@ -0,0 +1,64 @@
+import json
+from collections import Counter
+
+import pytest
+
+from load_data import iter_ships
+from ship_cache import load_index
+from snapshots import SnapshotSummary, discover_snapshots
+
+NAMES = ["ships_2021-09-01.json", "ships_2021-09-02.json", "20210903.json", "ships_2021-09-04.json"]
+
+
+@pytest.fixture(scope="module")
+def snapshot_dir(tmp_path_factory, ships_file):
+    """Vier Tage: jeweils ein Ausschnitt der Schiffe, an späteren Tagen mit geändertem Land oder Typ."""
+    base = list(iter_ships(ships_file))
+    directory = tmp_path_factory.mktemp("snapshots")
+    days = []
+    for day, name in enumerate(NAMES):
+        ships = [dict(ship) for ship in base[day * 80:day * 80 + 200]]
+        for ship in ships[::5]:
+            ship["COUNTRY"] = f"Land {day}"
+            ship["TYPE_SUMMARY"] = f"Typ {day % 2}"
+        ships.append({"SHIPNAME": "OHNE ID", "COUNTRY": "Nirgendwo"})
+        with open(directory / name, "w", encoding="utf-8") as handle:
+            json.dump({"data": ships, "totalCount": len(ships)}, handle)
+        days.append(ships)
+    (directory / "notes.txt").write_text("kein Snapshot")
+    # Für einen Tag liegt ein Binär-Cache vor; er muss dieselben Angaben liefern wie die JSON-Datei.
+    load_index(str(directory / NAMES[1]))
+    return str(directory), days
+
+
+def _brute_force(days):
+    latest = {}
+    for ships in days:
+        latest.update((ship["SHIP_ID"], (ship.get("COUNTRY"), ship.get("TYPE_SUMMARY")))
+                      for ship in ships if ship.get("SHIP_ID") is not None)
+    return latest
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_summary_matches_sequential_merge(snapshot_dir, workers):
+    directory, days = snapshot_dir
+    summary = SnapshotSummary(directory, max_workers=workers)
+    latest = _brute_force(days)
+    assert summary.records == sum(len(ships) for ships in days)
+    assert summary.ships == latest
+    assert len(summary) == len(latest)
+    assert summary.country_counts == Counter(country for country, _ in latest.values())
+    assert summary.type_counts == Counter(type_summary for _, type_summary in latest.values())
+    assert summary.top_countries(3) == Counter(country for country, _ in latest.values()).most_common(3)
+
+
+def test_days_limits_to_latest_snapshots(snapshot_dir):
+    directory, days = snapshot_dir
+    summary = SnapshotSummary(directory, days=2, max_workers=1)
+    assert [path.rsplit("/", 1)[-1] for _, path in summary.snapshots] == NAMES[2:]
+    assert summary.ships == _brute_force(days[2:])
+
+
+def test_empty_directory(tmp_path):
+    with pytest.raises(ValueError):
+        discover_snapshots(str(tmp_path))
@@ -0,0 +1,74 @@
+import math
+import random
+
+import pytest
+
+from batch import parse_box, parse_circle
+from spatial_index import GridIndex, haversine_km
+
+
+@pytest.fixture(scope="module")
+def grid():
+    rng = random.Random(18)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(2000)]
+    # Pole, Datumsgrenze und Zellränder.
+    points += [(90.0, 0.0), (-90.0, 45.0), (0.0, 180.0), (0.0, -180.0), (10.0, 179.9), (10.0, -179.9), (0.0, 0.0)]
+    index = GridIndex(cell_degrees=5.0)
+    for position, (lat, lon) in enumerate(points):
+        index.update(position, lat, lon)
+    return index, points
+
+
+QUERIES = [(0.0, 0.0), (48.4, -4.5), (10.0, 180.0), (-10.0, -179.5), (89.5, 120.0), (-89.9, -60.0)]
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("km", [0, 50, 600, 5000, 25000])
+def test_near_matches_brute_force(grid, lat, lon, km):
+    index, points = grid
+    expected = sorted(position for position, point in enumerate(points) if haversine_km(lat, lon, *point) <= km)
+    assert sorted(position for _, position in index.near(lat, lon, km)) == expected
+
+
+@pytest.mark.parametrize("box", [(-10, -10, 10, 10), (40, 170, 60, -170), (-90, -180, 90, 180), (85, 0, 90, 10)])
+def test_in_box_matches_brute_force(grid, box):
+    index, points = grid
+    min_lat, min_lon, max_lat, max_lon = box
+    crosses = min_lon > max_lon
+    expected = [position for position, (lat, lon) in enumerate(points) if min_lat <= lat <= max_lat
+                and ((lon >= min_lon or lon <= max_lon) if crosses else min_lon <= lon <= max_lon)]
+    assert sorted(index.in_box(*box)) == sorted(expected)
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("k", [1, 10, 100])
+def test_nearest_matches_brute_force(grid, lat, lon, k):
+    index, points = grid
+    found = index.nearest(lat, lon, k, exclude=[0])
+    expected = sorted(haversine_km(lat, lon, *point) for position, point in enumerate(points) if position)[:k]
+    assert [distance for distance, _ in found] == pytest.approx(expected)
+
+
+def test_update_moves_and_removes():
+    index = GridIndex(cell_degrees=5.0)
+    index.update(1, 10.0, 10.0)
+    index.update(1, -10.0, -10.0)
+    assert index.in_box(0, 0, 20, 20) == [] and index.in_box(-20, -20, 0, 0) == [1]
+    index.update(1, None, None)
+    assert len(index) == 0 and index.near(-10.0, -10.0, 100) == []
+
+
+@pytest.mark.parametrize("args", [(math.nan, 0, 10), (0, math.inf, 10), (91, 0, 10), (0, 181, 10), (0, 0, -1), (0, 0, math.inf)])
+def test_near_rejects_invalid_input(grid, args):
+    with pytest.raises(ValueError):
+        grid[0].near(*args)
+
+
+@pytest.mark.parametrize("text", ["inf 0 10", "0 nan 10", "91 0 10", "0 0 -5", "1 2", "a b c"])
+def test_parse_circle_rejects_invalid_input(text):
+    assert parse_circle(text.split()) is None
+
+
+@pytest.mark.parametrize("text", ["-inf 0 10 10", "0 0 nan 10", "10 0 -95 10", "50 0 40 10", "1 2 3"])
+def test_parse_box_rejects_invalid_input(text):
+    assert parse_box(text.split()) is None
@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from load_data import iter_ships
+from ship_index import SEARCH_FIELDS, ShipIndex
+from trigram_index import TrigramIndex, _query_trigrams, trigrams
+
+QUERIES = ["queen mray", "QUEEN MARY 2", "maersk", "pir", "x", "helsinki"]
+
+
+@pytest.fixture(scope="module")
+def search_index(ships_file):
+    index = TrigramIndex()
+    for position, ship in enumerate(iter_ships(ships_file)):
+        for field in SEARCH_FIELDS:
+            if ship.get(field):
+                index.add(field, ship[field], position)
+    return index
+
+
+def _brute_force(index, text, threshold=0.5):
+    """(Abdeckung, Ähnlichkeit, Feld, Text) aller Treffer, direkt aus den Trigramm-Mengen berechnet."""
+    query, query_all = _query_trigrams(text), trigrams(text)
+    found = []
+    for field, value in index.terms:
+        grams = trigrams(value)
+        hits = len(query & grams)
+        if hits and hits >= math.ceil(threshold * len(query)):
+            shared = len(query_all & grams)
+            found.append((hits / len(query), shared / len(query_all | grams), field, value))
+    return found
+
+
+@pytest.mark.parametrize("text", QUERIES)
+def test_scores_and_ranking_match_brute_force(search_index, text):
+    found = search_index.search(text, limit=len(search_index))
+    expected = _brute_force(search_index, text)
+    assert sorted((coverage, field, value) for coverage, _, field, value, _ in found) == \
+        sorted((coverage, field, value) for coverage, _, field, value in expected)
+    for coverage, similarity, field, value, _ in found:
+        assert similarity == pytest.approx(next(s for c, s, f, v in expected if (f, v) == (field, value)))
+    ranking = [(coverage, similarity) for coverage, similarity, *_ in found]
+    assert ranking == sorted(ranking, reverse=True)
+
+
+def test_ship_search_reports_both_scores(ships_file):
+    index = ShipIndex(iter_ships(ships_file))
+    coverage, similarity, field, value, ship = index.search("QUEEN MARY 2", limit=1)[0]
+    assert (coverage, similarity, field, value, ship["SHIP_ID"]) == (1.0, 1.0, "SHIPNAME", "QUEEN MARY 2", "371681")
+    coverage, similarity, *_ = index.search("queen mray", limit=1)[0]
+    assert 0 < similarity < coverage < 1
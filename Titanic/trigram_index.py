@@ -0,0 +1,142 @@
+"""
+Trigramm-Index für die unscharfe Suche in Texten (Schiffsnamen, Rufzeichen, Ziele).
+
+Jeder Text wird in Wörter zerlegt und jedes Wort in überlappende Dreiergruppen von Zeichen, an
+den Wortgrenzen mit Leerzeichen aufgefüllt ("MARY" -> "  M", " MA", "MAR", "ARY", "RY "). Der
+Index speichert pro Trigramm die Texte, in denen es vorkommt. Eine Suche zählt für jeden Text, wie
+viele Trigramme der Anfrage er enthält; so werden Teilstrings und Namen mit Tippfehlern gefunden,
+ohne alle Texte einzeln zu vergleichen.
+"""
+
+import math
+import re
+from array import array
+
+import numpy as np
+
+from position_table import PositionTable
+
+_SEPARATORS = re.compile(r"[^0-9A-Z]+")
+
+
+def _words(text):
+    return [word for word in _SEPARATORS.split(text.upper()) if word]
+
+
+def trigrams(text):
+    """Alle Trigramme eines Texts, mit aufgefüllten Wortgrenzen."""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _query_trigrams(text):
+    """
+    Trigramme einer Suchanfrage: nur die aus dem Wortinneren, damit die Anfrage auch mitten in
+    einem Wort passt; Wörter unter drei Zeichen behalten ihre Randtrigramme.
+    """
+    grams = set()
+    for word in _words(text):
+        if len(word) < 3:
+            grams.update(trigrams(word))
+        else:
+            grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Trigramm -> Texte, Text -> Positionen (z. B. im ShipIndex), getrennt nach Feld. An einer
+    Position steht pro Feld höchstens ein Text.
+    """
+
+    def __init__(self):
+        self.terms = []       # Text-Nummer -> (Feld, Text)
+        self._positions = {}  # Feld -> PositionTable: Text-Nummer -> Positionen, an denen der Text steht
+        self._term_ids = {}
+        self._postings = {}   # Trigramm -> array('i') der Text-Nummern
+        self._sizes = array("i")   # Text-Nummer -> Anzahl Trigramme
+        self._counts = array("i")  # Text-Nummer -> Anzahl Positionen (0: Text kommt nicht mehr vor)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, field, text, position):
+        """
+        Vermerkt, dass an position im Feld field der Text text steht.
+        """
+        key = (field, text)
+        term = self._term_ids.get(key)
+        if term is None:
+            term = self._term_ids[key] = len(self.terms)
+            self.terms.append(key)
+            self._counts.append(0)
+            grams = trigrams(text)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = array("i")
+                posting.append(term)
+        table = self._positions.get(field)
+        if table is None:
+            table = self._positions[field] = PositionTable()
+        table.add(term, position)
+        self._counts[term] += 1
+
+    def discard(self, field, text, position):
+        """Entfernt einen mit add() vermerkten Eintrag in konstanter Zeit; unbekannte Einträge werden ignoriert."""
+        term = self._term_ids.get((field, text))
+        if term is not None:
+            table = self._positions[field]
+            table.discard(term, position)
+            self._counts[term] = table.count(term)
+
+    def positions(self, term):
+        """Die Positionen, an denen der Text mit der Nummer term steht, aufsteigend sortiert."""
+        field, _ = self.terms[term]
+        return self._positions[field].get(term)
+
+    def _shared(self, grams):
+        """Pro Text die Anzahl der Trigramme aus grams, die er enthält (NumPy-Array)."""
+        postings = [np.frombuffer(self._postings[gram], dtype=np.int32) for gram in grams if gram in self._postings]
+        if not postings:
+            return np.zeros(len(self.terms), dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=len(self.terms))
+
+    def search(self, text, limit=10, threshold=0.5):
+        """
+        Sucht die Texte, die der Anfrage am ähnlichsten sind.
+
+        Rangfolge: zuerst der Anteil der Anfrage-Trigramme, die im Text vorkommen (1.0 für jeden
+        Text, der die Anfrage enthält), dann die Jaccard-Ähnlichkeit aller Trigramme, so dass
+        genaue und kürzere Treffer vor längeren stehen.
+
+        Parameter:
+            text (str): Die Anfrage, Groß-/Kleinschreibung und Satzzeichen spielen keine Rolle.
+            limit (int): Höchstens so viele Texte.
+            threshold (float): Mindestanteil der Anfrage-Trigramme, die ein Treffer enthalten muss.
+
+        Rückgabe:
+            list: (Abdeckung, Ähnlichkeit, Feld, Text, Positionen)-Tupel, bester Treffer zuerst. Die
+            Abdeckung ist der Anteil der Anfrage-Trigramme im Text, die Ähnlichkeit die Jaccard-
+            Ähnlichkeit; nach diesen beiden Werten in dieser Reihenfolge ist die Liste sortiert.
+        """
+        query = _query_trigrams(text)
+        if not query or not self.terms or limit <= 0:
+            return []
+        hits = self._shared(query)
+        candidates = np.flatnonzero((hits >= max(1, math.ceil(threshold * len(query))))
+                                    & (np.frombuffer(self._counts, dtype=np.int32) > 0))
+        if not len(candidates):
+            return []
+        query_all = trigrams(text)
+        shared = self._shared(query_all)[candidates]
+        coverage = hits[candidates] / len(query)
+        similarity = shared / (len(query_all) + np.frombuffer(self._sizes, dtype=np.int32)[candidates] - shared)
+        # lexsort sortiert nach dem letzten Schlüssel zuerst; bei Gleichstand gewinnt der ältere Text.
+        best = np.lexsort((candidates, -similarity, -coverage))[:limit]
+        return [(float(coverage[i]), float(similarity[i]), *self.terms[term], self.positions(term))
+                for i, term in zip(best.tolist(), candidates[best].tolist())]